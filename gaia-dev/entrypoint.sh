@@ -4,6 +4,16 @@ set -e
 # Activate virtual environment
 source /home/gaia/.venv/bin/activate
 
+source /usr/local/lib/gaia/runtime-env.sh
+source /usr/local/lib/gaia/uv-link-mode.sh
+source /usr/local/lib/gaia/resource-limits.sh
+source /usr/local/lib/gaia/allocator.sh
+source /usr/local/lib/gaia/prefetch.sh
+source /usr/local/lib/gaia/startup-hooks.sh
+source /usr/local/lib/gaia/git-maintenance.sh
+source /usr/local/lib/gaia/firewall.sh
+runtime_env_reset
+
 # GAIA Development Container Entrypoint
 # Clones GAIA on first run, configures GitHub CLI and Claude Code
 
@@ -19,6 +29,27 @@ fi
 export LEMONADE_BASE_URL
 echo "Lemonade base URL: $LEMONADE_BASE_URL"
 
+# Size thread pools and uv concurrency to the container's cgroup limits
+if [ "${GAIA_AUTOTUNE:-true}" = "true" ]; then
+    apply_resource_defaults
+fi
+
+# Preload the selected allocator for GAIA processes
+configure_allocator
+
+# Keep downloaded models in GAIA_MODEL_CACHE
+configure_model_cache
+
+# Restrict egress to the allowlist before anything else reaches the network
+if [ "$GAIA_FIREWALL" = "true" ]; then
+    echo "Initializing firewall..."
+    FIREWALL_SUDO_ENV="LEMONADE_BASE_URL,GAIA_FIREWALL_DEFAULT_DOMAINS,GAIA_FIREWALL_DOMAINS,GAIA_FIREWALL_DNS_JOBS,GAIA_FIREWALL_SET"
+    if ! sudo --preserve-env="$FIREWALL_SUDO_ENV" bash /usr/local/lib/gaia/firewall.sh; then
+        echo "ERROR: Firewall initialization failed"
+        exit 1
+    fi
+fi
+
 # Clone GAIA source if not present (first run with empty volume)
 GAIA_DIR="/home/gaia/gaia"
 GAIA_REPO_URL="${GAIA_REPO_URL:-https://github.com/amd/gaia.git}"
@@ -50,6 +81,26 @@ else
     echo "GAIA source found at $GAIA_DIR"
 fi
 
+# Keep the volume's repository fast: commit-graph, repacks and prefetch run in
+# the background (there is no cron in the container)
+if [ "$GAIA_GIT_MAINTENANCE" = "true" ] && [ -d "$GAIA_DIR/.git" ]; then
+    configure_git_maintenance "$GAIA_DIR"
+    start_git_maintenance "$GAIA_DIR"
+fi
+
+# Link packages from the uv cache into the venv instead of copying them when
+# the cache and the venv share a filesystem (not the case with a cache volume)
+if [ -n "$UV_LINK_MODE" ]; then
+    echo "uv link mode: $UV_LINK_MODE (set by UV_LINK_MODE)"
+else
+    LINK_MODE_RESULT=$(detect_uv_link_mode "$(uv cache dir)" "$VIRTUAL_ENV")
+    runtime_env_export UV_LINK_MODE "${LINK_MODE_RESULT%%:*}"
+    echo "uv link mode: $LINK_MODE_RESULT"
+fi
+
+# Download declared models and assets before reporting ready
+prefetch_assets "$VIRTUAL_ENV/bin/python"
+
 # Configure GitHub CLI if GITHUB_TOKEN is provided
 if [ -n "$GITHUB_TOKEN" ]; then
     echo "Configuring GitHub CLI with provided token..."
@@ -68,14 +119,19 @@ else
     echo "ANTHROPIC_API_KEY not set. Run 'claude' to authenticate interactively."
 fi
 
+# Run hooks added by derived images (/etc/gaia/startup.d)
+if ! run_startup_hooks; then
+    exit 1
+fi
+
 echo ""
 echo "=== Ready ==="
 echo ""
 echo "GAIA source: ~/gaia"
 echo ""
-echo "First-time setup (run once):"
+echo "First-time setup (run once; dependencies for $GAIA_DEPS_REF are preinstalled):"
 echo "  cd ~/gaia"
-echo "  uv pip install -e '.[dev,mcp,eval,rag]'"
+echo "  uv pip install -e '.[$GAIA_EXTRAS]'"
 echo "  npm install  # if using Electron apps"
 echo ""
 echo "Available commands:"
@@ -14,14 +14,146 @@ if [ -z "$LEMONADE_BASE_URL" ]; then
     exit 1
 fi
 
+source /usr/local/lib/gaia/runtime-env.sh
+source /usr/local/lib/gaia/resource-limits.sh
+source /usr/local/lib/gaia/allocator.sh
+source /usr/local/lib/gaia/supervisor.sh
+source /usr/local/lib/gaia/latest-version.sh
+source /usr/local/lib/gaia/prefetch.sh
+source /usr/local/lib/gaia/startup-hooks.sh
+source /usr/local/lib/gaia/install-stats.sh
+runtime_env_reset
+
+# Size thread pools and uv concurrency to the container's cgroup limits
+if [ "${GAIA_AUTOTUNE:-true}" = "true" ]; then
+    apply_resource_defaults
+fi
+
+# Preload the selected allocator for GAIA processes
+configure_allocator
+
+# Keep downloaded models in GAIA_MODEL_CACHE
+configure_model_cache
+
 # Configuration from environment variables
 SKIP_INSTALL="${SKIP_INSTALL:-false}"
+# Run mode: shell runs the container command (default), serve supervises
+# GAIA_WORKERS copies of GAIA_SERVE_COMMAND (one per CPU by default)
+GAIA_MODE="${GAIA_MODE:-shell}"
+case "$GAIA_MODE" in
+    shell|serve) ;;
+    *)
+        echo "ERROR: Invalid GAIA_MODE '$GAIA_MODE' (expected shell or serve)"
+        exit 1
+        ;;
+esac
+GAIA_WORKERS="${GAIA_WORKERS:-${GAIA_CPU_LIMIT:-$(detect_cpu_limit)}}"
+if [ "$GAIA_MODE" = "serve" ] && ! [[ "$GAIA_WORKERS" =~ ^[1-9][0-9]*$ ]]; then
+    echo "ERROR: Invalid GAIA_WORKERS '$GAIA_WORKERS' (expected a positive integer)"
+    exit 1
+fi
+GAIA_SERVE_COMMAND="${GAIA_SERVE_COMMAND:-gaia mcp start --host 0.0.0.0 --port \$GAIA_WORKER_PORT}"
+GAIA_ENV_MODE="${GAIA_ENV_MODE:-system}"
+GAIA_ENV_DIR="${GAIA_ENV_DIR:-/opt/gaia-env}"
+GAIA_ENV_MARKER="$GAIA_ENV_DIR/.gaia-env"
+# Interpreter GAIA is installed into: the image's uv-managed Python
+GAIA_BASE_PYTHON="${GAIA_BASE_PYTHON:-/opt/python/current/bin/python3}"
+# uv cache used by the (root) installer; mount a volume here to keep downloads
+GAIA_UV_CACHE_DIR="${GAIA_UV_CACHE_DIR:-/var/cache/uv}"
+# Settings passed through sudo to the installer
+UV_SUDO_ENV="UV_CONCURRENT_DOWNLOADS,UV_CONCURRENT_BUILDS,UV_CONCURRENT_INSTALLS"
+UV_SUDO_ENV+=",UV_DEFAULT_INDEX,UV_INDEX,UV_INDEX_URL,UV_EXTRA_INDEX_URL,UV_HTTP_TIMEOUT,UV_HTTP_RETRIES"
+UV_SUDO_ENV+=",GAIA_INSTALL_ATTEMPTS,GAIA_INSTALL_BACKOFF,GAIA_INSTALL_BACKOFF_MAX,GAIA_INSTALL_DEADLINE"
+UV_SUDO_ENV+=",GAIA_INSTALL_LOCK,GAIA_INSTALL_LOCK_STALE"
+# Installer errors that retrying cannot fix (e.g. the requested version does not exist)
+UV_PERMANENT_ERRORS="No solution found when resolving"
+
+# Select where GAIA is installed:
+#   system       - site-packages of the image's Python, GAIA_BASE_PYTHON (default)
+#   install-only - virtual environment in GAIA_ENV_DIR (e.g. a named volume), then exit
+#   shared       - use an environment prepared by an install-only container, no install
+case "$GAIA_ENV_MODE" in
+    system)
+        UV_PYTHON_ARGS=(--python "$GAIA_BASE_PYTHON")
+        UV_INSTALL_ARGS=(--python "$GAIA_BASE_PYTHON" --break-system-packages)
+        UV_TARGET_DIR=$("$GAIA_BASE_PYTHON" -c 'import sysconfig; print(sysconfig.get_paths()["purelib"])')
+        GAIA_PYTHON="$GAIA_BASE_PYTHON"
+        ;;
+    install-only)
+        echo "Install-only mode: installing GAIA into $GAIA_ENV_DIR"
+        if [ ! -x "$GAIA_ENV_DIR/bin/python" ]; then
+            sudo "$HOME/.local/bin/uv" venv --python "$GAIA_BASE_PYTHON" "$GAIA_ENV_DIR"
+        fi
+        # Consumers must never start against a half-installed environment
+        sudo rm -f "$GAIA_ENV_MARKER"
+        SKIP_INSTALL=false
+        UV_PYTHON_ARGS=(--python "$GAIA_ENV_DIR/bin/python")
+        UV_INSTALL_ARGS=("${UV_PYTHON_ARGS[@]}")
+        UV_TARGET_DIR="$GAIA_ENV_DIR"
+        GAIA_PYTHON="$GAIA_ENV_DIR/bin/python"
+        ;;
+    shared)
+        if [ ! -f "$GAIA_ENV_MARKER" ] || ! "$GAIA_ENV_DIR/bin/python" -c "import gaia" 2>/dev/null; then
+            echo "ERROR: No usable GAIA environment found at $GAIA_ENV_DIR"
+            echo "Populate the volume first with an init container:"
+            echo "  docker run --rm -v gaia-env:$GAIA_ENV_DIR -e GAIA_ENV_MODE=install-only ..."
+            exit 1
+        fi
+        SHARED_VERSION=$(awk '{print $2}' "$GAIA_ENV_MARKER")
+        echo "Using shared GAIA environment at $GAIA_ENV_DIR (amd-gaia $SHARED_VERSION)"
+        if [ -n "$GAIA_VERSION" ] && [ "$GAIA_VERSION" != "$SHARED_VERSION" ]; then
+            echo "Warning: GAIA_VERSION=$GAIA_VERSION but the shared environment has $SHARED_VERSION"
+        fi
+        SKIP_INSTALL=true
+        SKIP_REASON="GAIA_ENV_MODE=shared"
+        export VIRTUAL_ENV="$GAIA_ENV_DIR"
+        export PATH="$GAIA_ENV_DIR/bin:$PATH"
+        GAIA_PYTHON="$GAIA_ENV_DIR/bin/python"
+        ;;
+    *)
+        echo "ERROR: Unknown GAIA_ENV_MODE '$GAIA_ENV_MODE' (expected system, install-only or shared)"
+        exit 1
+        ;;
+esac
 
 # Install GAIA from PyPI
 if [ "$SKIP_INSTALL" != "true" ]; then
+    # Link packages from the uv cache instead of copying them when the filesystem allows it
+    if [ -n "$UV_LINK_MODE" ]; then
+        echo "uv link mode: $UV_LINK_MODE (set by UV_LINK_MODE)"
+    else
+        # Probe as root: the installer runs as root and owns both directories
+        LINK_MODE_RESULT=$(sudo bash -c 'source /usr/local/lib/gaia/uv-link-mode.sh && detect_uv_link_mode "$0" "$1"' \
+            "$GAIA_UV_CACHE_DIR" "$UV_TARGET_DIR")
+        UV_LINK_MODE="${LINK_MODE_RESULT%%:*}"
+        echo "uv link mode: $LINK_MODE_RESULT"
+    fi
+    UV_INSTALL_ARGS+=(--cache-dir "$GAIA_UV_CACHE_DIR" --link-mode "$UV_LINK_MODE")
+
+    # Sample CPU, memory, disk and network use of the install (GAIA_INSTALL_STATS=true)
+    start_install_stats
+
+    # Resolve "latest" once per GAIA_LATEST_TTL and install it like a pinned version
+    if [ -z "$GAIA_VERSION" ]; then
+        RESOLVE_LATEST=true
+        if CACHED_LATEST=$(cached_latest_version); then
+            GAIA_VERSION="${CACHED_LATEST% *}"
+            echo "Latest GAIA version: $GAIA_VERSION (cached ${CACHED_LATEST#* }s ago, GAIA_LATEST_TTL=${GAIA_LATEST_TTL}s)"
+        elif GAIA_VERSION=$(resolve_latest_version); then
+            echo "Latest GAIA version: $GAIA_VERSION (refreshed from ${UV_DEFAULT_INDEX:-${UV_INDEX_URL:-PyPI}})"
+        else
+            GAIA_VERSION=""
+            echo "Warning: Could not resolve the latest GAIA version from ${UV_DEFAULT_INDEX:-${UV_INDEX_URL:-PyPI}}"
+        fi
+    fi
+
     if [ -n "$GAIA_VERSION" ]; then
         echo "Installing GAIA version $GAIA_VERSION from PyPI..."
-        if ! sudo "$HOME/.local/bin/uv" pip install --system --break-system-packages "amd-gaia[dev,mcp,eval,rag]==${GAIA_VERSION}"; then
+        if ! sudo --preserve-env="$UV_SUDO_ENV" GAIA_INSTALL_LOCK_DIR="$GAIA_UV_CACHE_DIR" \
+            bash /usr/local/lib/gaia/install-lock.sh \
+            bash /usr/local/lib/gaia/retry.sh "$UV_PERMANENT_ERRORS" \
+            "$HOME/.local/bin/uv" pip install "${UV_INSTALL_ARGS[@]}" "amd-gaia[dev,mcp,eval,rag]==${GAIA_VERSION}"; then
+            stop_install_stats failed "$GAIA_VERSION"
             echo ""
             echo "ERROR: Failed to install amd-gaia==${GAIA_VERSION}"
             echo "Possible causes:"
@@ -33,7 +165,11 @@ if [ "$SKIP_INSTALL" != "true" ]; then
         fi
     else
         echo "No GAIA_VERSION specified, installing latest from PyPI..."
-        if ! sudo "$HOME/.local/bin/uv" pip install --system --break-system-packages "amd-gaia[dev,mcp,eval,rag]"; then
+        if ! sudo --preserve-env="$UV_SUDO_ENV" GAIA_INSTALL_LOCK_DIR="$GAIA_UV_CACHE_DIR" \
+            bash /usr/local/lib/gaia/install-lock.sh \
+            bash /usr/local/lib/gaia/retry.sh "$UV_PERMANENT_ERRORS" \
+            "$HOME/.local/bin/uv" pip install "${UV_INSTALL_ARGS[@]}" "amd-gaia[dev,mcp,eval,rag]"; then
+            stop_install_stats failed "$GAIA_VERSION"
             echo ""
             echo "ERROR: Failed to install amd-gaia from PyPI"
             echo "Possible causes:"
@@ -44,17 +180,37 @@ if [ "$SKIP_INSTALL" != "true" ]; then
     fi
 
     # Log the actual installed version
-    INSTALLED_VERSION=$(sudo "$HOME/.local/bin/uv" pip show amd-gaia 2>/dev/null | grep "^Version:" | awk '{print $2}')
+    INSTALLED_VERSION=$(sudo "$HOME/.local/bin/uv" pip show amd-gaia "${UV_PYTHON_ARGS[@]}" 2>/dev/null | grep "^Version:" | awk '{print $2}')
     if [ -n "$INSTALLED_VERSION" ]; then
         echo "Installed GAIA version: $INSTALLED_VERSION"
     fi
+    stop_install_stats ok "$INSTALLED_VERSION"
+    if [ "$RESOLVE_LATEST" = "true" ] && [ -n "$INSTALLED_VERSION" ] && [ -z "$CACHED_LATEST" ]; then
+        save_latest_version "$INSTALLED_VERSION"
+    fi
 else
-    echo "Skipping installation (SKIP_INSTALL=true)"
+    echo "Skipping installation (${SKIP_REASON:-SKIP_INSTALL=true})"
+fi
+
+# Download declared models and assets before reporting ready
+prefetch_assets "$GAIA_PYTHON"
+
+if [ "$GAIA_ENV_MODE" = "install-only" ]; then
+    echo "amd-gaia ${INSTALLED_VERSION:-unknown}" | sudo tee "$GAIA_ENV_MARKER" > /dev/null
+    echo ""
+    echo "=== Install complete ==="
+    echo "GAIA environment ready at $GAIA_ENV_DIR, exiting (GAIA_ENV_MODE=install-only)"
+    exit 0
 fi
 
 export LEMONADE_BASE_URL
 echo "Lemonade base URL: $LEMONADE_BASE_URL"
 
+# Run hooks added by derived images (/etc/gaia/startup.d)
+if ! run_startup_hooks; then
+    exit 1
+fi
+
 echo ""
 echo "=== Ready ==="
 echo ""
@@ -62,5 +218,12 @@ echo "GAIA version: ${GAIA_VERSION:-latest}"
 echo "Access: docker exec -it <container> zsh"
 echo ""
 
+if [ "$GAIA_MODE" = "serve" ]; then
+    echo "Serving: $GAIA_WORKERS worker(s) on ports $GAIA_SERVE_PORT-$(( GAIA_SERVE_PORT + GAIA_WORKERS - 1 ))"
+    echo ""
+    supervise_workers "$GAIA_WORKERS" "$GAIA_SERVE_COMMAND"
+    exit 0
+fi
+
 # Execute command passed to container
 exec "$@"
@@ -0,0 +1,41 @@
+#!/bin/bash
+# Memory allocator selection for long-running GAIA processes
+#
+# Many-threaded Python processes can grow steadily under glibc malloc, which
+# keeps up to 8 arenas per CPU of the host. GAIA_ALLOCATOR selects:
+#   glibc        - leave malloc alone (default)
+#   glibc-arenas - glibc with MALLOC_ARENA_MAX (default 2)
+#   jemalloc     - preload jemalloc with MALLOC_CONF tuned for low idle RSS
+# Variables the user already set are left alone. Requires runtime-env.sh.
+
+GAIA_JEMALLOC_LIB="${GAIA_JEMALLOC_LIB:-/usr/lib/$(uname -m)-linux-gnu/libjemalloc.so.2}"
+
+configure_allocator() {
+    local allocator="${GAIA_ALLOCATOR:-glibc}"
+    local narenas="${GAIA_CPU_LIMIT:-$(nproc 2>/dev/null || echo 1)}"
+
+    case "$allocator" in
+        glibc)
+            ;;
+        glibc-arenas)
+            [ -z "${MALLOC_ARENA_MAX+x}" ] && runtime_env_export MALLOC_ARENA_MAX 2
+            echo "Allocator: glibc (MALLOC_ARENA_MAX=$MALLOC_ARENA_MAX)"
+            ;;
+        jemalloc)
+            if [ ! -r "$GAIA_JEMALLOC_LIB" ]; then
+                echo "Warning: $GAIA_JEMALLOC_LIB not found, using glibc malloc"
+                return 0
+            fi
+            # One arena per available CPU instead of jemalloc's 4 per host CPU;
+            # a background thread returns freed pages after the decay time
+            [ -z "${MALLOC_CONF+x}" ] && runtime_env_export MALLOC_CONF \
+                "background_thread:true,narenas:$narenas,dirty_decay_ms:5000,muzzy_decay_ms:5000"
+            runtime_env_export LD_PRELOAD "$GAIA_JEMALLOC_LIB${LD_PRELOAD:+:$LD_PRELOAD}"
+            echo "Allocator: jemalloc (MALLOC_CONF=$MALLOC_CONF)"
+            ;;
+        *)
+            echo "ERROR: Invalid GAIA_ALLOCATOR '$allocator' (expected glibc, glibc-arenas or jemalloc)"
+            return 1
+            ;;
+    esac
+}
@@ -0,0 +1,125 @@
+#!/bin/bash
+# Egress allowlist for the Claude Code sandbox
+#
+# init_firewall resolves GAIA_FIREWALL_DEFAULT_DOMAINS, the Lemonade server and
+# GAIA_FIREWALL_DOMAINS with parallel DNS lookups (GAIA_FIREWALL_DNS_JOBS at a
+# time), collapses the addresses into as few networks as possible with
+# aggregate and loads them into one hash:net ipset. A single iptables rule
+# matches the set, so the per-packet cost stays the same however many
+# endpoints are allowed; everything else leaving the container is rejected
+# (DNS and the Docker host excepted). Reloading swaps in a new set atomically.
+# Needs root and the NET_ADMIN and NET_RAW capabilities; run it as
+#   sudo bash firewall.sh
+
+GAIA_FIREWALL="${GAIA_FIREWALL:-false}"
+GAIA_FIREWALL_DEFAULT_DOMAINS="${GAIA_FIREWALL_DEFAULT_DOMAINS:-api.anthropic.com statsig.anthropic.com statsig.com sentry.io claude.ai github.com api.github.com codeload.github.com objects.githubusercontent.com raw.githubusercontent.com release-assets.githubusercontent.com registry.npmjs.org pypi.org files.pythonhosted.org astral.sh huggingface.co cdn-lfs.huggingface.co cas-bridge.xethub.hf.co}"
+GAIA_FIREWALL_DOMAINS="${GAIA_FIREWALL_DOMAINS:-}"
+GAIA_FIREWALL_DNS_JOBS="${GAIA_FIREWALL_DNS_JOBS:-16}"
+GAIA_FIREWALL_SET="${GAIA_FIREWALL_SET:-gaia-allowed}"
+GAIA_FIREWALL_CHAIN="GAIA-EGRESS"
+
+# firewall_entries: the allowlist (domains, addresses and networks), one per line
+firewall_entries() {
+    local host
+    {
+        if [ -n "$LEMONADE_BASE_URL" ]; then
+            host="${LEMONADE_BASE_URL#*://}"
+            host="${host%%/*}"
+            echo "${host%%:*}"
+        fi
+        # Comma- or whitespace-separated
+        printf '%s\n' ${GAIA_FIREWALL_DEFAULT_DOMAINS//,/ } ${GAIA_FIREWALL_DOMAINS//,/ }
+    } | sed '/^$/d' | sort -u
+}
+
+# _resolve_entry ENTRY: IPv4 addresses or networks for a domain, address or CIDR
+_resolve_entry() {
+    local entry="$1" addresses
+    if [[ "$entry" =~ ^[0-9]+(\.[0-9]+){3}(/[0-9]+)?$ ]]; then
+        echo "$entry"
+        return
+    fi
+    addresses=$(dig +short +time=2 +tries=2 A "$entry" 2>/dev/null | grep -E '^[0-9]+(\.[0-9]+){3}$')
+    # Names only /etc/hosts knows (e.g. host.docker.internal)
+    [ -z "$addresses" ] && addresses=$(getent ahostsv4 "$entry" 2>/dev/null | awk '{print $1}' | sort -u)
+    if [ -z "$addresses" ]; then
+        echo "Warning: could not resolve $entry, it will be blocked" >&2
+        return
+    fi
+    echo "$addresses"
+}
+export -f _resolve_entry
+
+# resolve_entries: resolve the entries on stdin in parallel, one lookup per process
+resolve_entries() {
+    xargs -r -n 1 -P "$GAIA_FIREWALL_DNS_JOBS" bash -c '_resolve_entry "$1"' _
+}
+
+# collapse_networks: merge the addresses and networks on stdin into the fewest CIDRs
+collapse_networks() {
+    local networks
+    networks=$(awk '{print (index($1, "/") ? $1 : $1 "/32")}')
+    if command -v aggregate >/dev/null 2>&1; then
+        echo "$networks" | aggregate -q
+    else
+        echo "$networks" | sort -u
+    fi
+}
+
+# load_allowlist: fill GAIA_FIREWALL_SET with the networks on stdin, swapping
+# the new contents in atomically so rules never see a half-filled set
+load_allowlist() {
+    local staging="${GAIA_FIREWALL_SET}-new"
+    {
+        echo "create $GAIA_FIREWALL_SET hash:net family inet -exist"
+        echo "create $staging hash:net family inet maxelem 65536 -exist"
+        echo "flush $staging"
+        awk -v set="$staging" 'NF {print "add " set " " $1 " -exist"}'
+        echo "swap $staging $GAIA_FIREWALL_SET"
+        echo "destroy $staging"
+    } | ipset restore
+}
+
+# apply_firewall_rules: route egress through GAIA_FIREWALL_CHAIN; rerunning
+# replaces the chain's rules instead of appending duplicates
+apply_firewall_rules() {
+    iptables -N "$GAIA_FIREWALL_CHAIN" 2>/dev/null || iptables -F "$GAIA_FIREWALL_CHAIN"
+    iptables -A "$GAIA_FIREWALL_CHAIN" -o lo -j ACCEPT
+    iptables -A "$GAIA_FIREWALL_CHAIN" -m conntrack --ctstate ESTABLISHED,RELATED -j ACCEPT
+    iptables -A "$GAIA_FIREWALL_CHAIN" -p udp --dport 53 -j ACCEPT
+    iptables -A "$GAIA_FIREWALL_CHAIN" -p tcp --dport 53 -j ACCEPT
+    iptables -A "$GAIA_FIREWALL_CHAIN" -m set --match-set "$GAIA_FIREWALL_SET" dst -j ACCEPT
+    iptables -A "$GAIA_FIREWALL_CHAIN" -j REJECT --reject-with icmp-admin-prohibited
+    iptables -C OUTPUT -j "$GAIA_FIREWALL_CHAIN" 2>/dev/null || iptables -I OUTPUT -j "$GAIA_FIREWALL_CHAIN"
+    # The allowlist is IPv4 only: keep IPv6 from bypassing it
+    if command -v ip6tables >/dev/null 2>&1; then
+        ip6tables -N "$GAIA_FIREWALL_CHAIN" 2>/dev/null || ip6tables -F "$GAIA_FIREWALL_CHAIN"
+        ip6tables -A "$GAIA_FIREWALL_CHAIN" -o lo -j ACCEPT
+        ip6tables -A "$GAIA_FIREWALL_CHAIN" -j REJECT
+        ip6tables -C OUTPUT -j "$GAIA_FIREWALL_CHAIN" 2>/dev/null \
+            || ip6tables -I OUTPUT -j "$GAIA_FIREWALL_CHAIN" 2>/dev/null || true
+    fi
+}
+
+init_firewall() {
+    local start=$SECONDS entries networks gateway
+    if ! iptables -S OUTPUT >/dev/null 2>&1 || ! ipset list -n >/dev/null 2>&1; then
+        echo "ERROR: Cannot manage iptables/ipset; run the container with --cap-add=NET_ADMIN --cap-add=NET_RAW"
+        return 1
+    fi
+    entries=$(firewall_entries)
+    # The Docker host (host.docker.internal, a Lemonade server on the host)
+    gateway=$(ip route 2>/dev/null | awk '/^default/ {print $3; exit}')
+    networks=$( { echo "$entries" | resolve_entries; [ -n "$gateway" ] && echo "$gateway"; } | collapse_networks)
+    if [ -z "$networks" ]; then
+        echo "ERROR: No allowlist entries resolved, not enabling the firewall"
+        return 1
+    fi
+    echo "$networks" | load_allowlist || return 1
+    apply_firewall_rules || return 1
+    echo "Firewall: $(echo "$entries" | wc -l) allowlist entries as $(echo "$networks" | wc -l) network(s) in ipset $GAIA_FIREWALL_SET ($(( SECONDS - start ))s)"
+}
+
+if [ "${BASH_SOURCE[0]}" = "$0" ]; then
+    init_firewall
+fi
@@ -0,0 +1,90 @@
+#!/bin/bash
+# Git maintenance for the GAIA source volume
+#
+# configure_git_maintenance sets up a repository the way "git maintenance
+# register" would (incremental strategy, no automatic gc in the foreground),
+# writes commit-graphs on fetch and uses git's builtin fsmonitor where this
+# git supports it. The container has no cron, so start_git_maintenance runs
+# the tasks itself in a detached background process: the commit-graph,
+# loose-objects, incremental-repack and (for repositories with remotes)
+# prefetch tasks at startup and then every GAIA_GIT_MAINTENANCE_INTERVAL
+# seconds (0 runs them once). The first run also enables the untracked cache
+# if the filesystem passes git's test, which takes a few seconds. With
+# GAIA_GIT_FETCH=true origin and upstream are fetched once at startup, so the
+# first interactive fetch has nothing left to download. Output goes to
+# GAIA_GIT_MAINTENANCE_LOG.
+
+GAIA_GIT_MAINTENANCE="${GAIA_GIT_MAINTENANCE:-true}"
+GAIA_GIT_MAINTENANCE_INTERVAL="${GAIA_GIT_MAINTENANCE_INTERVAL:-3600}"
+GAIA_GIT_FETCH="${GAIA_GIT_FETCH:-false}"
+GAIA_GIT_MAINTENANCE_LOG="${GAIA_GIT_MAINTENANCE_LOG:-$HOME/.cache/gaia/git-maintenance.log}"
+
+# Both functions are best-effort: a repository git refuses to touch (e.g. a
+# bind mount owned by another user, "dubious ownership") gets a warning and
+# no maintenance, and never stops the container from starting.
+configure_git_maintenance() {
+    local repo="$1" error
+    if ! error=$( { git -C "$repo" config maintenance.strategy incremental &&
+                    git -C "$repo" config maintenance.auto false &&
+                    git -C "$repo" config fetch.writeCommitGraph true; } 2>&1 ); then
+        echo "WARNING: Cannot configure git maintenance in $repo: ${error%%$'\n'*}" >&2
+        return 0
+    fi
+    if git version --build-options 2>/dev/null | grep -q "fsmonitor--daemon"; then
+        git -C "$repo" config core.fsmonitor true 2>/dev/null || true
+    fi
+}
+
+# _run_git_maintenance REPO: run the maintenance tasks once, logging their duration
+_run_git_maintenance() {
+    local repo="$1" start
+    local -a tasks=(--task=commit-graph --task=loose-objects --task=incremental-repack)
+    [ -n "$(git -C "$repo" remote)" ] && tasks+=(--task=prefetch)
+    start=$SECONDS
+    echo "[$(date -Is)] git maintenance run ${tasks[*]}"
+    if git -C "$repo" maintenance run --quiet "${tasks[@]}"; then
+        echo "[$(date -Is)] git maintenance finished in $(( SECONDS - start ))s"
+    else
+        echo "[$(date -Is)] git maintenance failed after $(( SECONDS - start ))s"
+    fi
+}
+
+start_git_maintenance() {
+    local repo="$1"
+    if ! git -C "$repo" rev-parse --git-dir >/dev/null 2>&1; then
+        echo "WARNING: Not running git maintenance: git cannot use the repository in $repo" >&2
+        return 0
+    fi
+    if ! mkdir -p "$(dirname "$GAIA_GIT_MAINTENANCE_LOG")" 2>/dev/null; then
+        echo "WARNING: Not running git maintenance: cannot create $(dirname "$GAIA_GIT_MAINTENANCE_LOG")" >&2
+        return 0
+    fi
+    # Double fork: the loop is not a child of the entrypoint, so it never
+    # shows up in "wait" (e.g. the serve-mode supervisor); tini reaps it
+    (
+        set +e
+        (
+            if [ -z "$(git -C "$repo" config core.untrackedCache)" ]; then
+                if git -C "$repo" update-index --test-untracked-cache; then
+                    git -C "$repo" config core.untrackedCache true
+                else
+                    git -C "$repo" config core.untrackedCache false
+                fi
+            fi
+            if [ "$GAIA_GIT_FETCH" = "true" ]; then
+                for remote in origin upstream; do
+                    git -C "$repo" remote get-url "$remote" >/dev/null 2>&1 || continue
+                    echo "[$(date -Is)] git fetch $remote"
+                    git -C "$repo" fetch --quiet --prune "$remote" \
+                        || echo "[$(date -Is)] git fetch $remote failed"
+                done
+            fi
+            while :; do
+                _run_git_maintenance "$repo"
+                [ "$GAIA_GIT_MAINTENANCE_INTERVAL" -gt 0 ] || break
+                sleep "$GAIA_GIT_MAINTENANCE_INTERVAL"
+            done
+        ) </dev/null >>"$GAIA_GIT_MAINTENANCE_LOG" 2>&1 &
+    )
+    echo "Git maintenance: running in the background every ${GAIA_GIT_MAINTENANCE_INTERVAL}s (log: $GAIA_GIT_MAINTENANCE_LOG)"
+}
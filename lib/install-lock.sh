@@ -0,0 +1,110 @@
+#!/bin/bash
+# Single-flight runtime install across containers sharing a uv cache volume
+#
+# When many replicas start at once against one GAIA_UV_CACHE_DIR volume, each
+# would download the same packages from the index at the same time.
+# with_install_lock lets the first container run the install while holding a
+# lock in the cache directory; the others wait for it, then install from the
+# cache it filled, all at once. A request that installed successfully is
+# recorded in the cache, so later containers skip the lock entirely.
+#
+# The lock is flock(1) on a file in the volume: the kernel releases it when
+# its owner dies, and the next waiter takes over the install. An owner that
+# is still holding the lock but stopped making progress (a frozen container)
+# is detected by its heartbeat: after GAIA_INSTALL_LOCK_STALE seconds without
+# one, waiters go ahead without the lock.
+# Source it for with_install_lock, or run it as
+#   bash install-lock.sh COMMAND...
+# e.g. under sudo, as the same user as the install and the cache.
+
+GAIA_INSTALL_LOCK="${GAIA_INSTALL_LOCK:-true}"
+GAIA_INSTALL_LOCK_DIR="${GAIA_INSTALL_LOCK_DIR:-${GAIA_UV_CACHE_DIR:-/var/cache/uv}}"
+GAIA_INSTALL_LOCK_STALE="${GAIA_INSTALL_LOCK_STALE:-120}"
+GAIA_INSTALL_LOCK_POLL="${GAIA_INSTALL_LOCK_POLL:-5}"
+
+# _install_lock_owner: "<host> (pid <pid>, <age>s ago)" of the current lock
+# owner and its heartbeat age in seconds, or nothing without an owner record
+_install_lock_owner() {
+    local owner="$GAIA_INSTALL_LOCK_DIR/.gaia-install.owner" host pid started heartbeat now
+    read -r host pid started 2>/dev/null < "$owner" || return 1
+    heartbeat=$(stat -c %Y "$owner" 2>/dev/null) || return 1
+    now=$(date +%s)
+    echo "$(( now - heartbeat )) $host (pid $pid, started $(( now - started ))s ago)"
+}
+
+# with_install_lock COMMAND...
+# Runs COMMAND as the only installer of the cache (or right away when the
+# same COMMAND already completed against it). Returns COMMAND's status.
+with_install_lock() {
+    [ "$GAIA_INSTALL_LOCK" = "true" ] || { "$@"; return; }
+    local dir="$GAIA_INSTALL_LOCK_DIR" key done_file fd status owner age waiting="" heartbeat=""
+    key=$(printf '%s\n' "$@" | sha256sum | cut -c1-16)
+    done_file="$dir/.gaia-install.done/$key"
+    if [ -e "$done_file" ]; then
+        "$@"
+        return
+    fi
+    if ! mkdir -p "$dir/.gaia-install.done" 2>/dev/null || ! exec {fd}>>"$dir/.gaia-install.lock"; then
+        echo "Warning: cannot create the install lock in $dir, installing without it"
+        "$@"
+        return
+    fi
+
+    while :; do
+        flock -w "$GAIA_INSTALL_LOCK_POLL" -E 75 "$fd"
+        status=$?
+        [ "$status" -eq 0 ] && break
+        if [ "$status" -ne 75 ]; then
+            echo "Warning: $dir does not support file locks, installing without the install lock"
+            break
+        fi
+        if owner=$(_install_lock_owner); then
+            age="${owner%% *}"
+            if [ "$age" -gt "$GAIA_INSTALL_LOCK_STALE" ]; then
+                echo "Install lock owner ${owner#* } sent no heartbeat for ${age}s" \
+                    "(GAIA_INSTALL_LOCK_STALE=${GAIA_INSTALL_LOCK_STALE}), installing without the lock"
+                break
+            fi
+            if [ "${owner#* }" != "$waiting" ]; then
+                waiting="${owner#* }"
+                echo "Waiting for the install in $waiting to fill the shared cache..."
+            fi
+        fi
+    done
+
+    if [ "$status" -eq 0 ]; then
+        if [ -e "$done_file" ]; then
+            # The previous owner's downloads are in the cache: install in parallel
+            flock -u "$fd"
+            exec {fd}>&-
+            echo "Installing from the shared cache filled by another container"
+            "$@"
+            return
+        fi
+        echo "$HOSTNAME $$ $(date +%s)" > "$dir/.gaia-install.owner"
+        echo "Holding the install lock in $dir; containers sharing the cache wait for this install"
+        (
+            exec {fd}>&-
+            while sleep $(( GAIA_INSTALL_LOCK_STALE / 4 + 1 )); do
+                touch "$dir/.gaia-install.owner"
+            done
+        ) </dev/null >/dev/null 2>&1 &
+        heartbeat=$!
+    fi
+
+    # The install must not hold the lock beyond this function
+    ( exec {fd}>&-; "$@" )
+    status=$?
+    [ "$status" -eq 0 ] && touch "$done_file"
+    if [ -n "$heartbeat" ]; then
+        kill "$heartbeat" 2>/dev/null
+        wait "$heartbeat" 2>/dev/null
+        rm -f "$dir/.gaia-install.owner"
+    fi
+    exec {fd}>&-
+    return "$status"
+}
+
+if [ "${BASH_SOURCE[0]}" = "$0" ]; then
+    with_install_lock "$@"
+fi
@@ -0,0 +1,126 @@
+#!/bin/bash
+# Resource accounting for the startup install
+#
+# With GAIA_INSTALL_STATS=true, start_install_stats snapshots the container's
+# cgroup v2 CPU and block I/O counters and the network counters of
+# /proc/net/dev; stop_install_stats turns the differences into a one-line
+# summary in the startup log and a JSON record in GAIA_INSTALL_STATS_FILE.
+# The memory peak is the kernel's own high-water mark, the cgroup's
+# memory.peak (kernel 5.19+), which at startup covers the install. Where it is
+# missing, memory is sampled in the background every
+# GAIA_INSTALL_STATS_INTERVAL seconds and reported as a sampled peak, which
+# can miss short spikes. CPU time against the CPU limit, disk and network
+# bytes per second show whether the install is CPU-, disk- or network-bound.
+# Counters the kernel does not provide are reported as null.
+
+GAIA_INSTALL_STATS="${GAIA_INSTALL_STATS:-false}"
+GAIA_INSTALL_STATS_FILE="${GAIA_INSTALL_STATS_FILE:-$HOME/.cache/gaia/install-stats.json}"
+GAIA_INSTALL_STATS_INTERVAL="${GAIA_INSTALL_STATS_INTERVAL:-0.5}"
+GAIA_CGROUP_ROOT="${GAIA_CGROUP_ROOT:-/sys/fs/cgroup}"
+GAIA_PROC_ROOT="${GAIA_PROC_ROOT:-/proc}"
+
+# _stats_counters: cumulative "cpu_usec user_usec system_usec disk_read
+# disk_write net_rx net_tx", with - for counters that are not available
+_stats_counters() {
+    local cpu="- - -" io="- -" net="- -"
+    if [ -r "$GAIA_CGROUP_ROOT/cpu.stat" ]; then
+        cpu=$(awk '{v[$1] = $2} END {print v["usage_usec"], v["user_usec"], v["system_usec"]}' \
+            "$GAIA_CGROUP_ROOT/cpu.stat")
+    fi
+    if [ -r "$GAIA_CGROUP_ROOT/io.stat" ]; then
+        io=$(awk '{for (i = 2; i <= NF; i++) {split($i, kv, "=");
+                   if (kv[1] == "rbytes") r += kv[2]; if (kv[1] == "wbytes") w += kv[2]}}
+                  END {print r + 0, w + 0}' "$GAIA_CGROUP_ROOT/io.stat")
+    fi
+    if [ -r "$GAIA_PROC_ROOT/net/dev" ]; then
+        # "  eth0: rx_bytes packets errs drop fifo frame compressed multicast tx_bytes ..."
+        net=$(awk 'NR > 2 {sub(/^ +/, ""); split($0, f, /[: ]+/);
+                   if (f[1] != "lo") {rx += f[2]; tx += f[10]}}
+                   END {print rx + 0, tx + 0}' "$GAIA_PROC_ROOT/net/dev")
+    fi
+    echo "$cpu $io $net"
+}
+
+# _stats_memory: resident anonymous memory of the container in bytes (the
+# cgroup's anon, or the VmRSS of all processes without a cgroup)
+_stats_memory() {
+    if [ -r "$GAIA_CGROUP_ROOT/memory.stat" ]; then
+        awk '$1 == "anon" {print $2}' "$GAIA_CGROUP_ROOT/memory.stat"
+    else
+        cat "$GAIA_PROC_ROOT"/[0-9]*/status 2>/dev/null | awk '/^VmRSS:/ {kb += $2} END {print kb * 1024}'
+    fi
+}
+
+start_install_stats() {
+    [ "$GAIA_INSTALL_STATS" = "true" ] || return 0
+    INSTALL_STATS_DIR=$(mktemp -d)
+    INSTALL_STATS_START_NS=$(date +%s%N)
+    _stats_counters > "$INSTALL_STATS_DIR/start"
+    INSTALL_STATS_SAMPLER=""
+    [ -r "$GAIA_CGROUP_ROOT/memory.peak" ] && return 0
+    (
+        set +e
+        local peak=0 memory
+        while :; do
+            memory=$(_stats_memory)
+            if [ "${memory:-0}" -gt "$peak" ]; then
+                peak=$memory
+                echo "$peak" > "$INSTALL_STATS_DIR/peak"
+            fi
+            sleep "$GAIA_INSTALL_STATS_INTERVAL"
+        done
+    ) </dev/null >/dev/null 2>&1 &
+    INSTALL_STATS_SAMPLER=$!
+}
+
+# stop_install_stats STATUS [VERSION]: summarize the install of VERSION that
+# ended with STATUS (ok or failed)
+stop_install_stats() {
+    [ "$GAIA_INSTALL_STATS" = "true" ] && [ -n "$INSTALL_STATS_DIR" ] || return 0
+    local status="$1" version="$2" end_ns peak peak_source summary
+    end_ns=$(date +%s%N)
+    if [ -n "$INSTALL_STATS_SAMPLER" ]; then
+        kill "$INSTALL_STATS_SAMPLER" 2>/dev/null || true
+        wait "$INSTALL_STATS_SAMPLER" 2>/dev/null || true
+        INSTALL_STATS_SAMPLER=""
+        peak=$(cat "$INSTALL_STATS_DIR/peak" 2>/dev/null)
+        peak_source=sampled
+    else
+        peak=$(cat "$GAIA_CGROUP_ROOT/memory.peak" 2>/dev/null)
+        peak_source=memory.peak
+    fi
+    _stats_counters > "$INSTALL_STATS_DIR/end"
+
+    mkdir -p "$(dirname "$GAIA_INSTALL_STATS_FILE")"
+    summary=$(awk -v status="$status" -v version="$version" -v cpus="${GAIA_CPU_LIMIT:-$(nproc)}" \
+                  -v wall_ns=$(( end_ns - INSTALL_STATS_START_NS )) \
+                  -v peak="${peak:--}" -v peak_source="$peak_source" \
+                  -v json="$GAIA_INSTALL_STATS_FILE" '
+        function delta(i) { return (start[i] == "-" || end[i] == "-") ? "-" : end[i] - start[i] }
+        function num(v, scale) { return v == "-" ? "null" : sprintf("%.3f", v / scale) }
+        function int_or_null(v) { return v == "-" ? "null" : sprintf("%d", v) }
+        function mib(v) { return v == "-" ? "n/a" : sprintf("%.0f MiB", v / 1048576) }
+        function rate(v) { return v == "-" ? "n/a" : sprintf("%.1f MiB/s", v / 1048576 / wall) }
+        NR == 1 { split($0, start) }
+        NR == 2 { split($0, end) }
+        END {
+            wall = wall_ns / 1e9
+            if (wall <= 0) wall = 0.001
+            cpu = delta(1); rd = delta(4); wr = delta(5); rx = delta(6); tx = delta(7)
+            busy = cpu == "-" ? "-" : cpu / 1e6 / wall
+            printf "{\"status\": \"%s\", \"gaia_version\": \"%s\", \"wall_s\": %.3f, ", status, version, wall > json
+            printf "\"cpu_s\": %s, \"cpu_user_s\": %s, \"cpu_system_s\": %s, ", num(cpu, 1e6), num(delta(2), 1e6), num(delta(3), 1e6) > json
+            printf "\"cpu_busy\": %s, \"cpu_limit\": %d, ", num(busy, 1), cpus > json
+            printf "\"memory_peak_bytes\": %s, \"memory_peak_source\": \"%s\", ", int_or_null(peak), peak_source > json
+            printf "\"disk_read_bytes\": %s, \"disk_write_bytes\": %s, ", int_or_null(rd), int_or_null(wr) > json
+            printf "\"net_rx_bytes\": %s, \"net_tx_bytes\": %s}\n", int_or_null(rx), int_or_null(tx) > json
+            printf "Install stats: %.1fs, CPU %s (%s of %d CPUs busy), %s %s, ", wall,
+                cpu == "-" ? "n/a" : sprintf("%.1fs", cpu / 1e6), busy == "-" ? "n/a" : sprintf("%.1f", busy), cpus,
+                peak_source == "sampled" ? "sampled RSS peak" : "memory peak", mib(peak)
+            printf "disk %s read / %s written (%s), network %s in (%s)\n",
+                mib(rd), mib(wr), rate(wr == "-" ? "-" : rd + wr), mib(rx), rate(rx)
+        }' "$INSTALL_STATS_DIR/start" "$INSTALL_STATS_DIR/end")
+    rm -rf "$INSTALL_STATS_DIR"
+    INSTALL_STATS_DIR=""
+    echo "$summary (details: $GAIA_INSTALL_STATS_FILE)"
+}
@@ -0,0 +1,55 @@
+#!/bin/bash
+# Cache of the resolved "latest" GAIA version
+#
+# Without GAIA_VERSION the entrypoint would ask the package index for the
+# newest amd-gaia on every start. The resolved version is stored with a timestamp in
+# GAIA_STATE_DIR; within GAIA_LATEST_TTL seconds a restart reuses it and
+# installs it like a pinned version. GAIA_LATEST_TTL=0 disables the cache.
+
+GAIA_STATE_DIR="${GAIA_STATE_DIR:-/var/cache/gaia}"
+GAIA_LATEST_TTL="${GAIA_LATEST_TTL:-3600}"
+GAIA_PYPI_JSON_URL="${GAIA_PYPI_JSON_URL:-https://pypi.org/pypi/amd-gaia/json}"
+LATEST_VERSION_FILE="$GAIA_STATE_DIR/latest-version"
+
+# Print "<version> <age in seconds>" if the cached version is still fresh
+cached_latest_version() {
+    local version resolved_at age
+    [ "$GAIA_LATEST_TTL" -gt 0 ] && [ -r "$LATEST_VERSION_FILE" ] || return 1
+    read -r version resolved_at < "$LATEST_VERSION_FILE" || return 1
+    [ -n "$version" ] && [ -n "$resolved_at" ] || return 1
+    age=$(( $(date +%s) - resolved_at ))
+    [ "$age" -ge 0 ] && [ "$age" -lt "$GAIA_LATEST_TTL" ] || return 1
+    echo "$version $age"
+}
+
+# Print the newest amd-gaia release on the index the install uses: the
+# configured UV_DEFAULT_INDEX (or UV_INDEX_URL) mirror or wheelhouse, read from
+# its PEP 503 project page, and PyPI's JSON API otherwise. Runs on Ubuntu's
+# python3, not the interpreter GAIA is installed into, which is first on PATH
+resolve_latest_version() {
+    local index="${UV_DEFAULT_INDEX:-$UV_INDEX_URL}"
+    if [ -z "$index" ]; then
+        /usr/bin/python3 -c '
+import json, sys, urllib.request
+with urllib.request.urlopen(sys.argv[1], timeout=10) as response:
+    print(json.load(response)["info"]["version"])
+' "$GAIA_PYPI_JSON_URL" 2>/dev/null
+        return
+    fi
+    # Final releases only, like PyPI'"'"'s info.version
+    /usr/bin/python3 -c '
+import re, sys, urllib.request
+with urllib.request.urlopen(sys.argv[1].rstrip("/") + "/amd-gaia/", timeout=10) as response:
+    page = response.read().decode()
+versions = re.findall(r"amd[-_.]gaia-(\d+(?:\.\d+)*)(?=-|\.tar\.gz|\.zip)", page, re.IGNORECASE)
+print(max(versions, key=lambda version: tuple(map(int, version.split(".")))))
+' "$index" 2>/dev/null
+}
+
+# Record VERSION as the latest version, resolved now
+save_latest_version() {
+    mkdir -p "$GAIA_STATE_DIR" 2>/dev/null || return 0
+    printf '%s %s\n' "$1" "$(date +%s)" > "$LATEST_VERSION_FILE.tmp" 2>/dev/null &&
+        mv "$LATEST_VERSION_FILE.tmp" "$LATEST_VERSION_FILE"
+    return 0
+}
@@ -0,0 +1,92 @@
+"""Download model and asset identifiers into the GAIA model cache.
+
+Run by prefetch.sh with the interpreter GAIA is installed in, so the
+downloads use GAIA's own libraries and land where they look for them.
+Identifiers:
+
+    hf:<repo>[@<revision>]    Hugging Face Hub snapshot (bare ids default to hf:)
+    tiktoken:<encoding>       tiktoken encoding
+    nltk:<package>            NLTK data package
+    https://<url>             file saved to $GAIA_MODEL_CACHE/assets/
+
+Each identifier fetched successfully is recorded under
+$GAIA_MODEL_CACHE/.prefetched, so later starts with a warm cache skip it.
+"""
+
+import hashlib
+import os
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+CACHE = Path(os.environ.get("GAIA_MODEL_CACHE", "/var/cache/gaia-models"))
+
+
+def fetch_hf(spec):
+    from huggingface_hub import snapshot_download
+    repo, _, revision = spec.partition("@")
+    snapshot_download(repo_id=repo, revision=revision or None)
+
+
+def fetch_tiktoken(spec):
+    import tiktoken
+    tiktoken.get_encoding(spec)
+
+
+def fetch_nltk(spec):
+    import nltk
+    if not nltk.download(spec, download_dir=os.environ.get("NLTK_DATA"), quiet=True):
+        raise RuntimeError(f"nltk could not download {spec}")
+
+
+def fetch_url(url):
+    target = CACHE / "assets" / url.rstrip("/").rsplit("/", 1)[-1]
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".part")
+    with urllib.request.urlopen(url, timeout=60) as response, open(partial, "wb") as out:
+        while chunk := response.read(1 << 20):
+            out.write(chunk)
+    partial.replace(target)
+
+
+FETCHERS = {"hf": fetch_hf, "tiktoken": fetch_tiktoken, "nltk": fetch_nltk}
+
+
+def resolve(identifier):
+    """Return (fetcher, argument) for an identifier."""
+    if identifier.startswith(("http://", "https://")):
+        return fetch_url, identifier
+    scheme, sep, spec = identifier.partition(":")
+    if sep and scheme in FETCHERS:
+        return FETCHERS[scheme], spec
+    return fetch_hf, identifier
+
+
+def marker(identifier):
+    return CACHE / ".prefetched" / hashlib.sha256(identifier.encode()).hexdigest()[:16]
+
+
+def main(identifiers):
+    failed = []
+    for identifier in identifiers:
+        done = marker(identifier)
+        if done.exists():
+            print(f"  {identifier}: cached")
+            continue
+        start = time.monotonic()
+        try:
+            fetcher, spec = resolve(identifier)
+            fetcher(spec)
+        except Exception as exc:  # report every failure, keep going
+            print(f"  {identifier}: FAILED ({type(exc).__name__}: {exc})")
+            failed.append(identifier)
+            continue
+        done.parent.mkdir(parents=True, exist_ok=True)
+        done.write_text(identifier + "\n")
+        print(f"  {identifier}: downloaded in {time.monotonic() - start:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,43 @@
+#!/bin/bash
+# Model and asset prefetch
+#
+# GAIA's RAG and tokenizer dependencies download models on first use, which
+# stalls the first real request of every fresh container. configure_model_cache
+# points the standard cache variables at GAIA_MODEL_CACHE (mount a volume
+# there); prefetch_assets downloads GAIA_PREFETCH into it before the container
+# reports ready. Identifiers already fetched into the cache are skipped.
+# Requires runtime-env.sh.
+
+GAIA_MODEL_CACHE="${GAIA_MODEL_CACHE:-/var/cache/gaia-models}"
+PREFETCH_HELPER="$(dirname "${BASH_SOURCE[0]}")/prefetch.py"
+
+# Export cache locations under GAIA_MODEL_CACHE, keeping any the user set
+configure_model_cache() {
+    local name dir
+    for name in HF_HUB_CACHE:huggingface/hub SENTENCE_TRANSFORMERS_HOME:sentence-transformers \
+                TORCH_HOME:torch TIKTOKEN_CACHE_DIR:tiktoken NLTK_DATA:nltk_data; do
+        dir="${name#*:}"
+        name="${name%%:*}"
+        [ -n "${!name+x}" ] && continue
+        # HF_HOME relocates the hub cache too ($HF_HOME/hub); do not override it
+        [ "$name" = HF_HUB_CACHE ] && [ -n "${HF_HOME+x}" ] && continue
+        runtime_env_export "$name" "$GAIA_MODEL_CACHE/$dir"
+    done
+    mkdir -p "$GAIA_MODEL_CACHE" 2>/dev/null || true
+    echo "Model cache: $GAIA_MODEL_CACHE"
+}
+
+# prefetch_assets PYTHON: download GAIA_PREFETCH with PYTHON's packages
+prefetch_assets() {
+    local python="$1" start=$SECONDS
+    # Comma- or whitespace-separated identifiers
+    read -r -a PREFETCH_IDS <<< "${GAIA_PREFETCH//,/ }"
+    [ "${#PREFETCH_IDS[@]}" -eq 0 ] && return 0
+    echo "Prefetching ${#PREFETCH_IDS[@]} model(s)/asset(s) into $GAIA_MODEL_CACHE..."
+    if "$python" "$PREFETCH_HELPER" "${PREFETCH_IDS[@]}"; then
+        echo "Prefetch complete in $(( SECONDS - start ))s"
+    else
+        echo "Warning: Prefetch incomplete, missing assets will be downloaded on first use"
+    fi
+    return 0
+}
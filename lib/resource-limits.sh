@@ -0,0 +1,90 @@
+#!/bin/bash
+# cgroup-aware CPU and memory defaults
+#
+# Numeric libraries and uv size their thread pools from the host's CPU count,
+# not the container's cgroup limit. apply_resource_defaults reads the cgroup
+# v2 CPU quota and memory limit and exports matching defaults. Variables the
+# user already set are left alone. Requires runtime-env.sh.
+
+GAIA_CGROUP_ROOT="${GAIA_CGROUP_ROOT:-/sys/fs/cgroup}"
+
+# CPUs available to this container: the cgroup quota rounded up, capped by
+# the CPUs we may run on (nproc already honours cpusets)
+detect_cpu_limit() {
+    local cpus quota period limit
+    cpus=$(nproc 2>/dev/null || echo 1)
+    if [ -r "$GAIA_CGROUP_ROOT/cpu.max" ]; then
+        read -r quota period < "$GAIA_CGROUP_ROOT/cpu.max"
+        if [ "$quota" != "max" ] && [ "${period:-0}" -gt 0 ]; then
+            limit=$(( (quota + period - 1) / period ))
+            [ "$limit" -lt 1 ] && limit=1
+            [ "$limit" -lt "$cpus" ] && cpus=$limit
+        fi
+    fi
+    echo "$cpus"
+}
+
+# Memory limit in bytes, empty when unlimited
+detect_memory_limit() {
+    local limit
+    if [ -r "$GAIA_CGROUP_ROOT/memory.max" ]; then
+        read -r limit < "$GAIA_CGROUP_ROOT/memory.max"
+        [ "$limit" != "max" ] && echo "$limit"
+    fi
+    return 0
+}
+
+# Export NAME=VALUE unless the user already set NAME
+_resource_default() {
+    local name="$1" value="$2"
+    if [ -n "${!name+x}" ]; then
+        RESOURCE_USER_SET+=("$name=${!name}")
+    else
+        runtime_env_export "$name" "$value"
+        RESOURCE_DEFAULTS+=("$name=$value")
+    fi
+}
+
+apply_resource_defaults() {
+    local cpus memory downloads builds var
+    RESOURCE_DEFAULTS=()
+    RESOURCE_USER_SET=()
+
+    cpus=$(detect_cpu_limit)
+    memory=$(detect_memory_limit)
+    runtime_env_export GAIA_CPU_LIMIT "$cpus"
+    if [ -n "$memory" ]; then
+        runtime_env_export GAIA_MEMORY_LIMIT "$memory"
+        echo "Resource limits: $cpus CPU(s), $(( memory / 1024 / 1024 )) MiB memory"
+    else
+        echo "Resource limits: $cpus CPU(s), no memory limit"
+    fi
+
+    # Thread pools of OpenMP, MKL, OpenBLAS, numexpr and HF tokenizers (Rayon)
+    for var in OMP_NUM_THREADS MKL_NUM_THREADS OPENBLAS_NUM_THREADS NUMEXPR_MAX_THREADS RAYON_NUM_THREADS; do
+        _resource_default "$var" "$cpus"
+    done
+    if [ "$cpus" -gt 1 ]; then
+        _resource_default TOKENIZERS_PARALLELISM true
+    else
+        _resource_default TOKENIZERS_PARALLELISM false
+    fi
+
+    # uv: downloads are network-bound, builds and installs CPU-bound; allow
+    # one source build per GiB of memory so large builds don't OOM the container
+    downloads=$(( cpus * 4 ))
+    [ "$downloads" -lt 4 ] && downloads=4
+    [ "$downloads" -gt 50 ] && downloads=50
+    builds=$cpus
+    if [ -n "$memory" ] && [ $(( memory / 1073741824 )) -lt "$builds" ]; then
+        builds=$(( memory / 1073741824 ))
+        [ "$builds" -lt 1 ] && builds=1
+    fi
+    _resource_default UV_CONCURRENT_DOWNLOADS "$downloads"
+    _resource_default UV_CONCURRENT_BUILDS "$builds"
+    _resource_default UV_CONCURRENT_INSTALLS "$cpus"
+
+    [ "${#RESOURCE_DEFAULTS[@]}" -gt 0 ] && echo "Tuned defaults: ${RESOURCE_DEFAULTS[*]}"
+    [ "${#RESOURCE_USER_SET[@]}" -gt 0 ] && echo "User-set (kept): ${RESOURCE_USER_SET[*]}"
+    return 0
+}
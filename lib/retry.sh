@@ -0,0 +1,72 @@
+#!/bin/bash
+# Bounded retries for the runtime install
+#
+# A transient index error should not fail the container and make the
+# orchestrator redo the whole install. retry_command reruns a command with
+# exponential backoff and jitter, within GAIA_INSTALL_ATTEMPTS attempts and a
+# total deadline of GAIA_INSTALL_DEADLINE seconds. Downloads that completed
+# stay in the uv cache, so a retry only fetches what is still missing.
+# Source it for retry_command, or run it as
+#   bash retry.sh PERMANENT_PATTERN COMMAND...
+# e.g. under sudo, so the retries run as the same user as the command.
+
+GAIA_INSTALL_ATTEMPTS="${GAIA_INSTALL_ATTEMPTS:-4}"
+GAIA_INSTALL_BACKOFF="${GAIA_INSTALL_BACKOFF:-2}"
+GAIA_INSTALL_BACKOFF_MAX="${GAIA_INSTALL_BACKOFF_MAX:-30}"
+GAIA_INSTALL_DEADLINE="${GAIA_INSTALL_DEADLINE:-900}"
+
+# retry_command PERMANENT_PATTERN COMMAND...
+# Output matching the extended regex PERMANENT_PATTERN marks a failure that
+# retrying cannot fix (an empty pattern retries every failure). Returns the
+# command's last exit status, 124 when the deadline was hit, 2 when
+# GAIA_INSTALL_DEADLINE is not a positive integer.
+retry_command() {
+    local permanent="$1"
+    shift
+    local attempt=1 status remaining delay log start=$SECONDS
+    # timeout treats 0 as "no limit", so the deadline must be at least 1s
+    if ! [[ "$GAIA_INSTALL_DEADLINE" =~ ^[1-9][0-9]*$ ]]; then
+        echo "ERROR: Invalid GAIA_INSTALL_DEADLINE '$GAIA_INSTALL_DEADLINE' (expected a positive number of seconds)"
+        return 2
+    fi
+    log=$(mktemp)
+    while :; do
+        remaining=$(( GAIA_INSTALL_DEADLINE - (SECONDS - start) ))
+        timeout --kill-after=10 "$remaining" "$@" 2>&1 | tee "$log"
+        status=${PIPESTATUS[0]}
+        [ "$status" -eq 0 ] && break
+
+        if [ "$status" -eq 124 ]; then
+            echo "Giving up: install deadline of ${GAIA_INSTALL_DEADLINE}s exceeded (GAIA_INSTALL_DEADLINE)"
+            break
+        fi
+        if [ -n "$permanent" ] && grep -qE "$permanent" "$log"; then
+            echo "Not retrying: the error is not transient"
+            break
+        fi
+        if [ "$attempt" -ge "$GAIA_INSTALL_ATTEMPTS" ]; then
+            echo "Giving up after $attempt attempts (GAIA_INSTALL_ATTEMPTS)"
+            break
+        fi
+
+        # Exponential backoff with "equal jitter": between half and all of the delay
+        delay=$(( GAIA_INSTALL_BACKOFF << (attempt - 1) ))
+        [ "$delay" -gt "$GAIA_INSTALL_BACKOFF_MAX" ] && delay=$GAIA_INSTALL_BACKOFF_MAX
+        delay=$(( delay / 2 + RANDOM % (delay - delay / 2 + 1) ))
+        remaining=$(( GAIA_INSTALL_DEADLINE - (SECONDS - start) ))
+        if [ $(( delay + 1 )) -ge "$remaining" ]; then
+            echo "Giving up: no time left for another attempt within ${GAIA_INSTALL_DEADLINE}s (GAIA_INSTALL_DEADLINE)"
+            status=124
+            break
+        fi
+        echo "Attempt $attempt/$GAIA_INSTALL_ATTEMPTS failed (exit $status), retrying in ${delay}s..."
+        sleep "$delay"
+        attempt=$(( attempt + 1 ))
+    done
+    rm -f "$log"
+    return "$status"
+}
+
+if [ "${BASH_SOURCE[0]}" = "$0" ]; then
+    retry_command "$@"
+fi
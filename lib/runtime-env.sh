@@ -0,0 +1,21 @@
+#!/bin/bash
+# Runtime environment shared with docker exec sessions
+#
+# Variables chosen by the entrypoint only reach the main container process.
+# runtime_env_export also records them in GAIA_RUNTIME_ENV_FILE, which
+# ~/.zshenv sources, so `docker exec <container> zsh` sees the same values.
+# Values set explicitly (docker run -e / docker exec -e) always win.
+
+GAIA_RUNTIME_ENV_FILE="${GAIA_RUNTIME_ENV_FILE:-$HOME/.gaia_runtime_env}"
+
+# Start a fresh file for this container start
+runtime_env_reset() {
+    : > "$GAIA_RUNTIME_ENV_FILE"
+}
+
+# Export NAME=VALUE now and for later zsh sessions
+runtime_env_export() {
+    local name="$1" value="$2"
+    export "$name=$value"
+    printf 'export %s="${%s-%s}"\n' "$name" "$name" "$value" >> "$GAIA_RUNTIME_ENV_FILE"
+}
@@ -0,0 +1,96 @@
+#!/bin/bash
+# Startup hooks for derived images
+#
+# run_startup_hooks runs the files in GAIA_STARTUP_DIR after GAIA is
+# installed and before the container command starts. Hooks whose names start
+# with the same number (10-foo, 10-bar) run concurrently as one stage; stages
+# run in numeric order, hooks without a number in stage 50. Executable files
+# are run directly, other *.sh files with bash. A "# gaia-timeout: <seconds>"
+# line in a hook overrides GAIA_HOOK_TIMEOUT for it. Each hook's output is
+# prefixed with its name and its duration is logged. Any failed or timed-out
+# hook fails startup.
+
+GAIA_STARTUP_DIR="${GAIA_STARTUP_DIR:-/etc/gaia/startup.d}"
+GAIA_HOOK_TIMEOUT="${GAIA_HOOK_TIMEOUT:-300}"
+
+_now_us() {
+    echo "${EPOCHREALTIME/./}"
+}
+
+_format_duration() {
+    local us="$1"
+    printf '%d.%02ds' $(( us / 1000000 )) $(( us % 1000000 / 10000 ))
+}
+
+# _run_hook PATH: run one hook, log its result, return its status
+_run_hook() {
+    local hook="$1" name timeout start status elapsed
+    local -a cmd
+    name=$(basename "$hook")
+    if [ -x "$hook" ]; then
+        cmd=("$hook")
+    else
+        cmd=(bash "$hook")
+    fi
+    timeout=$(sed -nE 's/^#[[:space:]]*gaia-timeout:[[:space:]]*([0-9]+).*/\1/p' "$hook" | head -n 1)
+    timeout="${timeout:-$GAIA_HOOK_TIMEOUT}"
+
+    start=$(_now_us)
+    timeout --kill-after=5 "$timeout" "${cmd[@]}" 2>&1 | sed -u "s/^/[$name] /"
+    status=${PIPESTATUS[0]}
+    elapsed=$(_format_duration $(( $(_now_us) - start )))
+
+    if [ "$status" -eq 0 ]; then
+        echo "Hook $name: ok in $elapsed"
+    elif [ "$status" -eq 124 ] || [ "$status" -eq 137 ]; then
+        echo "Hook $name: TIMED OUT after ${timeout}s"
+    else
+        echo "Hook $name: FAILED (exit $status) after $elapsed"
+    fi
+    return "$status"
+}
+
+run_startup_hooks() {
+    local dir="${1:-$GAIA_STARTUP_DIR}" hook name stage current="" failed=0 start pid
+    local -a entries stage_pids
+
+    [ -d "$dir" ] || return 0
+    for hook in "$dir"/*; do
+        [ -f "$hook" ] || continue
+        name=$(basename "$hook")
+        if [ ! -x "$hook" ] && [[ "$name" != *.sh ]]; then
+            echo "Skipping hook $name (not executable)"
+            continue
+        fi
+        if [[ "$name" =~ ^([0-9]+) ]]; then
+            stage=$(( 10#${BASH_REMATCH[1]} ))
+        else
+            stage=50
+        fi
+        entries+=("$stage"$'\t'"$hook")
+    done
+    [ "${#entries[@]}" -eq 0 ] && return 0
+
+    echo "Running ${#entries[@]} startup hook(s) from $dir..."
+    start=$(_now_us)
+    # Hooks sorted by stage, plus an end marker that flushes the last stage
+    while IFS=$'\t' read -r stage hook; do
+        if [ "$stage" != "$current" ]; then
+            for pid in "${stage_pids[@]}"; do
+                wait "$pid" || failed=$(( failed + 1 ))
+            done
+            stage_pids=()
+            current="$stage"
+        fi
+        [ -z "$hook" ] && break
+        _run_hook "$hook" &
+        stage_pids+=($!)
+    done < <(printf '%s\n' "${entries[@]}" | sort -t $'\t' -k1,1n -k2,2; printf 'end\t\n')
+
+    echo "Startup hooks finished in $(_format_duration $(( $(_now_us) - start )))"
+    if [ "$failed" -gt 0 ]; then
+        echo "ERROR: $failed startup hook(s) failed"
+        return 1
+    fi
+    return 0
+}
@@ -0,0 +1,137 @@
+#!/bin/bash
+# Worker supervisor for GAIA_MODE=serve
+#
+# supervise_workers runs COMMAND as COUNT worker processes. Each worker gets
+# GAIA_WORKER_ID (0-based) and GAIA_WORKER_PORT (GAIA_SERVE_PORT + id).
+# A worker that exits is restarted after a delay that doubles with each
+# quick failure (up to GAIA_WORKER_BACKOFF_MAX seconds) and resets once it
+# has run for GAIA_WORKER_STABLE_SECONDS. Restarts are scheduled rather than
+# slept through, so a crash-looping worker never delays reaping or
+# restarting the others. On SIGTERM/SIGINT all workers get
+# SIGTERM and GAIA_SHUTDOWN_TIMEOUT seconds to exit before SIGKILL.
+
+GAIA_SERVE_PORT="${GAIA_SERVE_PORT:-8765}"
+GAIA_WORKER_BACKOFF="${GAIA_WORKER_BACKOFF:-1}"
+GAIA_WORKER_BACKOFF_MAX="${GAIA_WORKER_BACKOFF_MAX:-30}"
+GAIA_WORKER_STABLE_SECONDS="${GAIA_WORKER_STABLE_SECONDS:-30}"
+GAIA_SHUTDOWN_TIMEOUT="${GAIA_SHUTDOWN_TIMEOUT:-8}"
+
+_start_worker() {
+    local id="$1"
+    GAIA_WORKER_ID="$id" GAIA_WORKER_PORT=$(( GAIA_SERVE_PORT + id )) \
+        bash -c "$SUPERVISOR_COMMAND" &
+    WORKER_PIDS[$id]=$!
+    WORKER_STARTED[$id]=$SECONDS
+    unset "WORKER_NEXT_START[$id]"
+    echo "[supervisor] worker $id started (pid ${WORKER_PIDS[$id]}, port $(( GAIA_SERVE_PORT + id )))"
+}
+
+# Start the workers whose restart is due and, if any are still waiting,
+# run a timer until the next one so that `wait -n` returns in time for it
+_schedule_restarts() {
+    local id next=""
+    for id in "${!WORKER_NEXT_START[@]}"; do
+        if [ "${WORKER_NEXT_START[$id]}" -le "$SECONDS" ]; then
+            _start_worker "$id"
+        elif [ -z "$next" ] || [ "${WORKER_NEXT_START[$id]}" -lt "$next" ]; then
+            next=${WORKER_NEXT_START[$id]}
+        fi
+    done
+    if [ -n "$SUPERVISOR_SLEEP_PID" ]; then
+        kill "$SUPERVISOR_SLEEP_PID" 2>/dev/null || true
+        wait "$SUPERVISOR_SLEEP_PID" 2>/dev/null || true
+        SUPERVISOR_SLEEP_PID=""
+    fi
+    if [ -n "$next" ]; then
+        sleep $(( next - SECONDS )) &
+        SUPERVISOR_SLEEP_PID=$!
+    fi
+}
+
+_stop_workers() {
+    local pid alive waited=0
+    SUPERVISOR_STOPPING=1
+    [ -n "$SUPERVISOR_SLEEP_PID" ] && kill "$SUPERVISOR_SLEEP_PID" 2>/dev/null
+    echo "[supervisor] stopping ${#WORKER_PIDS[@]} worker(s)"
+    for pid in "${WORKER_PIDS[@]}"; do
+        kill -TERM "$pid" 2>/dev/null || true
+    done
+    while :; do
+        alive=0
+        for pid in "${WORKER_PIDS[@]}"; do
+            kill -0 "$pid" 2>/dev/null && alive=1
+        done
+        [ "$alive" -eq 0 ] || [ "$waited" -ge $(( GAIA_SHUTDOWN_TIMEOUT * 10 )) ] && break
+        sleep 0.1
+        waited=$(( waited + 1 ))
+    done
+    for pid in "${WORKER_PIDS[@]}"; do
+        if kill -0 "$pid" 2>/dev/null; then
+            echo "[supervisor] worker pid $pid did not exit within ${GAIA_SHUTDOWN_TIMEOUT}s, killing"
+            kill -KILL "$pid" 2>/dev/null || true
+        fi
+    done
+    wait 2>/dev/null || true
+    echo "[supervisor] all workers stopped"
+}
+
+supervise_workers() {
+    local count="$1" id pid status delay ran
+    SUPERVISOR_COMMAND="$2"
+    if ! [[ "$count" =~ ^[1-9][0-9]*$ ]]; then
+        echo "[supervisor] invalid worker count '$count' (expected a positive integer)"
+        return 1
+    fi
+    SUPERVISOR_STOPPING=0
+    SUPERVISOR_SLEEP_PID=""
+    WORKER_PIDS=()
+    WORKER_STARTED=()
+    WORKER_FAILURES=()
+    WORKER_NEXT_START=()
+
+    trap '_stop_workers' TERM INT
+
+    echo "[supervisor] starting $count worker(s): $SUPERVISOR_COMMAND"
+    for (( id = 0; id < count; id++ )); do
+        WORKER_FAILURES[$id]=0
+        _start_worker "$id"
+    done
+
+    while [ "$SUPERVISOR_STOPPING" -eq 0 ]; do
+        _schedule_restarts
+        pid=""
+        status=0
+        wait -n -p pid || status=$?
+        [ "$SUPERVISOR_STOPPING" -eq 1 ] && break
+        if [ "$status" -eq 127 ]; then
+            echo "[supervisor] no workers left to supervise"
+            break
+        fi
+        # Interrupted by a signal without a worker exiting
+        [ -z "$pid" ] && continue
+        # The restart timer went off
+        if [ "$pid" = "$SUPERVISOR_SLEEP_PID" ]; then
+            SUPERVISOR_SLEEP_PID=""
+            continue
+        fi
+
+        for id in "${!WORKER_PIDS[@]}"; do
+            [ "${WORKER_PIDS[$id]}" = "$pid" ] && break
+        done
+        [ "${WORKER_PIDS[$id]}" = "$pid" ] || continue
+        ran=$(( SECONDS - WORKER_STARTED[$id] ))
+        if [ "$ran" -ge "$GAIA_WORKER_STABLE_SECONDS" ]; then
+            WORKER_FAILURES[$id]=0
+        fi
+        delay=$(( GAIA_WORKER_BACKOFF << WORKER_FAILURES[$id] ))
+        [ "$delay" -gt "$GAIA_WORKER_BACKOFF_MAX" ] && delay=$GAIA_WORKER_BACKOFF_MAX
+        [ "${WORKER_FAILURES[$id]}" -lt 16 ] && WORKER_FAILURES[$id]=$(( WORKER_FAILURES[$id] + 1 ))
+
+        echo "[supervisor] worker $id exited with status $status after ${ran}s, restarting in ${delay}s"
+        unset "WORKER_PIDS[$id]"
+        WORKER_NEXT_START[$id]=$(( SECONDS + delay ))
+    done
+
+    trap - TERM INT
+    return 0
+}
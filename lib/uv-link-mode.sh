@@ -0,0 +1,38 @@
+#!/bin/bash
+# uv link-mode selection
+#
+# uv links packages from its cache into the target environment. Reflinks
+# (clone) and hardlinks avoid duplicating every file, but only work when the
+# cache and the environment live on the same filesystem, which is often not
+# the case once either one is a Docker volume. detect_uv_link_mode probes the
+# actual directories and prints "<mode>: <reason>".
+
+detect_uv_link_mode() {
+    local cache_dir="$1" target_dir="$2" probe mode reason
+
+    mkdir -p "$cache_dir" "$target_dir" 2>/dev/null || true
+    if [ "$(stat -c %d "$cache_dir" 2>/dev/null)" != "$(stat -c %d "$target_dir" 2>/dev/null)" ]; then
+        echo "copy: $cache_dir and $target_dir are on different filesystems"
+        return
+    fi
+
+    if ! probe=$(mktemp "$cache_dir/.gaia-link-probe.XXXXXX" 2>/dev/null); then
+        echo "copy: cannot write to $cache_dir"
+        return
+    fi
+    echo "probe" > "$probe"
+
+    if cp --reflink=always "$probe" "$target_dir/.gaia-link-probe.$$" 2>/dev/null; then
+        mode=clone
+        reason="filesystem supports reflinks"
+    # A failed clone can leave an empty destination behind
+    elif rm -f "$target_dir/.gaia-link-probe.$$" && ln "$probe" "$target_dir/.gaia-link-probe.$$" 2>/dev/null; then
+        mode=hardlink
+        reason="cache and environment share a filesystem"
+    else
+        mode=copy
+        reason="filesystem does not support reflinks or hardlinks"
+    fi
+    rm -f "$probe" "$target_dir/.gaia-link-probe.$$"
+    echo "$mode: $reason"
+}
@@ -1,11 +1,17 @@
 """Pytest fixtures for GAIA Docker tests."""
 
+import os
 import pytest
 import subprocess
+import threading
 import time
+from collections import deque
 from pathlib import Path
 from testcontainers.core.container import DockerContainer
 
+from tools.pypi_stub import PyPIStub
+from tools.wheelhouse import DEFAULT_DEST, gaia_version
+
 
 @pytest.fixture(scope="session")
 def project_root():
@@ -37,6 +43,12 @@ def entrypoint_dev_path(project_root):
     return project_root / "gaia-dev" / "entrypoint.sh"
 
 
+@pytest.fixture(scope="session")
+def lib_dir(project_root):
+    """Return path to the shared entrypoint helpers (installed to /usr/local/lib/gaia)."""
+    return project_root / "lib"
+
+
 @pytest.fixture(scope="session")
 def workflow_file(project_root):
     """Return path to GitHub Actions workflow file."""
@@ -49,8 +61,84 @@ def version_file(project_root):
     return project_root / "VERSION.json"
 
 
+READY_MARKER = b"=== Ready ==="
+
+
+def wait_for_ready(container, timeout, name="Container", started=None):
+    """Follow the container's log stream until the entrypoint prints READY_MARKER.
+
+    Returns the seconds from STARTED (default: now) until the marker appeared.
+    Raises as soon as the container exits without becoming ready, or after
+    TIMEOUT seconds, with the tail of the log.
+    """
+    wrapped = container.get_wrapped_container()
+    tail = deque(maxlen=40)
+    result = {}
+
+    def follow():
+        pending = b""
+        try:
+            for chunk in wrapped.logs(stream=True, follow=True):
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                tail.extend(lines)
+                if READY_MARKER in pending or any(READY_MARKER in line for line in lines):
+                    result["ready"] = time.monotonic()
+                    return
+            tail.append(pending)
+        except Exception as exc:  # docker API errors end the wait
+            result["error"] = exc
+
+    start = time.monotonic() if started is None else started
+    follower = threading.Thread(target=follow, daemon=True)
+    follower.start()
+    follower.join(max(0.0, timeout - (time.monotonic() - start)))
+    if "ready" in result:
+        return result["ready"] - start
+
+    log = b"\n".join(tail).decode("utf-8", errors="ignore")
+    if follower.is_alive():
+        raise TimeoutError(f"{name} did not become ready within {timeout} seconds:\n{log}")
+    if "error" in result:
+        raise RuntimeError(f"Lost the log stream of {name}: {result['error']}\n{log}")
+    wrapped.reload()
+    raise RuntimeError(f"{name} exited with status {wrapped.attrs['State']['ExitCode']} "
+                       f"before becoming ready:\n{log}")
+
+
+@pytest.fixture(scope="session")
+def package_index():
+    """Serve the test wheelhouse to the containers as a local simple index.
+
+    The wheelhouse (GAIA_TEST_WHEELHOUSE, default .wheelhouse; refresh it with
+    ``python -m tools.wheelhouse``) makes the runtime install offline and its
+    timing repeatable. Yields the container environment that installs its
+    GAIA version from the index, or None without a wheelhouse, in which case
+    containers install from PyPI.
+    """
+    wheelhouse = Path(os.environ.get("GAIA_TEST_WHEELHOUSE", DEFAULT_DEST))
+    version = gaia_version(wheelhouse)
+    if version is None:
+        yield None
+        return
+    with PyPIStub(wheelhouse, host="0.0.0.0") as index:
+        yield {
+            "GAIA_VERSION": version,
+            "UV_DEFAULT_INDEX": index.index_url(host="host.docker.internal"),
+        }
+
+
+def with_package_index(container, package_index):
+    """Point CONTAINER's runtime install at the local index, if there is one."""
+    if package_index:
+        for name, value in package_index.items():
+            container.with_env(name, value)
+        container.with_kwargs(extra_hosts={"host.docker.internal": "host-gateway"})
+    return container
+
+
 @pytest.fixture(scope="module")
-def gaia_container(project_root):
+def gaia_container(project_root, package_index, record_testsuite_property):
     """Build and start GAIA container for integration tests."""
     subprocess.run(
         ["docker", "build", "-t", "gaia-linux:test", "-f", "gaia-linux/Dockerfile", str(project_root)],
@@ -65,17 +153,12 @@ def gaia_container(project_root):
         .with_env("SKIP_INSTALL", "false")
         .with_command("sleep infinity")
     )
+    with_package_index(container, package_index)
 
+    started = time.monotonic()
     with container:
-        # Wait for entrypoint to complete
-        start = time.time()
-        while time.time() - start < 600:
-            logs = container.get_wrapped_container().logs().decode("utf-8", errors="ignore")
-            if "=== Ready ===" in logs:
-                break
-            time.sleep(1)
-        else:
-            raise TimeoutError("Container did not become ready within 600 seconds")
+        container.time_to_ready = wait_for_ready(container, 600, started=started)
+        record_testsuite_property("gaia_container_time_to_ready_s", round(container.time_to_ready, 2))
         yield container
 
 
@@ -89,7 +172,7 @@ def container_exec(gaia_container):
 
 
 @pytest.fixture(scope="module")
-def gaia_dev_container(project_root):
+def gaia_dev_container(project_root, record_testsuite_property):
     """Build and start GAIA dev container for integration tests."""
     subprocess.run(
         ["docker", "build", "-t", "gaia-dev:test", "-f", "gaia-dev/Dockerfile", str(project_root)],
@@ -104,16 +187,12 @@ def gaia_dev_container(project_root):
         .with_command("sleep infinity")
     )
 
+    started = time.monotonic()
     with container:
-        # Wait for entrypoint to complete
-        start = time.time()
-        while time.time() - start < 120:
-            logs = container.get_wrapped_container().logs().decode("utf-8", errors="ignore")
-            if "=== Ready ===" in logs:
-                break
-            time.sleep(1)
-        else:
-            raise TimeoutError("Dev container did not become ready within 120 seconds")
+        container.time_to_ready = wait_for_ready(container, 120, name="Dev container",
+                                                 started=started)
+        record_testsuite_property("gaia_dev_container_time_to_ready_s",
+                                  round(container.time_to_ready, 2))
         yield container
 
 
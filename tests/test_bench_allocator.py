@@ -0,0 +1,17 @@
+"""Tests for the allocator benchmark (tools/bench_allocator.py)."""
+
+from tools.bench_allocator import steady_state_kb, summarize
+
+
+class TestAllocatorBenchmark:
+    """Test the allocator benchmark statistics."""
+
+    def test_steady_state_ignores_warmup(self):
+        """Steady state should be the median of the second half of the run."""
+        assert steady_state_kb([10, 500, 90, 100, 110, 100]) == 100
+
+    def test_summarize_reports_megabytes(self):
+        """Summary should report steady, peak and final RSS in MB."""
+        summary = summarize([1024, 4096, 2048, 2048])
+        assert summary == {"samples": 4, "steady_rss_mb": 2.0, "peak_rss_mb": 4.0,
+                           "final_rss_mb": 2.0}
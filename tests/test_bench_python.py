@@ -0,0 +1,40 @@
+"""Tests for the interpreter benchmark (tools/bench_python.py, tools/python_workload.py)."""
+
+import json
+import os
+import subprocess
+import sys
+
+from tools.bench_python import optimizations, speedups
+
+
+class TestPythonBenchmark:
+    """Test the interpreter benchmark and its in-container workload."""
+
+    def test_speedup_is_baseline_over_candidate(self):
+        """A speedup above 1 means the uv interpreter was faster."""
+        assert speedups({"nbody_s": 1.5, "json_s": 0.2}, {"nbody_s": 1.0, "json_s": 0.0}) == {
+            "nbody_s": 1.5, "json_s": None}
+
+    def test_optimizations_from_config_args(self):
+        """PGO and LTO are read from the configure flags the interpreter was built with."""
+        assert optimizations("'--enable-optimizations' '--with-lto' '--prefix=/install'") == ["PGO", "LTO"]
+        assert optimizations("'--prefix=/usr' '--with-lto=full'") == ["LTO"]
+        assert optimizations("") == []
+
+    def test_workload_reports_every_measurement(self, project_root, tmp_path):
+        """The workload times startup and each kernel with the running interpreter."""
+        cli = tmp_path / "gaia"
+        cli.write_text("import sys\nprint('usage: gaia', sys.argv[1:])\n")
+        cli.chmod(0o755)
+        proc = subprocess.run(
+            [sys.executable, "-", "--runs", "1", "--module", "json"],
+            input=(project_root / "tools" / "python_workload.py").read_text(),
+            capture_output=True, text=True, check=True,
+            env={**os.environ, "PATH": f"{tmp_path}:{os.environ['PATH']}"},
+        )
+        run = json.loads(proc.stdout)
+        assert run["executable"] == sys.executable
+        assert set(run["results"]) == {"python_startup_s", "import_gaia_s", "gaia_help_s", "nbody_s",
+                                       "json_s", "regex_s", "dicts_strings_s"}
+        assert all(seconds > 0 for seconds in run["results"].values())
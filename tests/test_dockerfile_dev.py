@@ -169,6 +169,52 @@ class TestGaiaSourceCode:
         assert "First-time setup" in content
         assert "uv pip install" in content
 
+    def test_dependencies_built_in_separate_stage(self, dockerfile_dev_path):
+        """GAIA's dependencies are resolved in a deps stage and copied into the venv."""
+        content = dockerfile_dev_path.read_text()
+        assert "FROM base AS deps" in content
+        assert "uv pip compile" in content
+        assert "ARG GAIA_REF=" in content
+        assert "COPY --from=deps --chown=gaia:gaia /home/gaia/.venv /home/gaia/.venv" in content
+
+    def test_dependencies_from_pyproject_or_setup_py(self, dockerfile_dev_path):
+        """The deps stage compiles whichever of pyproject.toml and setup.py declares GAIA's dependencies."""
+        content = dockerfile_dev_path.read_text()
+        assert "then deps_source=pyproject.toml; else deps_source=setup.py; fi" in content
+        assert '"$deps_source" -o /tmp/requirements.txt' in content
+
+    def test_dependency_resolution_is_pinned_to_the_commit(self, dockerfile_dev_path):
+        """Releases newer than the GAIA commit are ignored, so rebuilding a commit resolves the same versions."""
+        assert '--exclude-newer "$(git log -1 --format=%cI)"' in dockerfile_dev_path.read_text()
+
+    def test_gaia_itself_not_preinstalled(self, dockerfile_dev_path):
+        """Only the dependencies are baked in; GAIA comes from the editable install."""
+        content = dockerfile_dev_path.read_text()
+        assert "grep -v '^amd-gaia'" in content
+        assert "rm -rf /tmp/gaia-src" in content
+
+    def test_ci_pins_gaia_ref_to_a_commit(self, workflow_file):
+        """CI resolves main to a commit so cached dependencies do not go stale."""
+        content = workflow_file.read_text()
+        assert "git ls-remote https://github.com/amd/gaia.git refs/heads/main" in content
+        assert content.count("GAIA_REF=${{ env.GAIA_REF }}") == 2
+
+    @pytest.mark.integration
+    def test_dependencies_preinstalled(self, project_root):
+        """GAIA's dependencies are importable before the first editable install."""
+        result = subprocess.run(
+            ["docker", "run", "--rm",
+             "-e", "LEMONADE_BASE_URL=http://test",
+             "--entrypoint", "",
+             "gaia-dev:test", "uv", "pip", "list"],
+            capture_output=True,
+            text=True
+        )
+        assert result.returncode == 0
+        packages = result.stdout.lower()
+        assert "pytest" in packages
+        assert "amd-gaia" not in packages
+
     @pytest.mark.integration
     def test_gaia_cloned_on_first_run(self, project_root):
         """GAIA must be cloned on first run."""
@@ -178,3 +178,224 @@ class TestHostDirectoryMount:
         )
         assert result.returncode == 0
         assert "success" in result.stdout
+
+
+class TestSharedEnvironment:
+    """Test install-only and shared environment modes."""
+
+    def test_supports_env_modes(self, entrypoint_path):
+        """Entrypoint should support system, install-only and shared modes."""
+        content = entrypoint_path.read_text()
+        assert 'GAIA_ENV_MODE="${GAIA_ENV_MODE:-system}"' in content
+        assert 'install-only)' in content
+        assert 'shared)' in content
+        assert 'Unknown GAIA_ENV_MODE' in content
+
+    def test_install_only_exits_after_install(self, entrypoint_path):
+        """install-only mode should write a completion marker and exit before exec."""
+        content = entrypoint_path.read_text()
+        marker_write = content.index('tee "$GAIA_ENV_MARKER"')
+        assert content.index('rm -f "$GAIA_ENV_MARKER"') < marker_write
+        assert 'exit 0' in content[marker_write:content.index('exec "$@"')]
+
+    def test_shared_mode_requires_completed_env(self, entrypoint_path):
+        """shared mode should refuse to start without a completed environment."""
+        content = entrypoint_path.read_text()
+        assert 'No usable GAIA environment found' in content
+
+    def test_dockerfile_puts_shared_env_on_path(self, dockerfile_path):
+        """The shared environment should be on PATH for docker exec sessions."""
+        content = dockerfile_path.read_text()
+        assert '/opt/gaia-env' in content
+        assert 'ENV PATH="/opt/gaia-env/bin:' in content
+
+    @pytest.mark.integration
+    def test_shared_mode_fails_on_empty_volume(self, project_root):
+        """shared mode should fail fast when the volume was never populated."""
+        import subprocess
+        result = subprocess.run(
+            ["docker", "run", "--rm",
+             "-e", "LEMONADE_BASE_URL=http://localhost:5000/api/v1",
+             "-e", "GAIA_ENV_MODE=shared",
+             "gaia-linux:test", "echo", "started"],
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        assert result.returncode != 0
+        assert "No usable GAIA environment found" in result.stdout
+
+    @pytest.mark.integration
+    @pytest.mark.slow
+    def test_install_once_share_read_only(self, project_root):
+        """An install-only run should populate a volume that shared containers use read-only."""
+        import subprocess
+        import uuid
+        volume = f"gaia-env-test-{uuid.uuid4().hex[:8]}"
+        try:
+            install = subprocess.run(
+                ["docker", "run", "--rm",
+                 "-v", f"{volume}:/opt/gaia-env",
+                 "-e", "LEMONADE_BASE_URL=http://localhost:5000/api/v1",
+                 "-e", "GAIA_ENV_MODE=install-only",
+                 "gaia-linux:test", "echo", "should-not-run"],
+                capture_output=True,
+                text=True,
+                timeout=900
+            )
+            assert install.returncode == 0, install.stdout + install.stderr
+            assert "=== Install complete ===" in install.stdout
+            assert "should-not-run" not in install.stdout
+
+            shared = subprocess.run(
+                ["docker", "run", "--rm",
+                 "-v", f"{volume}:/opt/gaia-env:ro",
+                 "-e", "LEMONADE_BASE_URL=http://localhost:5000/api/v1",
+                 "-e", "GAIA_ENV_MODE=shared",
+                 "gaia-linux:test", "python", "-c", "import gaia; print(gaia.__file__)"],
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+            assert shared.returncode == 0, shared.stdout + shared.stderr
+            assert "Installing GAIA" not in shared.stdout
+            assert "/opt/gaia-env/" in shared.stdout.strip().splitlines()[-1]
+        finally:
+            subprocess.run(["docker", "volume", "rm", "-f", volume], capture_output=True)
+
+
+class TestManagedPython:
+    """Test that GAIA runs on the uv-managed interpreter."""
+
+    def test_dockerfile_installs_managed_python(self, dockerfile_path):
+        """The Python minor version is a build arg and the interpreter is on PATH."""
+        content = dockerfile_path.read_text()
+        assert "ARG PYTHON_VERSION=3.12" in content
+        assert "uv python install --no-cache ${PYTHON_VERSION}" in content
+        assert "/opt/python/current" in content
+        assert 'ENV PATH="/opt/gaia-env/bin:/opt/python/current/bin:' in content
+
+    def test_entrypoint_installs_into_managed_python(self, entrypoint_path):
+        """GAIA is installed into GAIA_BASE_PYTHON instead of Ubuntu's python3."""
+        content = entrypoint_path.read_text()
+        assert 'GAIA_BASE_PYTHON="${GAIA_BASE_PYTHON:-/opt/python/current/bin/python3}"' in content
+        assert 'UV_INSTALL_ARGS=(--python "$GAIA_BASE_PYTHON" --break-system-packages)' in content
+        assert 'venv --python "$GAIA_BASE_PYTHON"' in content
+        assert "/usr/bin/python3" not in content
+
+    @pytest.mark.integration
+    def test_gaia_imports_from_managed_python(self, container_exec):
+        """python on PATH is the optimized uv build and GAIA is installed into it."""
+        result = container_exec(
+            "python -c 'import gaia, sys, sysconfig; "
+            "print(sys.prefix, gaia.__file__, sysconfig.get_config_var(\"CONFIG_ARGS\"))'"
+        )
+        assert result.exit_code == 0
+        prefix, gaia_file, config_args = result.output.decode().strip().split(" ", 2)
+        assert prefix.startswith("/opt/python/")
+        assert gaia_file.startswith(prefix)
+        assert "--enable-optimizations" in config_args
+
+
+class TestResourceTuning:
+    """Test cgroup-aware defaults in a running container."""
+
+    @staticmethod
+    def _run_env(*docker_args):
+        import subprocess
+        result = subprocess.run(
+            ["docker", "run", "--rm", *docker_args,
+             "-e", "LEMONADE_BASE_URL=http://localhost:5000/api/v1",
+             "-e", "SKIP_INSTALL=true",
+             "gaia-linux:test", "env"],
+            capture_output=True,
+            text=True,
+            timeout=60
+        )
+        assert result.returncode == 0, result.stderr
+        return dict(line.split("=", 1) for line in result.stdout.splitlines() if "=" in line)
+
+    @pytest.mark.integration
+    def test_cpus_flag_sets_thread_defaults(self, project_root):
+        """docker run --cpus 2 should export two threads for numeric libraries and uv."""
+        env = self._run_env("--cpus", "2")
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+                    "RAYON_NUM_THREADS", "UV_CONCURRENT_INSTALLS", "GAIA_CPU_LIMIT"):
+            assert env.get(var) == "2", f"{var}={env.get(var)}"
+        assert env.get("UV_CONCURRENT_DOWNLOADS") == "8"
+
+    @pytest.mark.integration
+    def test_memory_flag_exports_limit(self, project_root):
+        """docker run --memory should be reflected in GAIA_MEMORY_LIMIT."""
+        env = self._run_env("--cpus", "2", "--memory", "1g")
+        assert env.get("GAIA_MEMORY_LIMIT") == str(1024 ** 3)
+        assert env.get("UV_CONCURRENT_BUILDS") == "1"
+
+    @pytest.mark.integration
+    def test_user_override_wins(self, project_root):
+        """A value passed with -e should not be replaced."""
+        env = self._run_env("--cpus", "2", "-e", "OMP_NUM_THREADS=7")
+        assert env.get("OMP_NUM_THREADS") == "7"
+        assert env.get("MKL_NUM_THREADS") == "2"
+
+
+class TestInitProcess:
+    """Test that containers run under an init process."""
+
+    def test_images_use_tini(self, dockerfile_path, dockerfile_dev_path):
+        """Both images should start the entrypoint through tini."""
+        for path in (dockerfile_path, dockerfile_dev_path):
+            content = path.read_text()
+            assert "tini" in content
+            assert 'ENTRYPOINT ["/usr/bin/tini", "-g", "--", "/usr/local/bin/entrypoint.sh"]' in content
+
+    def test_main_shell_exits_on_sigterm(self, dockerfile_path, dockerfile_dev_path):
+        """The container's interactive zsh should not ignore docker stop."""
+        for path in (dockerfile_path, dockerfile_dev_path):
+            assert "trap 'exit 143' TERM\" >> /home/gaia/.zshrc" in path.read_text()
+
+    @pytest.mark.integration
+    def test_tini_is_pid_1(self, project_root):
+        """PID 1 should be tini, not the shell."""
+        import subprocess
+        result = subprocess.run(
+            ["docker", "run", "--rm",
+             "-e", "LEMONADE_BASE_URL=http://localhost:5000/api/v1",
+             "-e", "SKIP_INSTALL=true",
+             "gaia-linux:test", "cat", "/proc/1/comm"],
+            capture_output=True,
+            text=True,
+            timeout=60
+        )
+        assert result.stdout.strip().splitlines()[-1] == "tini"
+
+    @pytest.mark.integration
+    def test_docker_stop_is_fast(self, project_root):
+        """docker stop on an interactive shell should finish well under a second."""
+        import subprocess
+        import time
+        container = subprocess.run(
+            ["docker", "run", "-d", "-t", "-i",
+             "-e", "LEMONADE_BASE_URL=http://localhost:5000/api/v1",
+             "-e", "SKIP_INSTALL=true",
+             "gaia-linux:test"],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=60
+        ).stdout.strip()
+        try:
+            deadline = time.monotonic() + 60
+            while "=== Ready ===" not in subprocess.run(
+                ["docker", "logs", container], capture_output=True, text=True
+            ).stdout:
+                assert time.monotonic() < deadline, "container did not become ready"
+                time.sleep(0.5)
+            time.sleep(1)
+            start = time.monotonic()
+            subprocess.run(["docker", "stop", container], check=True, capture_output=True,
+                           timeout=30)
+            elapsed = time.monotonic() - start
+        finally:
+            subprocess.run(["docker", "rm", "-f", container], capture_output=True)
+        assert elapsed < 1.0, f"docker stop took {elapsed:.2f}s"
@@ -0,0 +1,219 @@
+"""Tests for the image diff tool (tools/image_diff.py)."""
+
+import gzip
+import hashlib
+import io
+import json
+import subprocess
+import sys
+import tarfile
+
+import pytest
+
+from tools.image_diff import diff_images, human, list_layer, load_image, read_archive
+
+
+def layer_tar(entries, compress=False):
+    """Layer tarball bytes from {name: content bytes, or None for a directory}."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as layer:
+        for name, content in entries.items():
+            info = tarfile.TarInfo(name)
+            if content is None:
+                info.type = tarfile.DIRTYPE
+                layer.addfile(info)
+            else:
+                info.size = len(content)
+                layer.addfile(info, io.BytesIO(content))
+    data = buffer.getvalue()
+    return gzip.compress(data) if compress else data
+
+
+def _add(archive, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    archive.addfile(info, io.BytesIO(data))
+
+
+def _digest(data):
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def docker_save(path, layers, manifest_last=True):
+    """Write a docker-save style archive; LAYERS is [(created_by, layer tar bytes)]."""
+    config = json.dumps({
+        "rootfs": {"type": "layers", "diff_ids": [_digest(data) for _, data in layers]},
+        "history": [{"created_by": created_by} for created_by, _ in layers]
+                   + [{"created_by": "USER gaia", "empty_layer": True}],
+    }).encode()
+    manifest = json.dumps([{
+        "Config": f"blobs/sha256/{_digest(config)[7:]}",
+        "Layers": [f"blobs/sha256/{_digest(data)[7:]}" for _, data in layers],
+    }]).encode()
+    with tarfile.open(path, "w") as archive:
+        if not manifest_last:
+            _add(archive, "manifest.json", manifest)
+        _add(archive, f"blobs/sha256/{_digest(config)[7:]}", config)
+        for _, data in layers:
+            _add(archive, f"blobs/sha256/{_digest(data)[7:]}", data)
+        if manifest_last:
+            _add(archive, "manifest.json", manifest)
+    return path
+
+
+def oci_layout(path, layers):
+    """Write an OCI image layout archive with gzip-compressed layers."""
+    blobs = {}
+    raw = [data for _, data in layers]
+    compressed = [gzip.compress(data) for data in raw]
+    config = json.dumps({
+        "rootfs": {"type": "layers", "diff_ids": [_digest(data) for data in raw]},
+        "history": [{"created_by": created_by} for created_by, _ in layers],
+    }).encode()
+    manifest = json.dumps({
+        "config": {"digest": _digest(config)},
+        "layers": [{"digest": _digest(data)} for data in compressed],
+    }).encode()
+    for data in [config, manifest, *compressed]:
+        blobs[_digest(data)] = data
+    with tarfile.open(path, "w") as archive:
+        for digest, data in blobs.items():
+            _add(archive, f"blobs/sha256/{digest[7:]}", data)
+        _add(archive, "index.json", json.dumps({"manifests": [{"digest": _digest(manifest)}]}).encode())
+    return path
+
+
+BASE = ("ADD rootfs", layer_tar({"usr": None, "usr/bin/zsh": b"z" * 100, "etc/hosts": b"h" * 10}))
+
+
+class TestListLayer:
+    """Test streaming a single layer tar."""
+
+    def test_lists_files_and_skips_directories(self):
+        """Regular files are listed with their size; directories are not."""
+        files, whiteouts, opaque, _ = list_layer(io.BytesIO(BASE[1]))
+        assert files == {"/usr/bin/zsh": 100, "/etc/hosts": 10}
+        assert whiteouts == [] and opaque == []
+
+    def test_reads_gzip_layers(self):
+        """Compressed layers (OCI blobs) are decompressed on the fly and sized uncompressed."""
+        files, _, _, size = list_layer(io.BytesIO(layer_tar({"./.zshrc": b"x"}, compress=True)))
+        assert files == {"/.zshrc": 1}
+        assert size == list_layer(io.BytesIO(layer_tar({"./.zshrc": b"x"})))[3]
+        assert size > len(layer_tar({"./.zshrc": b"x"}, compress=True))
+
+    def test_whiteouts(self):
+        """Whiteout and opaque markers are recorded as deletions."""
+        data = layer_tar({"var/lib/apt/lists/.wh..wh..opq": b"", "usr/bin/.wh.zsh": b""})
+        files, whiteouts, opaque, _ = list_layer(io.BytesIO(data))
+        assert files == {}
+        assert whiteouts == ["/usr/bin/zsh"]
+        assert opaque == ["/var/lib/apt/lists"]
+
+
+class TestReadArchive:
+    """Test reading whole images in a single pass."""
+
+    @pytest.mark.parametrize("manifest_last", [True, False])
+    def test_docker_save(self, tmp_path, manifest_last):
+        """Layers map to their diff IDs and history, whatever the member order."""
+        apt = ("RUN apt-get install vim", layer_tar({"usr/bin/vim": b"v" * 50}))
+        path = docker_save(tmp_path / "image.tar", [BASE, apt], manifest_last=manifest_last)
+        with open(path, "rb") as f:
+            image = read_archive(f, "image.tar")
+        assert [layer.created_by for layer in image.layers] == ["ADD rootfs", "RUN apt-get install vim"]
+        assert image.layers[1].diff_id == _digest(apt[1])
+        assert image.filesystem() == {"/usr/bin/zsh": 100, "/etc/hosts": 10, "/usr/bin/vim": 50}
+
+    def test_oci_layout(self, tmp_path):
+        """OCI archives resolve the manifest through index.json; diff IDs come from the config."""
+        path = oci_layout(tmp_path / "image.tar", [BASE])
+        image = load_image(str(path))
+        assert image.layers[0].diff_id == _digest(BASE[1])
+        assert image.filesystem() == {"/usr/bin/zsh": 100, "/etc/hosts": 10}
+
+    def test_large_layers_are_streamed(self, tmp_path, monkeypatch):
+        """Members over the in-memory limit are listed while streaming."""
+        monkeypatch.setattr("tools.image_diff.SMALL_MEMBER", 64)
+        path = docker_save(tmp_path / "image.tar", [BASE])
+        image = load_image(str(path))
+        assert image.filesystem() == {"/usr/bin/zsh": 100, "/etc/hosts": 10}
+
+    def test_whiteouts_apply_in_order(self, tmp_path):
+        """A later layer's whiteouts remove files from earlier layers."""
+        cleanup = ("RUN rm", layer_tar({"usr/bin/.wh.zsh": b"", "etc/.wh..wh..opq": b"",
+                                         "etc/motd": b"m"}))
+        path = docker_save(tmp_path / "image.tar", [BASE, cleanup])
+        assert load_image(str(path)).filesystem() == {"/etc/motd": 1}
+
+
+class TestDiffImages:
+    """Test the layer and file comparison."""
+
+    @pytest.fixture
+    def images(self, tmp_path):
+        upgrade = ("RUN apt-get upgrade", layer_tar({
+            "usr/bin/zsh": b"z" * 300,
+            "usr/lib/libnew.so": b"n" * 1000,
+            "etc/.wh.hosts": b"",
+        }))
+        old = load_image(str(docker_save(tmp_path / "old.tar", [BASE])))
+        new = load_image(str(oci_layout(tmp_path / "new.tar", [BASE, upgrade])))
+        return old, new
+
+    def test_shared_layers_are_not_pulled(self, images):
+        """Only layers missing from the old image count towards the pull."""
+        diff = diff_images(*images)
+        assert diff["layers"]["shared"] == 1
+        assert [layer["created_by"] for layer in diff["layers"]["added"]] == ["RUN apt-get upgrade"]
+        assert diff["layers"]["added"][0]["top_files"][0] == {"path": "/usr/lib/libnew.so",
+                                                               "bytes": 1000}
+
+    def test_files_ranked_by_bytes(self, images):
+        """Added, removed and grown paths are reported with their byte changes."""
+        files = diff_images(*images)["files"]
+        assert files["added"]["top"] == [{"path": "/usr/lib/libnew.so", "bytes": 1000}]
+        assert files["removed"]["top"] == [{"path": "/etc/hosts", "bytes": 10}]
+        assert files["grown"]["top"] == [{"path": "/usr/bin/zsh", "bytes": 200}]
+        assert files["shrunk"]["count"] == 0
+
+    def test_directory_totals(self, images):
+        """Net byte changes are aggregated per directory at the requested depth."""
+        diff = diff_images(*images, depth=1)
+        assert diff["directories"] == [{"path": "/usr", "bytes": 1200},
+                                       {"path": "/etc", "bytes": -10}]
+        assert diff["net_bytes"] == 1190
+
+    def test_identical_images(self, images):
+        """An image compared with itself has no changes."""
+        diff = diff_images(images[0], images[0])
+        assert diff["layers"]["added"] == []
+        assert diff["net_bytes"] == 0
+        assert diff["directories"] == []
+
+    def test_human_sizes(self):
+        assert human(512) == "+512 B"
+        assert human(-2048) == "-2.0 KiB"
+        assert human(800 * 1024 * 1024, signed=False) == "800.0 MiB"
+
+    def test_cli_writes_json(self, project_root, tmp_path):
+        """The CLI prints a report and writes the diff as JSON."""
+        old = docker_save(tmp_path / "old.tar", [BASE])
+        new = docker_save(tmp_path / "new.tar", [BASE, ("RUN touch", layer_tar({"opt/x": b"xx"}))])
+        output = tmp_path / "diff.json"
+        result = subprocess.run(
+            [sys.executable, "-m", "tools.image_diff", str(old), str(new), "--output", str(output)],
+            cwd=project_root, capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert "upgrade pulls" in result.stdout
+        assert "/opt/x" in result.stdout
+        assert json.loads(output.read_text())["files"]["added"]["count"] == 1
+
+    @pytest.mark.integration
+    def test_local_images(self):
+        """Local tags are streamed from docker save."""
+        subprocess.run(["docker", "pull", "ubuntu:24.04"], check=True, capture_output=True)
+        diff = diff_images(load_image("ubuntu:24.04"), load_image("ubuntu:24.04"))
+        assert diff["layers"]["shared"] == diff["layers"]["new"] > 0
+        assert diff["net_bytes"] == 0
@@ -0,0 +1,127 @@
+"""Tests for the zstd and eStargz image variants and their tooling."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+import yaml
+
+from tools.bench_pull import output_spec, summarize
+from tools.startup_record import parse_trace, to_record
+
+
+class TestStartupRecord:
+    """Test parsing of strace output into a prioritized-files record."""
+
+    def test_keeps_first_access_order(self):
+        """Paths appear once, in the order they were first opened."""
+        trace = [
+            '10 execve("/usr/local/bin/entrypoint.sh", ["/usr/local/bin/entrypoint.sh"], 0x7ff /* 20 vars */) = 0',
+            '10 openat(AT_FDCWD, "/etc/ld.so.cache", O_RDONLY|O_CLOEXEC) = 3',
+            '10 openat(AT_FDCWD, "/usr/lib/x86_64-linux-gnu/libc.so.6", O_RDONLY|O_CLOEXEC) = 3',
+            '11 openat(AT_FDCWD, "/etc/ld.so.cache", O_RDONLY|O_CLOEXEC) = 3',
+        ]
+        assert parse_trace(trace) == [
+            "/usr/local/bin/entrypoint.sh",
+            "/etc/ld.so.cache",
+            "/usr/lib/x86_64-linux-gnu/libc.so.6",
+        ]
+
+    def test_skips_failed_relative_and_pseudo_paths(self):
+        """Failed opens, relative paths and /proc, /dev, /tmp are not image files."""
+        trace = [
+            '10 openat(AT_FDCWD, "/usr/lib/missing.so", O_RDONLY) = -1 ENOENT (No such file or directory)',
+            '10 openat(AT_FDCWD, "relative.txt", O_RDONLY) = 3',
+            '10 openat(AT_FDCWD, "/proc/self/status", O_RDONLY) = 3',
+            '10 openat(AT_FDCWD, "/dev/null", O_WRONLY) = 3',
+            '10 openat(AT_FDCWD, "/tmp/startup.strace", O_WRONLY) = 3',
+            '10 open("/etc/passwd", O_RDONLY) = 4',
+        ]
+        assert parse_trace(trace) == ["/etc/passwd"]
+
+    def test_joins_unfinished_calls(self):
+        """Calls interleaved with other processes are matched up by pid."""
+        trace = [
+            '10 openat(AT_FDCWD, "/usr/bin/python3.12", O_RDONLY <unfinished ...>',
+            '11 openat(AT_FDCWD, "/etc/hosts", O_RDONLY) = 3',
+            '12 openat(AT_FDCWD, "/usr/lib/gone.so", O_RDONLY <unfinished ...>',
+            '10 <... openat resumed>) = 5',
+            '12 <... openat resumed>) = -1 ENOENT (No such file or directory)',
+        ]
+        assert parse_trace(trace) == ["/etc/hosts", "/usr/bin/python3.12"]
+
+    def test_record_is_json_lines(self):
+        """The record holds one {"path": ...} object per line."""
+        record = to_record(["/usr/bin/zsh", "/etc/zshenv"])
+        assert [json.loads(line) for line in record.splitlines()] == [
+            {"path": "/usr/bin/zsh"}, {"path": "/etc/zshenv"},
+        ]
+
+
+class TestPullBenchmark:
+    """Test the pull-to-ready benchmark helpers."""
+
+    @pytest.mark.parametrize("variant", ["gzip", "zstd", "estargz"])
+    def test_output_forces_compression(self, variant):
+        """Each variant is pushed with its own compression, recompressing cached layers."""
+        spec = output_spec("localhost:5000/gaia-linux:x", variant)
+        assert f"compression={variant}" in spec
+        assert "force-compression=true" in spec
+        assert "oci-mediatypes=true" in spec
+        assert "push=true" in spec
+
+    def test_summarize_compares_to_gzip(self):
+        """Variants are reported relative to the gzip baseline."""
+        results = summarize({
+            "gzip": {"pull_s": 8.0, "pull_to_ready_s": 10.0},
+            "zstd": {"pull_s": 5.0, "pull_to_ready_s": 7.5},
+        })
+        assert results["gzip"]["vs_gzip"] == 1.0
+        assert results["zstd"]["vs_gzip"] == 0.75
+
+    def test_summarize_without_baseline(self):
+        """Without a gzip run there is nothing to compare against."""
+        results = summarize({"zstd": {"pull_s": 5.0, "pull_to_ready_s": 7.5}})
+        assert "vs_gzip" not in results["zstd"]
+
+    @pytest.mark.integration
+    def test_pull_to_ready_against_gzip(self, project_root, tmp_path):
+        """Push gzip and zstd variants to a local registry and time pull-to-ready."""
+        output = tmp_path / "pull.json"
+        result = subprocess.run(
+            [sys.executable, "-m", "tools.bench_pull",
+             "--dockerfile", "gaia-linux/Dockerfile", "--context", str(project_root),
+             "--variants", "gzip", "zstd", "--output", str(output)],
+            cwd=project_root, capture_output=True, text=True, timeout=3600,
+        )
+        assert result.returncode == 0, result.stderr
+        results = json.loads(output.read_text())["results"]
+        assert set(results) == {"gzip", "zstd"}
+        for r in results.values():
+            assert 0 < r["pull_s"] <= r["pull_to_ready_s"]
+        assert "vs_gzip" in results["zstd"]
+
+
+class TestPublishVariants:
+    """Test that CI publishes the zstd and eStargz variants."""
+
+    @pytest.mark.parametrize("job", ["build-and-push", "build-dev"])
+    def test_zstd_variant_pushed(self, workflow_file, job):
+        """Each image also gets a <version>-zstd tag with zstd layers."""
+        steps = yaml.safe_load(workflow_file.read_text())["jobs"][job]["steps"]
+        zstd = [s for s in steps
+                if s.get("uses", "").startswith("docker/build-push-action")
+                and "compression=zstd" in s["with"].get("outputs", "")]
+        assert len(zstd) == 1
+        assert "-zstd" in zstd[0]["with"]["tags"]
+        assert "force-compression=true" in zstd[0]["with"]["outputs"]
+
+    @pytest.mark.parametrize("job", ["build-and-push", "build-dev"])
+    def test_estargz_variant_uses_startup_record(self, workflow_file, job):
+        """The eStargz tag is converted with the recorded startup files prioritized."""
+        steps = yaml.safe_load(workflow_file.read_text())["jobs"][job]["steps"]
+        runs = "\n".join(s.get("run", "") for s in steps)
+        assert "tools.startup_record" in runs
+        assert "--estargz-record-in" in runs
+        assert "-estargz" in runs
@@ -0,0 +1,1056 @@
+"""Tests for the shared entrypoint helpers in lib/."""
+
+import os
+import re
+import subprocess
+import time
+
+from tools.pypi_stub import PyPIStub, make_wheel
+
+
+def run_bash(script, env=None):
+    """Run a bash snippet and return the completed process."""
+    return subprocess.run(["bash", "-c", script], capture_output=True, text=True, env=env)
+
+
+class TestUvLinkMode:
+    """Test uv link-mode detection."""
+
+    def test_same_filesystem_uses_links(self, lib_dir, tmp_path):
+        """Cache and target on one filesystem should use clone or hardlink."""
+        result = run_bash(
+            f'source "{lib_dir}/uv-link-mode.sh"; '
+            f'detect_uv_link_mode "{tmp_path}/cache" "{tmp_path}/venv"'
+        )
+        assert result.returncode == 0
+        mode = result.stdout.split(":")[0]
+        assert mode in ("clone", "hardlink"), result.stdout
+        assert list((tmp_path / "cache").iterdir()) == []
+        assert list((tmp_path / "venv").iterdir()) == []
+
+    def test_different_filesystems_use_copy(self, lib_dir, tmp_path):
+        """Cache and target on different filesystems should fall back to copy."""
+        result = run_bash(
+            f'source "{lib_dir}/uv-link-mode.sh"; '
+            'stat() { echo "$RANDOM$RANDOM"; }; '
+            f'detect_uv_link_mode "{tmp_path}/cache" "{tmp_path}/venv"'
+        )
+        assert result.stdout.startswith("copy: ")
+        assert "different filesystems" in result.stdout
+
+    def test_unwritable_cache_uses_copy(self, lib_dir, tmp_path):
+        """A cache the probe cannot write to should fall back to copy."""
+        result = run_bash(
+            f'source "{lib_dir}/uv-link-mode.sh"; '
+            'mktemp() { return 1; }; '
+            f'detect_uv_link_mode "{tmp_path}/cache" "{tmp_path}/venv"'
+        )
+        assert result.stdout.startswith("copy: ")
+
+    def test_entrypoints_respect_user_link_mode(self, entrypoint_path, entrypoint_dev_path):
+        """An explicit UV_LINK_MODE should bypass detection in both entrypoints."""
+        for path in (entrypoint_path, entrypoint_dev_path):
+            content = path.read_text()
+            assert 'if [ -n "$UV_LINK_MODE" ]; then' in content
+            assert "detect_uv_link_mode" in content
+            assert 'echo "uv link mode: ' in content
+
+    def test_dev_dockerfile_no_longer_hardcodes_copy(self, dockerfile_dev_path):
+        """gaia-dev should not force copy mode for every install."""
+        assert "ENV UV_LINK_MODE=copy" not in dockerfile_dev_path.read_text()
+
+
+class TestRuntimeEnv:
+    """Test sharing entrypoint settings with docker exec sessions."""
+
+    def test_exported_values_reach_later_shells(self, lib_dir, tmp_path):
+        """Values recorded by the entrypoint should be visible when the file is sourced."""
+        env_file = tmp_path / "runtime_env"
+        run_bash(
+            f'export GAIA_RUNTIME_ENV_FILE="{env_file}"; source "{lib_dir}/runtime-env.sh"; '
+            'runtime_env_reset; runtime_env_export UV_LINK_MODE hardlink'
+        )
+        result = run_bash(f'unset UV_LINK_MODE; source "{env_file}"; echo "$UV_LINK_MODE"')
+        assert result.stdout.strip() == "hardlink"
+
+    def test_explicit_values_win(self, lib_dir, tmp_path):
+        """A value set for the exec session should not be overwritten."""
+        env_file = tmp_path / "runtime_env"
+        run_bash(
+            f'export GAIA_RUNTIME_ENV_FILE="{env_file}"; source "{lib_dir}/runtime-env.sh"; '
+            'runtime_env_reset; runtime_env_export UV_LINK_MODE hardlink'
+        )
+        result = run_bash(f'export UV_LINK_MODE=copy; source "{env_file}"; echo "$UV_LINK_MODE"')
+        assert result.stdout.strip() == "copy"
+
+    def test_reset_clears_previous_start(self, lib_dir, tmp_path):
+        """Each container start should begin with an empty file."""
+        env_file = tmp_path / "runtime_env"
+        env_file.write_text('export STALE="${STALE-1}"\n')
+        run_bash(
+            f'export GAIA_RUNTIME_ENV_FILE="{env_file}"; source "{lib_dir}/runtime-env.sh"; '
+            'runtime_env_reset'
+        )
+        assert env_file.read_text() == ""
+
+
+class TestResourceLimits:
+    """Test cgroup-aware thread and uv concurrency defaults."""
+
+    def _apply(self, lib_dir, tmp_path, cpu_max="max 100000", memory_max="max",
+               host_cpus=64, extra=""):
+        cgroup = tmp_path / "cgroup"
+        cgroup.mkdir(exist_ok=True)
+        (cgroup / "cpu.max").write_text(cpu_max + "\n")
+        (cgroup / "memory.max").write_text(memory_max + "\n")
+        return run_bash(
+            f'export GAIA_CGROUP_ROOT="{cgroup}" GAIA_RUNTIME_ENV_FILE="{tmp_path}/env"; '
+            f'{extra} '
+            f'source "{lib_dir}/runtime-env.sh"; source "{lib_dir}/resource-limits.sh"; '
+            f'nproc() {{ echo {host_cpus}; }}; '
+            'apply_resource_defaults; env'
+        )
+
+    @staticmethod
+    def _env(result):
+        return dict(line.split("=", 1) for line in result.stdout.splitlines() if "=" in line)
+
+    def test_cpu_quota_limits_threads(self, lib_dir, tmp_path):
+        """A 4-CPU quota on a 64-core host should size thread pools to 4."""
+        env = self._env(self._apply(lib_dir, tmp_path, cpu_max="400000 100000"))
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+                    "RAYON_NUM_THREADS", "UV_CONCURRENT_INSTALLS", "GAIA_CPU_LIMIT"):
+            assert env[var] == "4", var
+        assert env["UV_CONCURRENT_DOWNLOADS"] == "16"
+        assert env["TOKENIZERS_PARALLELISM"] == "true"
+
+    def test_fractional_quota_rounds_up(self, lib_dir, tmp_path):
+        """--cpus 1.5 should allow two threads."""
+        env = self._env(self._apply(lib_dir, tmp_path, cpu_max="150000 100000"))
+        assert env["OMP_NUM_THREADS"] == "2"
+
+    def test_no_quota_uses_available_cpus(self, lib_dir, tmp_path):
+        """Without a quota, the CPUs the container may run on are used."""
+        env = self._env(self._apply(lib_dir, tmp_path, host_cpus=8))
+        assert env["OMP_NUM_THREADS"] == "8"
+        assert "GAIA_MEMORY_LIMIT" not in env
+
+    def test_single_cpu_disables_tokenizer_parallelism(self, lib_dir, tmp_path):
+        """One CPU should turn tokenizer parallelism off and keep a download floor."""
+        env = self._env(self._apply(lib_dir, tmp_path, cpu_max="50000 100000"))
+        assert env["OMP_NUM_THREADS"] == "1"
+        assert env["TOKENIZERS_PARALLELISM"] == "false"
+        assert env["UV_CONCURRENT_DOWNLOADS"] == "4"
+
+    def test_memory_limit_caps_builds(self, lib_dir, tmp_path):
+        """uv source builds should be capped at one per GiB of memory."""
+        env = self._env(self._apply(lib_dir, tmp_path, cpu_max="800000 100000",
+                                    memory_max=str(2 * 1024 ** 3)))
+        assert env["GAIA_MEMORY_LIMIT"] == str(2 * 1024 ** 3)
+        assert env["UV_CONCURRENT_BUILDS"] == "2"
+
+    def test_user_values_are_kept(self, lib_dir, tmp_path):
+        """Explicitly set variables should not be overridden."""
+        result = self._apply(lib_dir, tmp_path, cpu_max="400000 100000",
+                             extra="export OMP_NUM_THREADS=1;")
+        env = self._env(result)
+        assert env["OMP_NUM_THREADS"] == "1"
+        assert env["MKL_NUM_THREADS"] == "4"
+        assert "User-set (kept): OMP_NUM_THREADS=1" in result.stdout
+
+    def test_entrypoints_apply_defaults(self, entrypoint_path, entrypoint_dev_path):
+        """Both entrypoints should apply the defaults unless GAIA_AUTOTUNE=false."""
+        for path in (entrypoint_path, entrypoint_dev_path):
+            content = path.read_text()
+            assert 'if [ "${GAIA_AUTOTUNE:-true}" = "true" ]; then' in content
+            assert "apply_resource_defaults" in content
+
+    def test_uv_settings_survive_sudo(self, entrypoint_path):
+        """gaia-linux runs uv through sudo, which must keep the uv concurrency settings."""
+        content = entrypoint_path.read_text()
+        assert "UV_CONCURRENT_DOWNLOADS" in content
+        assert 'sudo --preserve-env="$UV_SUDO_ENV"' in content
+
+
+class TestAllocator:
+    """Test GAIA_ALLOCATOR selection."""
+
+    def _configure(self, lib_dir, tmp_path, allocator, extra=""):
+        jemalloc = tmp_path / "libjemalloc.so.2"
+        jemalloc.write_text("")
+        return run_bash(
+            f'export GAIA_RUNTIME_ENV_FILE="{tmp_path}/env" GAIA_JEMALLOC_LIB="{jemalloc}" '
+            f'GAIA_ALLOCATOR={allocator} GAIA_CPU_LIMIT=4; unset LD_PRELOAD MALLOC_CONF '
+            f'MALLOC_ARENA_MAX; {extra} '
+            f'source "{lib_dir}/runtime-env.sh"; source "{lib_dir}/allocator.sh"; '
+            'configure_allocator && env'
+        )
+
+    @staticmethod
+    def _env(result):
+        return dict(line.split("=", 1) for line in result.stdout.splitlines() if "=" in line)
+
+    def test_glibc_is_untouched(self, lib_dir, tmp_path):
+        """The default should not change malloc."""
+        env = self._env(self._configure(lib_dir, tmp_path, "glibc"))
+        assert "LD_PRELOAD" not in env
+        assert "MALLOC_ARENA_MAX" not in env
+
+    def test_glibc_arenas_limits_arenas(self, lib_dir, tmp_path):
+        """glibc-arenas should cap the arena count."""
+        env = self._env(self._configure(lib_dir, tmp_path, "glibc-arenas"))
+        assert env["MALLOC_ARENA_MAX"] == "2"
+        assert "LD_PRELOAD" not in env
+
+    def test_jemalloc_is_preloaded(self, lib_dir, tmp_path):
+        """jemalloc should be preloaded with one arena per available CPU."""
+        env = self._env(self._configure(lib_dir, tmp_path, "jemalloc"))
+        assert env["LD_PRELOAD"] == str(tmp_path / "libjemalloc.so.2")
+        assert "narenas:4" in env["MALLOC_CONF"]
+        assert "LD_PRELOAD" in (tmp_path / "env").read_text()
+
+    def test_jemalloc_keeps_user_settings(self, lib_dir, tmp_path):
+        """An existing LD_PRELOAD and MALLOC_CONF should be kept."""
+        env = self._env(self._configure(
+            lib_dir, tmp_path, "jemalloc",
+            extra="export LD_PRELOAD=/lib/other.so MALLOC_CONF=narenas:1;"))
+        assert env["LD_PRELOAD"] == f"{tmp_path / 'libjemalloc.so.2'}:/lib/other.so"
+        assert env["MALLOC_CONF"] == "narenas:1"
+
+    def test_missing_jemalloc_falls_back(self, lib_dir, tmp_path):
+        """Without the library the container should start with glibc malloc."""
+        result = self._configure(lib_dir, tmp_path, "jemalloc",
+                                 extra=f'export GAIA_JEMALLOC_LIB="{tmp_path}/missing.so";')
+        assert result.returncode == 0
+        assert "Warning:" in result.stdout
+        assert "LD_PRELOAD" not in self._env(result)
+
+    def test_invalid_allocator_fails(self, lib_dir, tmp_path):
+        """An unknown allocator should be rejected."""
+        result = self._configure(lib_dir, tmp_path, "tcmalloc")
+        assert result.returncode != 0
+        assert "Invalid GAIA_ALLOCATOR" in result.stdout
+
+    def test_images_ship_jemalloc(self, dockerfile_path, dockerfile_dev_path):
+        """Both images should install jemalloc and configure it at startup."""
+        for path in (dockerfile_path, dockerfile_dev_path):
+            assert "libjemalloc2" in path.read_text()
+
+
+class TestSupervisor:
+    """Test the GAIA_MODE=serve worker supervisor."""
+
+    def _supervise(self, lib_dir, tmp_path, count, command, stop_after, backoff=1):
+        log = tmp_path / "workers.log"
+        script = (
+            f'set -e; export GAIA_WORKER_BACKOFF={backoff} GAIA_SHUTDOWN_TIMEOUT=1 LOG="{log}"; '
+            f'source "{lib_dir}/supervisor.sh"; '
+            f'(sleep {stop_after}; kill -TERM $$) & '
+            f"supervise_workers {count} '{command}'; echo supervisor-exit=$?"
+        )
+        # Output goes to a file: workers' orphaned children may keep a pipe open
+        with open(tmp_path / "supervisor.out", "w") as out:
+            subprocess.run(["bash", "-c", script], stdout=out, stderr=subprocess.STDOUT,
+                           timeout=30)
+        lines = log.read_text().splitlines() if log.exists() else []
+        return (tmp_path / "supervisor.out").read_text(), lines
+
+    def test_workers_get_ids_and_ports(self, lib_dir, tmp_path):
+        """Each worker should see its own id and port."""
+        output, lines = self._supervise(
+            lib_dir, tmp_path, 3,
+            'echo "$GAIA_WORKER_ID $GAIA_WORKER_PORT" >> "$LOG"; exec sleep 30', 1)
+        assert sorted(lines) == ["0 8765", "1 8766", "2 8767"]
+        assert "supervisor-exit=0" in output
+
+    def test_failed_worker_restarts_with_backoff(self, lib_dir, tmp_path):
+        """A crashing worker should restart after 1s, then 2s, ..."""
+        output, lines = self._supervise(
+            lib_dir, tmp_path, 1, 'echo start >> "$LOG"; exit 3', 3.5)
+        assert lines == ["start"] * 3
+        assert "restarting in 1s" in output
+        assert "restarting in 2s" in output
+
+    def test_backoff_does_not_hold_up_other_workers(self, lib_dir, tmp_path):
+        """A worker waiting out its backoff should not delay restarting another."""
+        # Worker 0 crash-loops (restarts at 2s, then 6s); worker 1 exits once
+        # at 0.5s and is due again at 2.5s, while worker 0 is still backing off
+        output, lines = self._supervise(
+            lib_dir, tmp_path, 2,
+            'echo "$GAIA_WORKER_ID" >> "$LOG"; [ "$GAIA_WORKER_ID" = 0 ] && exit 1; '
+            'if [ -e "$LOG.once" ]; then exec sleep 30; fi; touch "$LOG.once"; sleep 0.5; exit 1',
+            3.5, backoff=2)
+        assert lines.count("1") == 2, output
+        assert lines.count("0") == 2, output
+
+    def test_stop_is_graceful(self, lib_dir, tmp_path):
+        """Workers should receive SIGTERM and be allowed to clean up."""
+        output, lines = self._supervise(
+            lib_dir, tmp_path, 2,
+            'trap "echo cleaned >> \\"\\$LOG\\"; exit 0" TERM; sleep 30 & wait', 1)
+        assert lines == ["cleaned", "cleaned"]
+        assert "all workers stopped" in output
+
+    def test_unresponsive_worker_is_killed(self, lib_dir, tmp_path):
+        """Workers ignoring SIGTERM should be killed after the shutdown timeout."""
+        import time
+        start = time.monotonic()
+        output, _ = self._supervise(lib_dir, tmp_path, 1, 'trap "" TERM; sleep 30', 1)
+        assert "did not exit within 1s, killing" in output
+        assert time.monotonic() - start < 10
+
+    def test_invalid_worker_count_is_rejected(self, lib_dir, tmp_path):
+        """A count that is not a positive integer should fail instead of spinning."""
+        for count in ("0", "-1", "two", "''"):
+            result = subprocess.run(
+                ["bash", "-c", f'source "{lib_dir}/supervisor.sh"; '
+                               f"supervise_workers {count} 'exit 0'; echo supervisor-exit=$?"],
+                capture_output=True, text=True, timeout=10,
+            )
+            assert "invalid worker count" in result.stdout
+            assert "supervisor-exit=1" in result.stdout
+
+    def test_entrypoint_supports_serve_mode(self, entrypoint_path):
+        """The gaia-linux entrypoint should validate GAIA_MODE and GAIA_WORKERS and start the supervisor."""
+        content = entrypoint_path.read_text()
+        assert 'GAIA_MODE="${GAIA_MODE:-shell}"' in content
+        assert "Invalid GAIA_MODE" in content
+        assert "Invalid GAIA_WORKERS" in content
+        assert 'supervise_workers "$GAIA_WORKERS" "$GAIA_SERVE_COMMAND"' in content
+
+    def test_dev_entrypoint_has_no_serve_mode(self, entrypoint_dev_path):
+        """gaia-dev has no GAIA installed until the editable install, so it cannot serve."""
+        assert "supervise_workers" not in entrypoint_dev_path.read_text()
+
+
+class TestLatestVersion:
+    """Test caching of the resolved latest GAIA version."""
+
+    def _run(self, lib_dir, tmp_path, body, ttl=3600):
+        return run_bash(
+            f'unset UV_DEFAULT_INDEX UV_INDEX_URL; '
+            f'export GAIA_STATE_DIR="{tmp_path}/state" GAIA_LATEST_TTL={ttl} '
+            f'GAIA_PYPI_JSON_URL="file://{tmp_path}/pypi.json"; '
+            f'source "{lib_dir}/latest-version.sh"; {body}'
+        )
+
+    def _write_cache(self, tmp_path, version, age):
+        import time
+        state = tmp_path / "state"
+        state.mkdir(exist_ok=True)
+        (state / "latest-version").write_text(f"{version} {int(time.time()) - age}\n")
+
+    def test_fresh_cache_is_used(self, lib_dir, tmp_path):
+        """A version resolved within the TTL should be returned with its age."""
+        self._write_cache(tmp_path, "0.15.1", 60)
+        result = self._run(lib_dir, tmp_path, "cached_latest_version")
+        version, age = result.stdout.split()
+        assert version == "0.15.1"
+        assert 60 <= int(age) < 70
+
+    def test_expired_cache_is_ignored(self, lib_dir, tmp_path):
+        """A version older than the TTL should not be used."""
+        self._write_cache(tmp_path, "0.15.1", 7200)
+        result = self._run(lib_dir, tmp_path, "cached_latest_version")
+        assert result.returncode != 0
+        assert result.stdout == ""
+
+    def test_zero_ttl_disables_cache(self, lib_dir, tmp_path):
+        """GAIA_LATEST_TTL=0 should always resolve again."""
+        self._write_cache(tmp_path, "0.15.1", 0)
+        result = self._run(lib_dir, tmp_path, "cached_latest_version", ttl=0)
+        assert result.returncode != 0
+
+    def test_save_then_read(self, lib_dir, tmp_path):
+        """A saved version should be read back as fresh."""
+        result = self._run(lib_dir, tmp_path,
+                           "save_latest_version 0.16.0 && cached_latest_version")
+        assert result.stdout.split()[0] == "0.16.0"
+
+    def test_resolve_reads_pypi_metadata(self, lib_dir, tmp_path):
+        """The latest version should come from the package index JSON."""
+        (tmp_path / "pypi.json").write_text('{"info": {"version": "0.16.2"}}')
+        result = self._run(lib_dir, tmp_path, "resolve_latest_version")
+        assert result.stdout.strip() == "0.16.2"
+
+    def test_resolve_reads_configured_index(self, lib_dir, tmp_path):
+        """With a mirror configured, the newest final release on its project page wins."""
+        dists = tmp_path / "dists"
+        dists.mkdir()
+        for version in ("0.9.0", "0.16.2", "0.17.0rc1"):
+            make_wheel(dists, "amd-gaia", version)
+        (tmp_path / "pypi.json").write_text('{"info": {"version": "9.9.9"}}')
+        with PyPIStub(dists) as stub:
+            for variable in ("UV_DEFAULT_INDEX", "UV_INDEX_URL"):
+                result = self._run(lib_dir, tmp_path,
+                                   f"{variable}={stub.index_url()}/ resolve_latest_version")
+                assert result.stdout.strip() == "0.16.2"
+
+    def test_resolve_fails_when_index_unreachable(self, lib_dir, tmp_path):
+        """An unreachable index should fail quietly so the entrypoint can fall back."""
+        result = self._run(lib_dir, tmp_path, "resolve_latest_version")
+        assert result.returncode != 0
+        assert result.stdout == ""
+
+    def test_resolve_runs_on_ubuntu_python(self, lib_dir):
+        """The helper calls /usr/bin/python3, not the uv interpreter first on PATH."""
+        content = (lib_dir / "latest-version.sh").read_text()
+        assert content.count("/usr/bin/python3 -c") == 2
+        assert "\n    python3 " not in content and "\n        python3 " not in content
+
+    def test_entrypoint_uses_cache(self, entrypoint_path):
+        """gaia-linux should reuse the cached version and log where it came from."""
+        content = entrypoint_path.read_text()
+        assert "cached_latest_version" in content
+        assert "(refreshed from ${UV_DEFAULT_INDEX:-${UV_INDEX_URL:-PyPI}})" in content
+        assert 'save_latest_version "$INSTALLED_VERSION"' in content
+
+
+class TestRetry:
+    """Test bounded install retries."""
+
+    def _retry(self, lib_dir, tmp_path, command, permanent="", **settings):
+        env = {"GAIA_INSTALL_BACKOFF": "0", "GAIA_INSTALL_ATTEMPTS": "4",
+               "GAIA_INSTALL_DEADLINE": "60", **settings}
+        exports = " ".join(f"{k}={v}" for k, v in env.items())
+        return run_bash(
+            f'export {exports} COUNT="{tmp_path}/count"; source "{lib_dir}/retry.sh"; '
+            f"retry_command '{permanent}' bash -c '{command}'; echo status=$?"
+        )
+
+    @staticmethod
+    def _attempts(tmp_path):
+        count = tmp_path / "count"
+        return len(count.read_text().splitlines()) if count.exists() else 0
+
+    def test_transient_failure_is_retried(self, lib_dir, tmp_path):
+        """A command that fails twice should succeed on the third attempt."""
+        result = self._retry(lib_dir, tmp_path,
+                             'echo x >> "$COUNT"; [ $(wc -l < "$COUNT") -ge 3 ]')
+        assert self._attempts(tmp_path) == 3
+        assert "status=0" in result.stdout
+        assert "Attempt 2/4 failed (exit 1)" in result.stdout
+
+    def test_attempts_are_bounded(self, lib_dir, tmp_path):
+        """A command that keeps failing should stop after GAIA_INSTALL_ATTEMPTS."""
+        result = self._retry(lib_dir, tmp_path, 'echo x >> "$COUNT"; exit 7',
+                             GAIA_INSTALL_ATTEMPTS="3")
+        assert self._attempts(tmp_path) == 3
+        assert "Giving up after 3 attempts" in result.stdout
+        assert "status=7" in result.stdout
+
+    def test_permanent_error_is_not_retried(self, lib_dir, tmp_path):
+        """Output matching the permanent pattern should fail immediately."""
+        result = self._retry(lib_dir, tmp_path,
+                             'echo x >> "$COUNT"; echo "No solution found when resolving"; exit 1',
+                             permanent="No solution found")
+        assert self._attempts(tmp_path) == 1
+        assert "Not retrying" in result.stdout
+
+    def test_deadline_stops_a_hanging_attempt(self, lib_dir, tmp_path):
+        """An attempt that outlives the deadline should be stopped."""
+        import time
+        start = time.monotonic()
+        result = self._retry(lib_dir, tmp_path, 'echo x >> "$COUNT"; sleep 30',
+                             GAIA_INSTALL_DEADLINE="2")
+        assert time.monotonic() - start < 10
+        assert "deadline of 2s exceeded" in result.stdout
+        assert "status=124" in result.stdout
+
+    def test_invalid_deadline_is_rejected(self, lib_dir, tmp_path):
+        """A deadline of 0 would disable timeout, so it must be a positive integer."""
+        for deadline in ("0", "-5", "15m", "1.5"):
+            result = self._retry(lib_dir, tmp_path, 'echo x >> "$COUNT"',
+                                 GAIA_INSTALL_DEADLINE=deadline)
+            assert "ERROR: Invalid GAIA_INSTALL_DEADLINE" in result.stdout
+            assert "status=2" in result.stdout
+        assert self._attempts(tmp_path) == 0
+
+    def test_backoff_grows_with_jitter(self, lib_dir, tmp_path):
+        """Delays should double per attempt and stay within [delay/2, delay]."""
+        result = run_bash(
+            f'source "{lib_dir}/retry.sh"; GAIA_INSTALL_BACKOFF=4 GAIA_INSTALL_ATTEMPTS=3; '
+            'sleep() { :; }; retry_command "" false'
+        )
+        delays = [int(line.split("retrying in ")[1].rstrip("s..."))
+                  for line in result.stdout.splitlines() if "retrying in" in line]
+        assert len(delays) == 2
+        assert 2 <= delays[0] <= 4
+        assert 4 <= delays[1] <= 8
+
+    def test_entrypoint_retries_install(self, entrypoint_path):
+        """gaia-linux should retry the uv install and keep index settings through sudo."""
+        content = entrypoint_path.read_text()
+        assert ('sudo --preserve-env="$UV_SUDO_ENV" GAIA_INSTALL_LOCK_DIR="$GAIA_UV_CACHE_DIR" \\\n'
+                '            bash /usr/local/lib/gaia/install-lock.sh \\\n'
+                '            bash /usr/local/lib/gaia/retry.sh "$UV_PERMANENT_ERRORS"') in content
+        assert "UV_DEFAULT_INDEX" in content
+        assert "GAIA_INSTALL_DEADLINE" in content
+
+    def test_runs_as_script(self, lib_dir, tmp_path):
+        """retry.sh should also work as a command wrapper, e.g. under sudo."""
+        result = run_bash(
+            f'GAIA_INSTALL_BACKOFF=0 COUNT="{tmp_path}/count" bash "{lib_dir}/retry.sh" "" '
+            'bash -c \'echo x >> "$COUNT"; [ $(wc -l < "$COUNT") -ge 2 ]\''
+        )
+        assert result.returncode == 0
+        assert self._attempts(tmp_path) == 2
+
+
+class TestInstallLock:
+    """Test single-flight installs into a shared cache."""
+
+    # Stands in for uv: "downloads" (slowly) only what is not in the cache yet
+    INSTALL = ('if [ ! -e "$CACHE/pkg" ]; then sleep 1; echo x >> "$CACHE/downloads"; '
+               'touch "$CACHE/pkg"; fi; echo installed')
+
+    def _start(self, lib_dir, cache, command=None, **settings):
+        env = {**os.environ, "CACHE": str(cache), "GAIA_INSTALL_LOCK_DIR": str(cache),
+               "GAIA_INSTALL_LOCK_POLL": "1", **settings}
+        return subprocess.Popen(["bash", str(lib_dir / "install-lock.sh"), "bash", "-c", command or self.INSTALL],
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
+
+    def _hold_lock(self, cache, heartbeat_age=0):
+        """A process holding the lock, with an owner record HEARTBEAT_AGE seconds old."""
+        owner = cache / ".gaia-install.owner"
+        owner.write_text(f"other-container 4242 {int(time.time()) - heartbeat_age}\n")
+        os.utime(owner, (time.time() - heartbeat_age,) * 2)
+        holder = subprocess.Popen(["bash", "-c", 'exec 9>>"$0"; flock 9; exec sleep 30',
+                                   str(cache / ".gaia-install.lock")])
+        time.sleep(0.3)
+        return holder
+
+    def test_concurrent_installs_download_once(self, lib_dir, tmp_path):
+        """Of five concurrent installs, one downloads and the others reuse its cache."""
+        procs = [self._start(lib_dir, tmp_path) for _ in range(5)]
+        outputs = [proc.communicate(timeout=30)[0] for proc in procs]
+        assert all(proc.returncode == 0 for proc in procs), outputs
+        assert (tmp_path / "downloads").read_text().splitlines() == ["x"]
+        assert sum("Holding the install lock" in out for out in outputs) == 1
+        assert sum("Installing from the shared cache filled by another container" in out
+                   for out in outputs) == 4
+        assert not (tmp_path / ".gaia-install.owner").exists()
+
+    def test_completed_install_skips_the_lock(self, lib_dir, tmp_path):
+        """Once an install succeeded, the same install runs without waiting."""
+        assert self._start(lib_dir, tmp_path).wait(timeout=30) == 0
+        holder = self._hold_lock(tmp_path)
+        try:
+            out = self._start(lib_dir, tmp_path).communicate(timeout=10)[0]
+        finally:
+            holder.kill()
+        assert out.strip() == "installed"
+
+    def test_failed_install_hands_over(self, lib_dir, tmp_path):
+        """A failed install is not recorded: the next container installs itself."""
+        failing = self._start(lib_dir, tmp_path, command="exit 3")
+        assert failing.wait(timeout=30) == 3
+        out = self._start(lib_dir, tmp_path).communicate(timeout=30)[0]
+        assert "Holding the install lock" in out
+        assert (tmp_path / "downloads").exists()
+
+    def test_dead_owner_releases_the_lock(self, lib_dir, tmp_path):
+        """When the owner dies the kernel drops its lock and a waiter takes over."""
+        holder = self._hold_lock(tmp_path)
+        waiter = self._start(lib_dir, tmp_path)
+        time.sleep(1.5)
+        holder.kill()
+        out = waiter.communicate(timeout=30)[0]
+        assert waiter.returncode == 0
+        assert "Waiting for the install in other-container (pid 4242" in out
+        assert "Holding the install lock" in out
+
+    def test_stale_owner_is_skipped(self, lib_dir, tmp_path):
+        """An owner without a recent heartbeat is not waited for."""
+        holder = self._hold_lock(tmp_path, heartbeat_age=300)
+        try:
+            out = self._start(lib_dir, tmp_path, GAIA_INSTALL_LOCK_STALE="60").communicate(timeout=30)[0]
+        finally:
+            holder.kill()
+        assert "Install lock owner other-container (pid 4242, started 30" in out
+        assert "(GAIA_INSTALL_LOCK_STALE=60), installing without the lock" in out
+        assert out.rstrip().endswith("installed")
+
+    def test_disabled(self, lib_dir, tmp_path):
+        out = self._start(lib_dir, tmp_path, GAIA_INSTALL_LOCK="false").communicate(timeout=30)[0]
+        assert out.strip() == "installed"
+        assert not (tmp_path / ".gaia-install.lock").exists()
+
+
+class TestPrefetch:
+    """Test model and asset prefetch."""
+
+    def _run(self, lib_dir, tmp_path, body, extra=""):
+        fake = tmp_path / "fake"
+        fake.mkdir(exist_ok=True)
+        (fake / "huggingface_hub.py").write_text(
+            "import os\n"
+            "def snapshot_download(repo_id, revision=None):\n"
+            "    if repo_id == 'broken/model':\n"
+            "        raise OSError('offline')\n"
+            "    with open(os.environ['FETCH_LOG'], 'a') as log:\n"
+            "        log.write(f'{repo_id} {revision}\\n')\n"
+        )
+        return run_bash(
+            f'export GAIA_RUNTIME_ENV_FILE="{tmp_path}/env" GAIA_MODEL_CACHE="{tmp_path}/cache" '
+            f'PYTHONPATH="{fake}" FETCH_LOG="{tmp_path}/fetch.log"; '
+            'unset HF_HOME HF_HUB_CACHE SENTENCE_TRANSFORMERS_HOME TORCH_HOME TIKTOKEN_CACHE_DIR NLTK_DATA; '
+            f'{extra} source "{lib_dir}/runtime-env.sh"; source "{lib_dir}/prefetch.sh"; {body}'
+        )
+
+    def _fetched(self, tmp_path):
+        log = tmp_path / "fetch.log"
+        return log.read_text().splitlines() if log.exists() else []
+
+    def test_cache_variables_point_at_volume(self, lib_dir, tmp_path):
+        """Standard cache variables should point into GAIA_MODEL_CACHE."""
+        result = self._run(lib_dir, tmp_path, "configure_model_cache; env")
+        assert f"HF_HUB_CACHE={tmp_path}/cache/huggingface/hub" in result.stdout
+        assert f"TIKTOKEN_CACHE_DIR={tmp_path}/cache/tiktoken" in result.stdout
+        assert "HF_HUB_CACHE" in (tmp_path / "env").read_text()
+
+    def test_user_cache_location_is_kept(self, lib_dir, tmp_path):
+        """A cache location set by the user should not be replaced."""
+        result = self._run(lib_dir, tmp_path, "configure_model_cache; env",
+                           extra="export TORCH_HOME=/models/torch;")
+        assert "TORCH_HOME=/models/torch" in result.stdout
+
+    def test_hf_home_keeps_its_hub_cache(self, lib_dir, tmp_path):
+        """With HF_HOME set the hub cache should stay under it ($HF_HOME/hub)."""
+        result = self._run(lib_dir, tmp_path, "configure_model_cache; env",
+                           extra="export HF_HOME=/models/hf;")
+        assert "HF_HOME=/models/hf" in result.stdout
+        assert "HF_HUB_CACHE" not in result.stdout
+        assert "HF_HUB_CACHE" not in (tmp_path / "env").read_text()
+        assert f"TORCH_HOME={tmp_path}/cache/torch" in result.stdout
+
+    def test_prefetch_downloads_once(self, lib_dir, tmp_path):
+        """A warm cache should skip identifiers fetched before."""
+        body = ('GAIA_PREFETCH="org/embedder, hf:org/tokenizer@v2"; '
+                'prefetch_assets python3')
+        first = self._run(lib_dir, tmp_path, body)
+        second = self._run(lib_dir, tmp_path, body)
+        assert self._fetched(tmp_path) == ["org/embedder None", "org/tokenizer v2"]
+        assert "Prefetch complete" in first.stdout
+        assert second.stdout.count(": cached") == 2
+
+    def test_failed_prefetch_does_not_block_startup(self, lib_dir, tmp_path):
+        """A failed download should warn, keep going and be retried next start."""
+        body = 'GAIA_PREFETCH="broken/model org/ok"; prefetch_assets python3'
+        result = self._run(lib_dir, tmp_path, body)
+        assert result.returncode == 0
+        assert "broken/model: FAILED" in result.stdout
+        assert "Warning: Prefetch incomplete" in result.stdout
+        assert self._fetched(tmp_path) == ["org/ok None"]
+        again = self._run(lib_dir, tmp_path, body)
+        assert "broken/model: FAILED" in again.stdout
+
+    def test_nothing_to_prefetch(self, lib_dir, tmp_path):
+        """Without GAIA_PREFETCH nothing should run."""
+        result = self._run(lib_dir, tmp_path, 'GAIA_PREFETCH=""; prefetch_assets python3')
+        assert result.stdout == ""
+
+    def test_entrypoints_prefetch_before_ready(self, entrypoint_path, entrypoint_dev_path):
+        """Both entrypoints should prefetch before printing the ready banner."""
+        for path in (entrypoint_path, entrypoint_dev_path):
+            content = path.read_text()
+            assert "configure_model_cache" in content
+            assert content.index("prefetch_assets") < content.index("=== Ready ===")
+
+
+class TestStartupHooks:
+    """Test the /etc/gaia/startup.d hook runner."""
+
+    def _hook(self, directory, name, body, executable=True):
+        path = directory / name
+        path.write_text(("#!/bin/bash\n" if executable else "") + body + "\n")
+        if executable:
+            path.chmod(0o755)
+        return path
+
+    def _run(self, lib_dir, directory, extra=""):
+        return run_bash(f'{extra} source "{lib_dir}/startup-hooks.sh"; '
+                        f'run_startup_hooks "{directory}"; echo status=$?')
+
+    def test_same_stage_runs_concurrently(self, lib_dir, tmp_path):
+        """Hooks sharing a prefix should overlap instead of running one after another."""
+        import time
+        for name in ("10-a", "10-b", "10-c"):
+            self._hook(tmp_path, name, "sleep 1")
+        start = time.monotonic()
+        result = self._run(lib_dir, tmp_path)
+        assert time.monotonic() - start < 2.5
+        assert "status=0" in result.stdout
+        for name in ("10-a", "10-b", "10-c"):
+            assert f"Hook {name}: ok in 1." in result.stdout
+
+    def test_stages_run_in_numeric_order(self, lib_dir, tmp_path):
+        """A later stage should start only after the earlier stage finished."""
+        log = tmp_path / "order.log"
+        self._hook(tmp_path, "9-first", f'sleep 0.5; echo first >> "{log}"')
+        self._hook(tmp_path, "10-second", f'echo second >> "{log}"')
+        self._hook(tmp_path, "unnumbered", f'echo unnumbered >> "{log}"')
+        self._hook(tmp_path, "90-last", f'echo last >> "{log}"')
+        self._run(lib_dir, tmp_path)
+        assert log.read_text().split() == ["first", "second", "unnumbered", "last"]
+
+    def test_output_is_prefixed(self, lib_dir, tmp_path):
+        """Hook output should be attributed to the hook."""
+        self._hook(tmp_path, "20-warmup.sh", "echo warming", executable=False)
+        result = self._run(lib_dir, tmp_path)
+        assert "[20-warmup.sh] warming" in result.stdout
+
+    def test_non_executable_files_are_skipped(self, lib_dir, tmp_path):
+        """Files that are neither executable nor *.sh should be ignored."""
+        (tmp_path / "README").write_text("docs")
+        result = self._run(lib_dir, tmp_path)
+        assert "Skipping hook README" in result.stdout
+        assert "status=0" in result.stdout
+
+    def test_failure_fails_startup(self, lib_dir, tmp_path):
+        """A failing hook should be reported and fail the run."""
+        self._hook(tmp_path, "10-ok", "true")
+        self._hook(tmp_path, "10-bad", "exit 3")
+        result = self._run(lib_dir, tmp_path)
+        assert "Hook 10-bad: FAILED (exit 3)" in result.stdout
+        assert "ERROR: 1 startup hook(s) failed" in result.stdout
+        assert "status=1" in result.stdout
+
+    def test_per_hook_timeout(self, lib_dir, tmp_path):
+        """A gaia-timeout line should override the default timeout."""
+        self._hook(tmp_path, "slow", "# gaia-timeout: 1\nsleep 10")
+        result = self._run(lib_dir, tmp_path, extra="GAIA_HOOK_TIMEOUT=60;")
+        assert "Hook slow: TIMED OUT after 1s" in result.stdout
+        assert "status=1" in result.stdout
+
+    def test_missing_directory_is_fine(self, lib_dir, tmp_path):
+        """No hook directory should mean no hooks."""
+        result = self._run(lib_dir, tmp_path / "missing")
+        assert result.stdout.strip() == "status=0"
+
+    def test_entrypoints_run_hooks_before_ready(self, entrypoint_path, entrypoint_dev_path):
+        """Both entrypoints should run the hooks before printing the ready banner."""
+        for path in (entrypoint_path, entrypoint_dev_path):
+            content = path.read_text()
+            assert content.index("run_startup_hooks") < content.index("=== Ready ===")
+
+
+class TestGitMaintenance:
+    """Test background git maintenance for the gaia-dev source volume."""
+
+    def _env(self, tmp_path):
+        import os
+        return {**os.environ, "HOME": str(tmp_path / "home"),
+                "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@example.com",
+                "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@example.com"}
+
+    def _repos(self, tmp_path):
+        """An origin with one commit and a clone that is one commit behind."""
+        env = self._env(tmp_path)
+        origin, clone = tmp_path / "origin", tmp_path / "clone"
+        run_bash(f'git init -q "{origin}" && cd "{origin}" && git commit -q --allow-empty -m one '
+                 f'&& git clone -q --no-local "{origin}" "{clone}" '
+                 f'&& git commit -q --allow-empty -m two', env=env)
+        return origin, clone, env
+
+    def _wait_for_log(self, log, text, timeout=30):
+        import time
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if log.exists() and text in log.read_text():
+                return log.read_text()
+            time.sleep(0.1)
+        raise AssertionError(f"{text!r} not in log: {log.read_text() if log.exists() else ''}")
+
+    def test_configure_registers_incremental_strategy(self, lib_dir, tmp_path):
+        """The repository gets git maintenance's incremental setup."""
+        _, clone, env = self._repos(tmp_path)
+        result = run_bash(f'source "{lib_dir}/git-maintenance.sh"; '
+                          f'configure_git_maintenance "{clone}" && git -C "{clone}" config --list',
+                          env=env)
+        assert result.returncode == 0, result.stderr
+        assert "maintenance.strategy=incremental" in result.stdout
+        assert "maintenance.auto=false" in result.stdout
+        assert "fetch.writecommitgraph=true" in result.stdout
+
+    def test_background_run_fetches_and_writes_commit_graph(self, lib_dir, tmp_path):
+        """A one-off run fetches origin and writes a commit-graph without blocking startup."""
+        import time
+        _, clone, env = self._repos(tmp_path)
+        log = tmp_path / "maintenance.log"
+        run_bash(f'git -C "{clone}" config core.untrackedCache false', env=env)
+        start = time.monotonic()
+        result = run_bash(
+            f'export GAIA_GIT_FETCH=true GAIA_GIT_MAINTENANCE_INTERVAL=0 GAIA_GIT_MAINTENANCE_LOG="{log}"; '
+            f'source "{lib_dir}/git-maintenance.sh"; start_git_maintenance "{clone}"; wait; echo started',
+            env=env,
+        )
+        assert "started" in result.stdout
+        assert time.monotonic() - start < 2
+        text = self._wait_for_log(log, "git maintenance finished")
+        assert "git fetch origin" in text
+        assert "--task=prefetch" in text
+        assert "Testing mtime" not in text
+        fetched = run_bash(f'git -C "{clone}" log --oneline origin/HEAD', env=env).stdout
+        assert "two" in fetched
+        objects = clone / ".git" / "objects" / "info"
+        assert (objects / "commit-graph").exists() or (objects / "commit-graphs").exists()
+
+    def test_foreign_owned_repository_does_not_stop_startup(self, lib_dir, tmp_path):
+        """A repository git refuses ("dubious ownership") only gets warnings under set -e."""
+        _, clone, env = self._repos(tmp_path)
+        if os.getuid() == 0:
+            subprocess.run(["chown", "-R", "12345:12345", str(clone)], check=True)
+        else:
+            env["GIT_TEST_ASSUME_DIFFERENT_OWNER"] = "1"
+        log = tmp_path / "maintenance.log"
+        result = run_bash(
+            f'set -e; export GAIA_GIT_MAINTENANCE_LOG="{log}"; source "{lib_dir}/git-maintenance.sh"; '
+            f'configure_git_maintenance "{clone}"; start_git_maintenance "{clone}"; echo still-starting',
+            env=env,
+        )
+        assert result.returncode == 0, result.stderr
+        assert "still-starting" in result.stdout
+        assert "WARNING: Cannot configure git maintenance" in result.stderr
+        assert "WARNING: Not running git maintenance" in result.stderr
+        assert "running in the background" not in result.stdout
+        assert not log.exists()
+
+    def test_fetch_is_optional(self, lib_dir, tmp_path):
+        """Without GAIA_GIT_FETCH the remote-tracking refs are left alone."""
+        _, clone, env = self._repos(tmp_path)
+        log = tmp_path / "maintenance.log"
+        run_bash(f'git -C "{clone}" config core.untrackedCache false', env=env)
+        run_bash(f'export GAIA_GIT_MAINTENANCE_INTERVAL=0 GAIA_GIT_MAINTENANCE_LOG="{log}"; '
+                 f'source "{lib_dir}/git-maintenance.sh"; start_git_maintenance "{clone}"', env=env)
+        text = self._wait_for_log(log, "git maintenance finished")
+        assert "git fetch origin" not in text
+        fetched = run_bash(f'git -C "{clone}" log --oneline origin/HEAD', env=env).stdout
+        assert "two" not in fetched
+
+
+class TestFirewall:
+    """Test the ipset-backed egress allowlist for gaia-dev."""
+
+    def _run(self, lib_dir, tmp_path, body, extra=""):
+        """Run BODY with fake dig, getent, aggregate, ipset and iptables on PATH."""
+        import os
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir(exist_ok=True)
+        log = tmp_path / "calls.log"
+        fakes = {
+            # api.example.com and cdn.example.com share a /31
+            "dig": 'sleep 0.5; name="${@: -1}"; n="${name%%.*}"; case "$name" in '
+                   'api.example.com) echo alias.example.net.; echo 203.0.113.4;; '
+                   'cdn.example.com) echo 203.0.113.5;; '
+                   'dns[0-9]*.example.com) echo "198.51.100.${n#dns}";; '
+                   'lemonade.example.com) echo 192.0.2.10;; esac',
+            "getent": '[ "$2" = host.docker.internal ] && echo "172.17.0.1 STREAM host.docker.internal"; true',
+            "aggregate": 'echo aggregate >> "$FAKE_LOG"; sort -u',
+            "ipset": 'echo "ipset $*" >> "$FAKE_LOG"; [ "$1" = restore ] && cat >> "$FAKE_LOG"; true',
+            "iptables": 'echo "iptables $*" >> "$FAKE_LOG"; [ "$1" != -C ]',
+            "ip": 'echo "default via 172.17.0.1 dev eth0"',
+        }
+        for name, script in fakes.items():
+            (bin_dir / name).write_text(f"#!/bin/bash\n{script}\n")
+            (bin_dir / name).chmod(0o755)
+        env = {**os.environ, "PATH": f"{bin_dir}:/usr/bin:/bin", "FAKE_LOG": str(log)}
+        env.pop("LEMONADE_BASE_URL", None)
+        result = run_bash(f'{extra} source "{lib_dir}/firewall.sh"; {body}', env=env)
+        return result, log.read_text() if log.exists() else ""
+
+    def test_entries_include_lemonade_and_user_domains(self, lib_dir, tmp_path):
+        """Defaults, the Lemonade host and GAIA_FIREWALL_DOMAINS are merged and deduplicated."""
+        result, _ = self._run(
+            lib_dir, tmp_path, "firewall_entries",
+            extra='export GAIA_FIREWALL_DEFAULT_DOMAINS="pypi.org github.com" '
+                  'GAIA_FIREWALL_DOMAINS="example.com,10.0.0.0/8 pypi.org" '
+                  'LEMONADE_BASE_URL=https://lemonade.example.com:8443/api/v1;',
+        )
+        assert result.stdout.split() == ["10.0.0.0/8", "example.com", "github.com",
+                                         "lemonade.example.com", "pypi.org"]
+
+    def test_lookups_run_in_parallel(self, lib_dir, tmp_path):
+        """Slow lookups overlap instead of adding up."""
+        import time
+        domains = " ".join(f"dns{i}.example.com" for i in range(8))
+        start = time.monotonic()
+        result, _ = self._run(lib_dir, tmp_path, f"printf '%s\\n' {domains} | resolve_entries",
+                              extra="export GAIA_FIREWALL_DNS_JOBS=8;")
+        assert time.monotonic() - start < 3
+        assert sorted(result.stdout.split()) == sorted(f"198.51.100.{i}" for i in range(8))
+
+    def test_resolution_skips_cnames_and_warns(self, lib_dir, tmp_path):
+        """CNAMEs are dropped, networks pass through, /etc/hosts names resolve, unknowns warn."""
+        result, _ = self._run(
+            lib_dir, tmp_path,
+            "printf '%s\\n' api.example.com 10.0.0.0/8 host.docker.internal nowhere.example.com "
+            "| resolve_entries",
+        )
+        assert sorted(result.stdout.split()) == ["10.0.0.0/8", "172.17.0.1", "203.0.113.4"]
+        assert "could not resolve nowhere.example.com" in result.stderr
+
+    def test_networks_are_collapsed_with_aggregate(self, lib_dir, tmp_path):
+        """Addresses become /32 prefixes and go through aggregate."""
+        result, calls = self._run(lib_dir, tmp_path,
+                                  "printf '%s\\n' 203.0.113.4 203.0.113.4 10.0.0.0/8 | collapse_networks")
+        assert result.stdout.split() == ["10.0.0.0/8", "203.0.113.4/32"]
+        assert "aggregate" in calls
+
+    def test_allowlist_swapped_in_atomically(self, lib_dir, tmp_path):
+        """The set is filled in one ipset restore and swapped in whole."""
+        _, calls = self._run(lib_dir, tmp_path,
+                             "printf '%s\\n' 10.0.0.0/8 203.0.113.4/32 | load_allowlist")
+        lines = calls.splitlines()
+        assert lines[0] == "ipset restore"
+        assert lines.count("ipset restore") == 1
+        assert "add gaia-allowed-new 203.0.113.4/32 -exist" in lines
+        assert lines[-2:] == ["swap gaia-allowed-new gaia-allowed", "destroy gaia-allowed-new"]
+
+    def test_init_matches_the_set_with_one_rule(self, lib_dir, tmp_path):
+        """All allowed endpoints share a single match-set rule; the rest is rejected."""
+        result, calls = self._run(
+            lib_dir, tmp_path, "init_firewall",
+            extra='export GAIA_FIREWALL_DEFAULT_DOMAINS="api.example.com cdn.example.com" '
+                  'LEMONADE_BASE_URL=http://lemonade.example.com:8000/api/v1;',
+        )
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "add gaia-allowed-new 203.0.113.4/32 -exist" in calls
+        assert "add gaia-allowed-new 192.0.2.10/32 -exist" in calls
+        assert "add gaia-allowed-new 172.17.0.1/32 -exist" in calls
+        rules = [line for line in calls.splitlines() if line.startswith("iptables -A GAIA-EGRESS")]
+        assert len(rules) == 6
+        assert sum("--match-set gaia-allowed dst" in rule for rule in rules) == 1
+        assert rules[-1].endswith("-j REJECT --reject-with icmp-admin-prohibited")
+        assert "iptables -I OUTPUT -j GAIA-EGRESS" in calls
+        assert "Firewall: 3 allowlist entries as 4 network(s)" in result.stdout
+
+    def test_init_requires_capabilities(self, lib_dir, tmp_path):
+        """Without NET_ADMIN nothing is changed and the error says how to fix it."""
+        result, calls = self._run(lib_dir, tmp_path, "init_firewall",
+                                  extra="iptables() { return 4; };")
+        assert result.returncode == 1
+        assert "--cap-add=NET_ADMIN" in result.stdout
+        assert "ipset" not in calls
+
+    def test_entrypoint_firewall_is_opt_in(self, entrypoint_dev_path, dockerfile_dev_path):
+        """gaia-dev runs the firewall as root only when GAIA_FIREWALL=true."""
+        content = entrypoint_dev_path.read_text()
+        assert 'if [ "$GAIA_FIREWALL" = "true" ]; then' in content
+        assert "bash /usr/local/lib/gaia/firewall.sh" in content
+        assert 'GAIA_FIREWALL="${GAIA_FIREWALL:-false}"' in (
+            dockerfile_dev_path.parent.parent / "lib" / "firewall.sh").read_text()
+        assert content.index("firewall.sh;") < content.index("git clone")
+
+    def test_entrypoint_passes_every_setting_through_sudo(self, lib_dir, entrypoint_dev_path):
+        """Each setting firewall.sh reads from the environment must survive sudo."""
+        settings = set(re.findall(r'^(GAIA_FIREWALL_\w+)="\$\{', (lib_dir / "firewall.sh").read_text(),
+                                  re.MULTILINE))
+        passed = re.search(r'FIREWALL_SUDO_ENV="([^"]*)"', entrypoint_dev_path.read_text()).group(1)
+        assert settings
+        assert settings <= set(passed.split(","))
+
+
+class TestInstallStats:
+    """Test resource accounting for the gaia-linux install phase."""
+
+    NET_DEV = ("Inter-|   Receive                                                |  Transmit\n"
+               " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets\n"
+               "    lo: {lo} 10 0 0 0 0 0 0 {lo} 10 0 0 0 0 0 0\n"
+               "  eth0: {rx} 100 0 0 0 0 0 0 {tx} 50 0 0 0 0 0 0\n")
+
+    def _write(self, root, cpu_usec, rbytes, wbytes, rx, tx, anon):
+        (root / "cgroup").mkdir(parents=True, exist_ok=True)
+        (root / "proc" / "net").mkdir(parents=True, exist_ok=True)
+        (root / "cgroup" / "cpu.stat").write_text(
+            f"usage_usec {cpu_usec}\nuser_usec {cpu_usec * 3 // 4}\nsystem_usec {cpu_usec // 4}\n")
+        (root / "cgroup" / "io.stat").write_text(
+            f"8:0 rbytes={rbytes} wbytes={wbytes} rios=1 wios=1\n"
+            f"8:16 rbytes={rbytes} wbytes=0 rios=1 wios=0\n")
+        (root / "cgroup" / "memory.stat").write_text(f"anon {anon}\nfile 999999999\n")
+        (root / "proc" / "net" / "dev").write_text(self.NET_DEV.format(lo=10**9, rx=rx, tx=tx))
+
+    def _run(self, lib_dir, tmp_path, body, enabled=True):
+        return run_bash(
+            f'export GAIA_INSTALL_STATS={"true" if enabled else "false"} GAIA_INSTALL_STATS_INTERVAL=0.05 '
+            f'GAIA_INSTALL_STATS_FILE="{tmp_path}/stats/install.json" GAIA_CPU_LIMIT=4 '
+            f'GAIA_CGROUP_ROOT="{tmp_path}/cgroup" GAIA_PROC_ROOT="{tmp_path}/proc"; '
+            f'source "{lib_dir}/install-stats.sh"; {body}'
+        )
+
+    def test_reports_install_deltas(self, lib_dir, tmp_path):
+        """CPU, disk and network are counted from the start of the install, RSS sampled at its peak."""
+        import json
+        self._write(tmp_path, cpu_usec=5_000_000, rbytes=100, wbytes=100, rx=1000, tx=1000,
+                    anon=10 * 2**20)
+        # Counters at the memory peak and at the end of the install, swapped in while sampling
+        self._write(tmp_path / "peak", cpu_usec=5_000_000, rbytes=100, wbytes=100, rx=1000, tx=1000,
+                    anon=300 * 2**20)
+        self._write(tmp_path / "done", cpu_usec=7_000_000, rbytes=100 + 2**20, wbytes=100 + 64 * 2**20,
+                    rx=1000 + 256 * 2**20, tx=1000 + 2**20, anon=20 * 2**20)
+        result = self._run(lib_dir, tmp_path,
+                           f'start_install_stats; cp -r "{tmp_path}"/peak/* "{tmp_path}"; sleep 0.3; '
+                           f'cp -r "{tmp_path}"/done/* "{tmp_path}"; stop_install_stats ok 0.16.0')
+        assert result.returncode == 0, result.stderr
+        stats = json.loads((tmp_path / "stats" / "install.json").read_text())
+        assert stats["status"] == "ok"
+        assert stats["gaia_version"] == "0.16.0"
+        assert stats["cpu_s"] == 2.0
+        assert stats["cpu_user_s"] == 1.5
+        assert stats["cpu_limit"] == 4
+        assert stats["memory_peak_bytes"] == 300 * 2**20
+        assert stats["memory_peak_source"] == "sampled"
+        assert stats["disk_read_bytes"] == 2 * 2**20
+        assert stats["disk_write_bytes"] == 64 * 2**20
+        assert stats["net_rx_bytes"] == 256 * 2**20
+        assert stats["net_tx_bytes"] == 2**20
+        assert 0 < stats["cpu_busy"] <= 2.0 / stats["wall_s"] + 0.01
+        assert result.stdout.startswith("Install stats: ")
+        assert "sampled RSS peak 300 MiB" in result.stdout
+        assert "network 256 MiB in" in result.stdout
+        assert len(result.stdout.splitlines()) == 1
+
+    def test_memory_peak_comes_from_the_kernel(self, lib_dir, tmp_path):
+        """Where the cgroup has memory.peak it is reported instead of sampling."""
+        import json
+        self._write(tmp_path, cpu_usec=0, rbytes=0, wbytes=0, rx=0, tx=0, anon=10 * 2**20)
+        (tmp_path / "cgroup" / "memory.peak").write_text(f"{512 * 2**20}\n")
+        result = self._run(lib_dir, tmp_path,
+                           'start_install_stats; [ -z "$INSTALL_STATS_SAMPLER" ] && echo no-sampler; '
+                           'stop_install_stats ok')
+        assert result.returncode == 0, result.stderr
+        stats = json.loads((tmp_path / "stats" / "install.json").read_text())
+        assert stats["memory_peak_bytes"] == 512 * 2**20
+        assert stats["memory_peak_source"] == "memory.peak"
+        assert result.stdout.startswith("no-sampler\n")
+        assert "memory peak 512 MiB" in result.stdout
+        assert "sampled" not in result.stdout
+
+    def test_missing_counters_are_null(self, lib_dir, tmp_path):
+        """Without cgroup v2 files CPU and disk are null, network still comes from /proc."""
+        import json
+        (tmp_path / "proc" / "net").mkdir(parents=True)
+        (tmp_path / "proc" / "net" / "dev").write_text(self.NET_DEV.format(lo=1, rx=5, tx=5))
+        result = self._run(lib_dir, tmp_path, "start_install_stats; stop_install_stats failed")
+        assert result.returncode == 0, result.stderr
+        stats = json.loads((tmp_path / "stats" / "install.json").read_text())
+        assert stats["status"] == "failed"
+        assert stats["cpu_s"] is None and stats["cpu_busy"] is None
+        assert stats["disk_write_bytes"] is None
+        assert stats["net_rx_bytes"] == 0
+        assert "CPU n/a" in result.stdout
+
+    def test_disabled_by_default(self, lib_dir, tmp_path):
+        """Without GAIA_INSTALL_STATS=true nothing is sampled or written."""
+        result = self._run(lib_dir, tmp_path, "start_install_stats; stop_install_stats ok; jobs",
+                           enabled=False)
+        assert result.stdout == ""
+        assert not (tmp_path / "stats").exists()
+
+    def test_entrypoint_wraps_the_install(self, entrypoint_path):
+        """Stats cover the install and are written on success and failure."""
+        content = entrypoint_path.read_text()
+        start = content.index("start_install_stats")
+        assert start < content.index("resolve_latest_version)")
+        assert content.count("stop_install_stats failed") == 2
+        assert content.index("stop_install_stats ok") < content.index("prefetch_assets")
@@ -0,0 +1,185 @@
+"""Tests for the Lemonade stand-in server and the throughput harness."""
+
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from tools import loadtest
+from tools.lemonade_stub import LemonadeStub, StubConfig
+
+
+def _post(url, payload):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    return urllib.request.urlopen(request, timeout=10)
+
+
+class TestLemonadeStub:
+    """Test the OpenAI-compatible stand-in server."""
+
+    def test_health_and_models(self):
+        """Health and model listing should report the configured model."""
+        with LemonadeStub(StubConfig(model="test-model")) as stub:
+            health = json.load(urllib.request.urlopen(f"{stub.base_url()}/health"))
+            models = json.load(urllib.request.urlopen(f"{stub.base_url()}/models"))
+        assert health["status"] == "ok"
+        assert models["data"][0]["id"] == "test-model"
+
+    def test_chat_completion(self):
+        """Non-streaming chat completion should return the configured token count."""
+        with LemonadeStub(StubConfig(response_tokens=5)) as stub:
+            response = json.load(_post(f"{stub.base_url()}/chat/completions", {
+                "model": "stub-model",
+                "messages": [{"role": "user", "content": "hello there"}],
+            }))
+        assert response["choices"][0]["message"]["content"].split() == \
+            [f"token{i}" for i in range(5)]
+        assert response["usage"]["completion_tokens"] == 5
+        assert response["usage"]["prompt_tokens"] == 2
+
+    def test_max_tokens_caps_response(self):
+        """Requests with max_tokens should receive at most that many tokens."""
+        with LemonadeStub(StubConfig(response_tokens=50)) as stub:
+            response = json.load(_post(f"{stub.base_url()}/completions", {
+                "prompt": "hi", "max_tokens": 3,
+            }))
+        assert len(response["choices"][0]["text"].split()) == 3
+
+    def test_streaming_chat_completion(self):
+        """Streaming should emit one SSE chunk per token followed by [DONE]."""
+        with LemonadeStub(StubConfig(response_tokens=4)) as stub:
+            body = _post(f"{stub.base_url()}/chat/completions", {
+                "messages": [{"role": "user", "content": "hi"}], "stream": True,
+            }).read().decode()
+        events = [line[len("data: "):] for line in body.splitlines() if line.startswith("data: ")]
+        assert events[-1] == "[DONE]"
+        chunks = [json.loads(e) for e in events[:-1]]
+        content = "".join(c["choices"][0]["delta"].get("content", "") for c in chunks)
+        assert content.split() == [f"token{i}" for i in range(4)]
+        assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+    def test_latency_and_token_rate(self):
+        """Completion time should reflect configured latency and token rate."""
+        config = StubConfig(latency=0.2, tokens_per_second=50, response_tokens=10)
+        with LemonadeStub(config) as stub:
+            start = time.monotonic()
+            _post(f"{stub.base_url()}/chat/completions", {
+                "messages": [{"role": "user", "content": "hi"}],
+            }).read()
+            elapsed = time.monotonic() - start
+        assert elapsed >= 0.2 + 10 / 50 - 0.02
+
+    def test_error_injection(self):
+        """An error rate of 1 should fail every completion with the configured status."""
+        with LemonadeStub(StubConfig(error_rate=1.0, error_status=500)) as stub:
+            with pytest.raises(urllib.error.HTTPError) as excinfo:
+                _post(f"{stub.base_url()}/chat/completions", {"messages": []})
+            stats = json.load(urllib.request.urlopen(
+                f"http://127.0.0.1:{stub.port}/stub/stats"))
+        assert excinfo.value.code == 500
+        assert stats == {"requests": 1, "completions": 1, "errors": 1}
+
+    def test_error_injection_is_reproducible_with_seed(self):
+        """The same seed should fail the same requests."""
+        def pattern():
+            stub = LemonadeStub(StubConfig(error_rate=0.5, seed=42))
+            return [stub.should_fail() for _ in range(20)]
+        assert pattern() == pattern()
+
+
+class TestLoadReport:
+    """Test the harness statistics."""
+
+    def test_percentile_interpolates(self):
+        """Percentiles should interpolate linearly between samples."""
+        values = [1.0, 2.0, 3.0, 4.0]
+        assert loadtest.percentile(values, 0) == 1.0
+        assert loadtest.percentile(values, 50) == 2.5
+        assert loadtest.percentile(values, 100) == 4.0
+
+    def test_percentile_rejects_empty(self):
+        """Percentile of no samples is undefined."""
+        with pytest.raises(ValueError):
+            loadtest.percentile([], 50)
+
+    def test_summarize_counts_errors_and_throughput(self):
+        """Failed requests should be excluded from throughput and latency."""
+        results = [{"latency": 0.1 * i, "ok": True} for i in range(1, 11)]
+        results.append({"latency": 99.0, "ok": False})
+        summary = loadtest.summarize(results, elapsed=2.0)
+        assert summary["requests"] == 11
+        assert summary["errors"] == 1
+        assert summary["requests_per_s"] == 5.0
+        assert summary["latency_s"]["max"] == 1.0
+        assert summary["latency_s"]["p50"] == pytest.approx(0.55)
+
+
+class TestWaitUntilReady:
+    """Test following the container log for the ready marker."""
+
+    @pytest.fixture
+    def fake_docker(self, tmp_path, monkeypatch):
+        """Put a docker on PATH whose `logs --follow` runs SCRIPT."""
+        def install(script):
+            docker = tmp_path / "docker"
+            docker.write_text(f"#!/bin/bash\n{script}\n")
+            docker.chmod(0o755)
+            monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+        return install
+
+    def test_returns_when_the_marker_appears(self, fake_docker):
+        """The marker is seen as it is logged, not on the next poll."""
+        fake_docker(f'echo "Installing..."; sleep 0.3; echo "{loadtest.READY_MARKER}"; sleep 30')
+        start = time.monotonic()
+        ready = loadtest.wait_until_ready("c", timeout=10)
+        assert 0.3 <= ready < 0.8
+        assert time.monotonic() - start < 1.5
+
+    def test_exit_before_ready(self, fake_docker):
+        """A container that stops without the marker fails with its log."""
+        fake_docker('echo "ERROR: install failed"; exit 0')
+        with pytest.raises(RuntimeError, match="ERROR: install failed"):
+            loadtest.wait_until_ready("c", timeout=10)
+
+    def test_timeout(self, fake_docker):
+        """A container that never becomes ready times out after TIMEOUT seconds."""
+        fake_docker('echo "Installing..."; exec sleep 30')
+        start = time.monotonic()
+        with pytest.raises(TimeoutError, match="Installing"):
+            loadtest.wait_until_ready("c", timeout=0.5)
+        assert time.monotonic() - start < 5
+
+
+class TestLoadHarness:
+    """Run the full harness against a GAIA container."""
+
+    @pytest.mark.integration
+    @pytest.mark.slow
+    def test_harness_reports_throughput(self, project_root, tmp_path):
+        """Harness should drive GAIA at the requested concurrency and write a report."""
+        import subprocess
+        subprocess.run(
+            ["docker", "build", "-t", "gaia-linux:test", "-f", "gaia-linux/Dockerfile",
+             str(project_root)],
+            check=True,
+            capture_output=True,
+            timeout=600
+        )
+        output = tmp_path / "loadtest.json"
+        loadtest.main([
+            "--image", "gaia-linux:test",
+            "--concurrency", "2",
+            "--requests", "4",
+            "--output", str(output),
+        ])
+        report = json.loads(output.read_text())
+        assert report["summary"]["requests"] == 4
+        assert report["summary"]["requests_per_s"] > 0
+        assert report["stub"]["stats"]["completions"] >= 4
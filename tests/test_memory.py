@@ -0,0 +1,142 @@
+"""Tests for the memory footprint benchmark and its baseline (tools/bench_memory.py)."""
+
+import json
+import subprocess
+
+import pytest
+
+from tools import bench_memory
+from tools.bench_memory import BASELINE, METRICS, compare, parse_size, unrecorded, update_baseline
+
+BASE = {
+    "tolerance_mb": 64,
+    "tolerance_pct": 10,
+    "images": {"gaia-linux": {"gaia_version": "0.16.0", "idle_mb": 30.0,
+                              "import_gaia_mb": 900.0, "gaia_help_mb": 950.0}},
+}
+
+
+def measured(idle=30.0, import_gaia=900.0, gaia_help=950.0, version="0.16.1"):
+    return {"idle_mb": idle, "import_gaia_mb": import_gaia, "gaia_help_mb": gaia_help,
+            "gaia_version": version}
+
+
+class TestCompare:
+    """Test the comparison against the baseline."""
+
+    def test_within_tolerance(self):
+        rows = compare({"gaia-linux": measured(idle=80.0, import_gaia=980.0)}, BASE)
+        assert [row["status"] for row in rows] == ["ok", "ok", "ok"]
+
+    def test_tolerance_is_absolute_or_relative(self):
+        """Small metrics get tolerance_mb, large ones tolerance_pct, whichever is larger."""
+        rows = {row["metric"]: row for row in compare({"gaia-linux": measured()}, BASE)}
+        assert rows["idle_mb"]["limit"] == 94.0
+        assert rows["import_gaia_mb"]["limit"] == 990.0
+
+    def test_200_mb_growth_fails(self):
+        """A bump that adds 200 MB to any metric is a regression."""
+        for metric in METRICS:
+            values = measured()
+            values[metric] = BASE["images"]["gaia-linux"][metric] + 200
+            statuses = {row["metric"]: row["status"] for row in compare({"gaia-linux": values}, BASE)}
+            assert statuses[metric] == "regression"
+            assert list(statuses.values()).count("regression") == 1
+
+    def test_large_drop_is_reported(self):
+        rows = compare({"gaia-linux": measured(import_gaia=600.0)}, BASE)
+        assert rows[1]["status"] == "improved"
+
+    def test_missing_baseline_is_new(self):
+        rows = compare({"gaia-dev": measured()}, BASE)
+        assert {row["status"] for row in rows} == {"new"}
+        assert all(row["limit"] is None for row in rows)
+
+    def test_unrecorded_metrics(self):
+        """Metrics without a value are listed, so CI can tell a baseline was never recorded."""
+        assert unrecorded(BASE) == []
+        partial = update_baseline(BASE, {"gaia-dev": {**measured(), "idle_mb": None}})
+        assert unrecorded(partial) == ["gaia-dev idle_mb"]
+
+    def test_update_keeps_tolerance(self):
+        updated = update_baseline(BASE, {"gaia-dev": measured(version="0.16.1")})
+        assert updated["tolerance_mb"] == 64
+        assert updated["images"]["gaia-linux"] == BASE["images"]["gaia-linux"]
+        assert updated["images"]["gaia-dev"]["gaia_version"] == "0.16.1"
+        assert updated["images"]["gaia-dev"]["import_gaia_mb"] == 900.0
+
+
+class TestMain:
+    """Test the command line with measurements stubbed out."""
+
+    @pytest.fixture
+    def baseline(self, tmp_path):
+        path = tmp_path / "baseline.json"
+        path.write_text(json.dumps(BASE))
+        return path
+
+    def test_regression_exits_nonzero(self, monkeypatch, baseline, capsys):
+        monkeypatch.setattr(bench_memory, "measure_image",
+                            lambda *args: measured(import_gaia=1200.0))
+        assert bench_memory.main(["--image", "gaia-linux=gaia-linux:test",
+                                  "--baseline", str(baseline)]) == 1
+        out = capsys.readouterr()
+        assert "REGRESSION" in out.out
+        assert "MEMORY REGRESSION: gaia-linux import_gaia_mb is 1200.0 MB" in out.err
+        assert "baseline recorded with 0.16.0" in out.out
+
+    def test_missing_baseline_exits_nonzero(self, monkeypatch, baseline, capsys):
+        """An image without a recorded baseline fails instead of passing unchecked."""
+        monkeypatch.setattr(bench_memory, "measure_image", lambda *args: measured())
+        assert bench_memory.main(["--image", "gaia-dev=gaia-dev:test",
+                                  "--baseline", str(baseline)]) == 1
+        assert "NO BASELINE: gaia-dev idle_mb is 30.0 MB" in capsys.readouterr().err
+
+    def test_update_baseline(self, monkeypatch, baseline):
+        monkeypatch.setattr(bench_memory, "measure_image",
+                            lambda *args: measured(import_gaia=1200.0))
+        assert bench_memory.main(["--image", "gaia-linux=gaia-linux:test",
+                                  "--baseline", str(baseline), "--update-baseline"]) == 0
+        assert json.loads(baseline.read_text())["images"]["gaia-linux"]["import_gaia_mb"] == 1200.0
+
+    def test_check_recorded(self, baseline, tmp_path, capsys):
+        """--check-recorded exits 1 and names the metrics while any value is missing."""
+        assert bench_memory.main(["--check-recorded", "--baseline", str(baseline)]) == 0
+        empty = tmp_path / "empty.json"
+        empty.write_text(json.dumps({**BASE, "images": {"gaia-dev": {"idle_mb": None}}}))
+        assert bench_memory.main(["--check-recorded", "--baseline", str(empty)]) == 1
+        assert "gaia-dev idle_mb" in capsys.readouterr().out
+
+    def test_parse_docker_stats_sizes(self):
+        assert parse_size("45.3MiB") == pytest.approx(45.3 * 1024 ** 2)
+        assert parse_size(" 1.5GiB ") == 1.5 * 1024 ** 3
+        assert parse_size("512kB") == 512000
+        with pytest.raises(ValueError):
+            parse_size("lots")
+
+    def test_checked_in_baseline_covers_both_images(self):
+        """The baseline lists every metric for both images, with a tolerance below 200 MB."""
+        baseline = json.loads(BASELINE.read_text())
+        assert set(baseline["images"]) == {"gaia-linux", "gaia-dev"}
+        for image in baseline["images"].values():
+            assert set(METRICS) <= set(image)
+        assert baseline["tolerance_mb"] < 200
+        assert baseline["tolerance_pct"] <= 10
+
+
+@pytest.mark.integration
+class TestMemoryFootprint:
+    """Measure the locally built images against the checked-in baseline."""
+
+    @pytest.mark.parametrize("name", ["gaia-linux", "gaia-dev"])
+    def test_no_memory_regression(self, name, project_root, tmp_path):
+        """Every metric has a baseline and stays within its tolerance."""
+        subprocess.run(
+            ["docker", "build", "-t", f"{name}:test", "-f", f"{name}/Dockerfile", str(project_root)],
+            check=True, capture_output=True, text=True, timeout=900,
+        )
+        output = tmp_path / "memory.json"
+        status = bench_memory.main(["--image", f"{name}={name}:test", "--output", str(output)])
+        rows = json.loads(output.read_text())["comparison"]
+        failures = [row for row in rows if row["status"] in ("regression", "new")]
+        assert status == 0 and not failures, failures
@@ -0,0 +1,229 @@
+"""Tests for the pre-warmed container pool (tools/pool.py)."""
+
+import json
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from tools.pool import Pool, PoolConfig, PoolServer
+
+
+class FakeBackend:
+    """Containers that become ready after START_DELAY seconds."""
+
+    def __init__(self, start_delay=0.0, fail=False):
+        self.start_delay = start_delay
+        self.fail = fail
+        self.lock = threading.Lock()
+        self.started = []
+        self.removed = []
+        self.dead = set()
+
+    def start(self, config):
+        with self.lock:
+            container = f"c{len(self.started)}"
+            self.started.append(container)
+        return container
+
+    def wait_ready(self, container, timeout):
+        time.sleep(self.start_delay)
+        if self.fail:
+            raise RuntimeError("Container exited before becoming ready")
+
+    def is_running(self, container):
+        return container not in self.dead
+
+    def remove(self, container):
+        with self.lock:
+            self.removed.append(container)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def config(**overrides):
+    return PoolConfig(image="gaia-linux:test", reap_interval=0.05, retry_delay=0.05, **overrides)
+
+
+class TestPool:
+    """Test handing out, replenishing and retiring containers."""
+
+    def test_keeps_size_containers_warm(self):
+        backend = FakeBackend()
+        with Pool(config(size=3), backend) as pool:
+            wait_for(lambda: pool.snapshot()["warm"] == 3)
+            time.sleep(0.2)
+            assert len(backend.started) == 3
+
+    def test_warm_container_is_a_hit(self):
+        """A waiting container is handed out at once and replaced in the background."""
+        backend = FakeBackend()
+        with Pool(config(size=1), backend) as pool:
+            wait_for(lambda: pool.snapshot()["warm"] == 1)
+            lease = pool.acquire()
+            assert lease["hit"] is True
+            assert lease["container"] == "c0"
+            wait_for(lambda: pool.snapshot()["warm"] == 1)
+            stats = pool.snapshot()
+        assert stats["hits"] == 1 and stats["misses"] == 0
+        assert stats["hit_rate"] == 1.0
+        assert stats["leased"] == 1
+
+    def test_empty_pool_is_a_miss(self):
+        """Requests beyond the warm containers wait for one started on demand."""
+        backend = FakeBackend(start_delay=0.2)
+        with Pool(config(size=1, parallel_starts=4), backend) as pool:
+            wait_for(lambda: pool.snapshot()["warm"] == 1)
+            leases = [pool.acquire(), pool.acquire()]
+            stats = pool.snapshot()
+        assert [lease["hit"] for lease in leases] == [True, False]
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["miss_wait_s"] >= 0.15
+
+    def test_retired_after_max_uses(self):
+        """By default every session gets a container no one used before."""
+        backend = FakeBackend()
+        with Pool(config(size=1), backend) as pool:
+            wait_for(lambda: pool.snapshot()["warm"] == 1)
+            lease = pool.acquire()
+            assert pool.release(lease["container"]) is True
+            stats = pool.snapshot()
+        assert lease["container"] in backend.removed
+        assert stats["retired"]["uses"] == 1
+
+    def test_reused_until_max_uses(self):
+        backend = FakeBackend()
+        with Pool(config(size=1, max_uses=2), backend) as pool:
+            wait_for(lambda: pool.snapshot()["warm"] == 1)
+            first = pool.acquire()
+            assert pool.release(first["container"]) is False
+            second = pool.acquire()
+        assert second["container"] == first["container"]
+        assert second["uses"] == 2
+
+    def test_idle_containers_retired_by_age(self):
+        now = [0.0]
+        backend = FakeBackend()
+        with Pool(config(size=1, max_age=60), backend, clock=lambda: now[0]) as pool:
+            wait_for(lambda: pool.snapshot()["warm"] == 1)
+            now[0] = 61.0
+            wait_for(lambda: "c0" in backend.removed and pool.snapshot()["warm"] == 1)
+            stats = pool.snapshot()
+        assert stats["retired"]["age"] >= 1
+        assert stats["started"] >= 2
+
+    def test_dead_container_is_skipped(self):
+        """The replenisher retires a warm container that stopped and starts a replacement."""
+        backend = FakeBackend()
+        with Pool(config(size=2, parallel_starts=1), backend) as pool:
+            wait_for(lambda: pool.snapshot()["warm"] == 2)
+            backend.dead.add("c0")
+            wait_for(lambda: pool.snapshot()["retired"]["dead"] == 1)
+            lease = pool.acquire()
+            wait_for(lambda: pool.snapshot()["warm"] == 2)
+            stats = pool.snapshot()
+        assert lease["container"] == "c1"
+        assert lease["hit"] is True
+        assert "c0" in backend.removed
+        assert stats["retired"]["dead"] == 1
+
+    def test_liveness_checked_without_the_lock(self):
+        """A slow docker inspect does not hold up handing out containers."""
+        backend = FakeBackend()
+        with Pool(config(size=2), backend) as pool:
+            wait_for(lambda: pool.snapshot()["warm"] == 2)
+            checking = threading.Event()
+            release_check = threading.Event()
+
+            def slow_is_running(container):
+                checking.set()
+                release_check.wait(5)
+                return True
+
+            backend.is_running = slow_is_running
+            assert checking.wait(5)
+            started = time.monotonic()
+            lease = pool.acquire()
+            elapsed = time.monotonic() - started
+            release_check.set()
+        assert lease["hit"] is True
+        assert elapsed < 1
+
+    def test_start_failures_are_counted_and_acquire_times_out(self):
+        backend = FakeBackend(fail=True)
+        with Pool(config(size=1), backend) as pool:
+            with pytest.raises(TimeoutError):
+                pool.acquire(timeout=0.3)
+            stats = pool.snapshot()
+        assert stats["start_failures"] >= 1
+        assert set(backend.removed) >= {"c0"}
+
+    def test_stop_removes_warm_containers(self):
+        backend = FakeBackend()
+        pool = Pool(config(size=2), backend).start()
+        wait_for(lambda: pool.snapshot()["warm"] == 2)
+        lease = pool.acquire()
+        wait_for(lambda: pool.snapshot()["warm"] == 2)
+        pool.stop()
+        assert lease["container"] not in backend.removed
+        assert len(backend.removed) == len(backend.started) - 1
+
+
+class TestPoolServer:
+    """Test the HTTP API."""
+
+    def _post(self, url, payload=None):
+        request = urllib.request.Request(url, data=json.dumps(payload or {}).encode(), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        return json.load(urllib.request.urlopen(request, timeout=10))
+
+    def test_acquire_release_stats(self):
+        backend = FakeBackend()
+        with Pool(config(size=1), backend) as pool, PoolServer(pool) as server:
+            wait_for(lambda: pool.snapshot()["warm"] == 1)
+            lease = self._post(f"{server.url()}/acquire")
+            released = self._post(f"{server.url()}/release", {"container": lease["container"]})
+            stats = json.load(urllib.request.urlopen(f"{server.url()}/stats", timeout=10))
+        assert lease["hit"] is True
+        assert released == {"container": lease["container"], "retired": True}
+        assert stats["hits"] == 1 and stats["released"] == 1
+
+    def test_release_unknown_container(self):
+        import urllib.error
+        with Pool(config(size=0), FakeBackend()) as pool, PoolServer(pool) as server:
+            with pytest.raises(urllib.error.HTTPError) as excinfo:
+                self._post(f"{server.url()}/release", {"container": "nope"})
+        assert excinfo.value.code == 404
+
+
+@pytest.mark.integration
+@pytest.mark.slow
+class TestPoolContainers:
+    """Pool real gaia-linux containers."""
+
+    def test_warm_container_is_ready(self, project_root):
+        import subprocess
+        subprocess.run(
+            ["docker", "build", "-t", "gaia-linux:test", "-f", "gaia-linux/Dockerfile", str(project_root)],
+            check=True, capture_output=True, timeout=600,
+        )
+        pool_config = PoolConfig(image="gaia-linux:test", size=1, label="gaia-pool-test",
+                                 env=["LEMONADE_BASE_URL=http://localhost:5000/api/v1"])
+        with Pool(pool_config) as pool:
+            wait_for(lambda: pool.snapshot()["warm"] == 1, timeout=900)
+            started = time.monotonic()
+            lease = pool.acquire()
+            handout_s = time.monotonic() - started
+            result = subprocess.run(["docker", "exec", lease["container"], "gaia", "--help"],
+                                    capture_output=True, text=True, timeout=120)
+            pool.release(lease["container"])
+        assert lease["hit"] is True
+        assert handout_s < 1
+        assert result.returncode == 0, result.stderr
@@ -0,0 +1,146 @@
+"""Tests for the gaia-profile sampling profiler wrapper (lib/gaia-profile)."""
+
+import json
+import os
+import subprocess
+
+import pytest
+
+FOLDED = (
+    "<module> (app.py:10);main (app.py:5);load (rag.py:40) 30\n"
+    "<module> (app.py:10);main (app.py:5);query (llm.py:12) 60\n"
+    "<module> (app.py:10);main (app.py:5) 10\n"
+    " 3\n"
+)
+
+
+class TestGaiaProfile:
+    """Test the gaia-profile wrapper with a fake py-spy."""
+
+    def _run(self, lib_dir, tmp_path, args, cap_ptrace=False, scope=1, uid=None):
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir(exist_ok=True)
+        log = tmp_path / "calls.log"
+        (bin_dir / "py-spy").write_text(
+            "#!/bin/bash\n"
+            'echo "py-spy $*" >> "$FAKE_LOG"\n'
+            'while [ $# -gt 0 ]; do [ "$1" = --output ] && out="$2"; [ "$1" = -- ] && break; shift; done\n'
+            f"printf '{FOLDED}' > \"$out\"\n"
+        )
+        (bin_dir / "sudo").write_text('#!/bin/bash\necho "sudo" >> "$FAKE_LOG"\nexec "$@"\n')
+        for fake in ("py-spy", "sudo"):
+            (bin_dir / fake).chmod(0o755)
+
+        proc = tmp_path / "proc"
+        (proc / "self").mkdir(parents=True, exist_ok=True)
+        (proc / "sys" / "kernel" / "yama").mkdir(parents=True, exist_ok=True)
+        (proc / "4242").mkdir(exist_ok=True)
+        bounding = 0x00000000a80425fb | ((1 << 19) if cap_ptrace else 0)
+        (proc / "self" / "status").write_text(f"Name:\tbash\nCapBnd:\t{bounding:016x}\n")
+        (proc / "sys" / "kernel" / "yama" / "ptrace_scope").write_text(f"{scope}\n")
+        target_uid = os.getuid() if uid is None else uid
+        (proc / "4242" / "status").write_text(f"Name:\tgaia\nUid:\t{target_uid}\t{target_uid}\t{target_uid}\t{target_uid}\n")
+        (proc / "4242" / "cmdline").write_bytes(b"gaia\0mcp\0start\0")
+
+        env = {**os.environ, "PATH": f"{bin_dir}:{os.environ['PATH']}", "FAKE_LOG": str(log),
+               "GAIA_PROC_ROOT": str(proc), "GAIA_PROFILE_DIR": str(tmp_path / "out")}
+        result = subprocess.run([str(lib_dir / "gaia-profile"), *args],
+                                capture_output=True, text=True, env=env)
+        return result, log.read_text() if log.exists() else ""
+
+    def _outputs(self, tmp_path):
+        return sorted(p.name for p in (tmp_path / "out").iterdir())
+
+    def test_launch_writes_flamegraph(self, lib_dir, tmp_path):
+        """A launched command is recorded once, as py-spy's SVG flamegraph by default."""
+        result, calls = self._run(lib_dir, tmp_path, ["--rate", "250", "-n", "run", "--", "gaia", "llm", "hi"])
+        assert result.returncode == 0, result.stderr
+        assert calls.count("py-spy record") == 1
+        assert "--format flamegraph --rate 250" in calls
+        assert calls.rstrip().endswith("-- gaia llm hi")
+        assert self._outputs(tmp_path) == ["run.svg"]
+        assert "Flamegraph: " in result.stdout
+
+    @pytest.mark.parametrize("fmt,output", [("speedscope", "run.speedscope.json"), ("raw", "run.folded")])
+    def test_other_formats(self, lib_dir, tmp_path, fmt, output):
+        """--format is passed to py-spy and names the output file."""
+        result, calls = self._run(lib_dir, tmp_path, ["-f", fmt, "-n", "run", "--", "gaia"])
+        assert result.returncode == 0, result.stderr
+        assert f"--format {fmt} " in calls
+        assert self._outputs(tmp_path) == [output]
+        assert "speedscope.app" in result.stdout
+
+    def test_attach_needs_sys_ptrace(self, lib_dir, tmp_path):
+        """Without SYS_PTRACE (and Yama scope 1) attaching is refused with the fix."""
+        result, calls = self._run(lib_dir, tmp_path, ["--pid", "4242"])
+        assert result.returncode == 1
+        assert "--cap-add=SYS_PTRACE" in result.stderr
+        assert calls == ""
+
+    def test_attach_with_sys_ptrace(self, lib_dir, tmp_path):
+        """With SYS_PTRACE py-spy runs as root, through sudo unless already root."""
+        result, calls = self._run(lib_dir, tmp_path, ["--pid", "4242", "-d", "5", "--nonblocking"],
+                                  cap_ptrace=True)
+        assert result.returncode == 0, result.stderr
+        assert "--nonblocking --duration 5 --pid 4242" in calls
+        assert ("sudo" in calls.splitlines()) == (os.getuid() != 0)
+        assert [path.suffix for path in (tmp_path / "out").iterdir()] == [".svg"]
+
+    def test_attach_same_user_with_yama_scope_0(self, lib_dir, tmp_path):
+        """Yama scope 0 lets a user trace its own processes without the capability."""
+        result, calls = self._run(lib_dir, tmp_path, ["--pid", "4242"], scope=0)
+        assert result.returncode == 0, result.stderr
+        assert "sudo" not in calls.splitlines()
+
+    @pytest.mark.parametrize("args", [[], ["--pid", "4242", "--", "gaia"], ["--bogus"],
+                                      ["--format", "pdf", "--", "gaia"]])
+    def test_usage_errors(self, lib_dir, tmp_path, args):
+        result, calls = self._run(lib_dir, tmp_path, args)
+        assert result.returncode == 2
+        assert any(text in result.stderr for text in ("Usage: gaia-profile", "not both", "unknown format"))
+        assert calls == ""
+
+    def test_image_ships_pinned_profiler(self, dockerfile_path):
+        """gaia-linux installs a pinned py-spy and puts gaia-profile on PATH."""
+        content = dockerfile_path.read_text()
+        assert "ARG PY_SPY_VERSION=" in content
+        assert "uv tool install --no-cache py-spy==${PY_SPY_VERSION}" in content
+        assert "ln -s /usr/local/lib/gaia/gaia-profile /usr/local/bin/gaia-profile" in content
+
+
+@pytest.mark.integration
+class TestProfilerCapabilities:
+    """Test which container capabilities the profiler needs."""
+
+    WORKLOAD = "import time\nt = time.time()\nwhile time.time() - t < 30: sum(range(1000))\n"
+
+    def _docker_run(self, tmp_path, script, *docker_args):
+        tmp_path.chmod(0o777)
+        return subprocess.run(
+            ["docker", "run", "--rm", "-e", "LEMONADE_BASE_URL=http://localhost:5000/api/v1",
+             "-e", "SKIP_INSTALL=true", "-v", f"{tmp_path}:/host", *docker_args,
+             "gaia-linux:test", "bash", "-c", script],
+            capture_output=True, text=True, timeout=180,
+        )
+
+    def test_launch_needs_no_capabilities(self, tmp_path):
+        """Profiling a launched command works with Docker's default capabilities."""
+        result = self._docker_run(
+            tmp_path, f"gaia-profile -f speedscope -n launch -- python3 -c '{self.WORKLOAD.replace('30', '3')}'")
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert json.loads((tmp_path / "launch.speedscope.json").read_text())["profiles"]
+
+    def test_attach_refused_without_sys_ptrace(self, tmp_path):
+        """Attaching to a running process fails clearly without SYS_PTRACE."""
+        result = self._docker_run(
+            tmp_path, f"python3 -c '{self.WORKLOAD}' & sleep 1; gaia-profile --pid $! -d 2")
+        assert result.returncode != 0
+        assert "--cap-add=SYS_PTRACE" in result.stdout + result.stderr
+
+    def test_attach_with_sys_ptrace(self, tmp_path):
+        """With --cap-add=SYS_PTRACE a running process can be sampled."""
+        result = self._docker_run(
+            tmp_path, f"python3 -c '{self.WORKLOAD}' & sleep 1; gaia-profile --pid $! -d 2 -n attach",
+            "--cap-add=SYS_PTRACE")
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert (tmp_path / "attach.svg").read_text().lstrip().startswith(("<?xml", "<svg"))
@@ -0,0 +1,224 @@
+"""Tests for the package index stand-in and installs against a flaky index."""
+
+import json
+import os
+import subprocess
+import sys
+import urllib.error
+import urllib.request
+import uuid
+import zipfile
+
+import pytest
+
+from tools.pypi_stub import IndexConfig, PyPIStub, make_wheel, project_of
+from tools.wheelhouse import gaia_version
+
+
+def _pip_download(index_url, dest, requirement, deps=False):
+    """pip command that downloads REQUIREMENT (and with DEPS its dependencies) from INDEX_URL
+    without its own retries."""
+    return (f'"{sys.executable}" -m pip download --quiet {"" if deps else "--no-deps "}--retries 0 '
+            f'--disable-pip-version-check --no-cache-dir --index-url {index_url} '
+            f'--dest "{dest}" {requirement}')
+
+
+class TestPyPIStub:
+    """Test the PEP 503 stand-in index."""
+
+    def test_make_wheel(self, tmp_path):
+        """Generated wheels should carry the metadata installers need."""
+        wheel = make_wheel(tmp_path, "amd-gaia", "0.0.1", package="gaia")
+        assert wheel.name == "amd_gaia-0.0.1-py3-none-any.whl"
+        with zipfile.ZipFile(wheel) as archive:
+            names = archive.namelist()
+            metadata = archive.read("amd_gaia-0.0.1.dist-info/METADATA").decode()
+        assert "gaia/__init__.py" in names
+        assert "amd_gaia-0.0.1.dist-info/RECORD" in names
+        assert "Name: amd-gaia" in metadata
+
+    def test_project_of(self):
+        """Project names should be normalized from wheel and sdist filenames."""
+        assert project_of("amd_gaia-0.0.1-py3-none-any.whl") == "amd-gaia"
+        assert project_of("Amd.Gaia-0.0.1.tar.gz") == "amd-gaia"
+
+    def test_simple_index_lists_files(self, tmp_path):
+        """The project page should link each file with its sha256."""
+        make_wheel(tmp_path, "amd-gaia", "0.0.1")
+        with PyPIStub(tmp_path) as stub:
+            page = urllib.request.urlopen(f"{stub.index_url()}/amd_gaia/").read().decode()
+            wheel = urllib.request.urlopen(
+                f"http://127.0.0.1:{stub.port}/files/amd_gaia-0.0.1-py3-none-any.whl").read()
+            stats = json.load(urllib.request.urlopen(f"http://127.0.0.1:{stub.port}/stub/stats"))
+        assert 'href="/files/amd_gaia-0.0.1-py3-none-any.whl#sha256=' in page
+        assert wheel.startswith(b"PK")
+        assert stats["downloads"] == {"amd_gaia-0.0.1-py3-none-any.whl": 1}
+
+    def test_fail_first(self, tmp_path):
+        """The first N requests should fail with the configured status."""
+        make_wheel(tmp_path, "amd-gaia", "0.0.1")
+        with PyPIStub(tmp_path, IndexConfig(fail_first=2, error_status=503)) as stub:
+            for _ in range(2):
+                with pytest.raises(urllib.error.HTTPError) as excinfo:
+                    urllib.request.urlopen(f"{stub.index_url()}/amd-gaia/")
+                assert excinfo.value.code == 503
+            assert urllib.request.urlopen(f"{stub.index_url()}/amd-gaia/").status == 200
+            assert stub.stats.snapshot()["errors"] == 2
+
+    def test_unknown_project_is_404(self, tmp_path):
+        """Projects without files should not be found."""
+        with PyPIStub(tmp_path) as stub:
+            with pytest.raises(urllib.error.HTTPError) as excinfo:
+                urllib.request.urlopen(f"{stub.index_url()}/missing/")
+        assert excinfo.value.code == 404
+
+
+class TestInstallRetries:
+    """Run installs through retry_command against a fault-injecting index."""
+
+    def _install(self, lib_dir, tmp_path, stub, requirement, permanent=""):
+        return subprocess.run(
+            ["bash", "-c",
+             f'source "{lib_dir}/retry.sh"; '
+             f'retry_command "{permanent}" '
+             f'{_pip_download(stub.index_url(), tmp_path / "out", requirement)}'],
+            capture_output=True, text=True, timeout=120,
+            env={"PATH": "/usr/bin:/bin", "GAIA_INSTALL_BACKOFF": "0",
+                 "GAIA_INSTALL_ATTEMPTS": "4", "HOME": str(tmp_path)},
+        )
+
+    def test_install_survives_transient_errors(self, lib_dir, tmp_path):
+        """Two failed index requests should cost two retries, not the install."""
+        dists = tmp_path / "dists"
+        dists.mkdir()
+        make_wheel(dists, "amd-gaia", "0.0.1")
+        with PyPIStub(dists, IndexConfig(fail_first=2)) as stub:
+            result = self._install(lib_dir, tmp_path, stub, "amd-gaia==0.0.1")
+            stats = stub.stats.snapshot()
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert result.stdout.count("failed (exit") == 2
+        assert stats["downloads"] == {"amd_gaia-0.0.1-py3-none-any.whl": 1}
+        assert (tmp_path / "out" / "amd_gaia-0.0.1-py3-none-any.whl").exists()
+
+    def test_missing_version_fails_fast(self, lib_dir, tmp_path):
+        """A version that does not exist should not be retried."""
+        dists = tmp_path / "dists"
+        dists.mkdir()
+        make_wheel(dists, "amd-gaia", "0.0.1")
+        with PyPIStub(dists) as stub:
+            result = self._install(lib_dir, tmp_path, stub, "amd-gaia==9.9.9",
+                                   permanent="No matching distribution")
+            stats = stub.stats.snapshot()
+        assert result.returncode != 0
+        assert "Not retrying" in result.stdout
+        assert stats["requests"] == 1
+
+    @pytest.mark.integration
+    @pytest.mark.slow
+    def test_container_install_retries(self, project_root, tmp_path):
+        """gaia-linux should finish its install against a flaky index."""
+        subprocess.run(
+            ["docker", "build", "-t", "gaia-linux:test", "-f", "gaia-linux/Dockerfile",
+             str(project_root)],
+            check=True, capture_output=True, timeout=600
+        )
+        make_wheel(tmp_path, "amd-gaia", "0.0.1", package="gaia")
+        with PyPIStub(tmp_path, IndexConfig(fail_first=2), host="0.0.0.0") as stub:
+            result = subprocess.run(
+                ["docker", "run", "--rm", "--add-host", "host.docker.internal:host-gateway",
+                 "-e", "LEMONADE_BASE_URL=http://localhost:5000/api/v1",
+                 "-e", "GAIA_VERSION=0.0.1",
+                 "-e", f"UV_DEFAULT_INDEX={stub.index_url('host.docker.internal')}",
+                 "-e", "GAIA_INSTALL_BACKOFF=1",
+                 # Without uv's own retries the failures reach retry.sh
+                 "-e", "UV_HTTP_RETRIES=0",
+                 "gaia-linux:test", "true"],
+                capture_output=True, text=True, timeout=300
+            )
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "retrying in" in result.stdout
+        assert "Installed GAIA version: 0.0.1" in result.stdout
+
+
+@pytest.mark.integration
+@pytest.mark.slow
+class TestInstallLock:
+    """Start several gaia-linux containers on one shared uv cache volume."""
+
+    def test_concurrent_containers_download_once(self, project_root, tmp_path):
+        """Replicas starting together on one cache volume should download GAIA once."""
+        subprocess.run(
+            ["docker", "build", "-t", "gaia-linux:test", "-f", "gaia-linux/Dockerfile",
+             str(project_root)],
+            check=True, capture_output=True, timeout=600
+        )
+        make_wheel(tmp_path, "amd-gaia", "0.0.1", package="gaia")
+        volume = f"gaia-uv-cache-test-{uuid.uuid4().hex[:8]}"
+        try:
+            with PyPIStub(tmp_path, IndexConfig(latency=0.5), host="0.0.0.0") as stub:
+                procs = [subprocess.Popen(
+                    ["docker", "run", "--rm", "--add-host", "host.docker.internal:host-gateway",
+                     "-v", f"{volume}:/var/cache/uv",
+                     "-e", "LEMONADE_BASE_URL=http://localhost:5000/api/v1",
+                     "-e", "GAIA_VERSION=0.0.1",
+                     "-e", f"UV_DEFAULT_INDEX={stub.index_url('host.docker.internal')}",
+                     "gaia-linux:test", "true"],
+                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                ) for _ in range(4)]
+                outputs = [proc.communicate(timeout=300)[0] for proc in procs]
+                stats = stub.stats.snapshot()
+        finally:
+            subprocess.run(["docker", "volume", "rm", "-f", volume], capture_output=True)
+        assert all(proc.returncode == 0 for proc in procs), outputs
+        assert all("Installed GAIA version: 0.0.1" in out for out in outputs)
+        assert stats["downloads"] == {"amd_gaia-0.0.1-py3-none-any.whl": 1}
+        assert sum("Holding the install lock" in out for out in outputs) == 1
+
+
+class TestWheelhouse:
+    """Test the offline wheelhouse used by the integration fixtures."""
+
+    def test_gaia_version_from_wheel(self, tmp_path):
+        """The served GAIA version is read from the amd-gaia wheel."""
+        make_wheel(tmp_path, "aiohttp", "3.9.0")
+        make_wheel(tmp_path, "amd-gaia", "0.16.0", package="gaia")
+        assert gaia_version(tmp_path) == "0.16.0"
+
+    def test_gaia_version_without_wheelhouse(self, tmp_path):
+        """A missing or GAIA-less wheelhouse means installing from PyPI."""
+        assert gaia_version(tmp_path / "missing") is None
+        make_wheel(tmp_path, "aiohttp", "3.9.0")
+        assert gaia_version(tmp_path) is None
+
+    def _download(self, wheelhouse, dest):
+        """Download GAIA and its dependencies from WHEELHOUSE only, ignoring pip's configured indexes."""
+        env = {name: value for name, value in os.environ.items() if not name.startswith("PIP_")}
+        with PyPIStub(wheelhouse) as index:
+            return subprocess.run(
+                _pip_download(index.index_url(), dest, f"amd-gaia=={gaia_version(wheelhouse)}", deps=True),
+                shell=True, capture_output=True, text=True, env={**env, "PIP_CONFIG_FILE": os.devnull},
+            )
+
+    def test_wheelhouse_installs_offline(self, tmp_path):
+        """Everything the install needs resolves from the served wheelhouse alone."""
+        wheelhouse = tmp_path / "wheelhouse"
+        wheelhouse.mkdir()
+        make_wheel(wheelhouse, "amd-gaia", "0.16.0", package="gaia",
+                   requires=["aiohttp>=3.9", "rich; extra == 'dev'"])
+        make_wheel(wheelhouse, "aiohttp", "3.9.0", requires=["yarl"])
+        make_wheel(wheelhouse, "yarl", "1.9.0")
+        result = self._download(wheelhouse, tmp_path / "dl")
+        assert result.returncode == 0, result.stderr
+        assert sorted(path.name for path in (tmp_path / "dl").iterdir()) == [
+            "aiohttp-3.9.0-py3-none-any.whl", "amd_gaia-0.16.0-py3-none-any.whl",
+            "yarl-1.9.0-py3-none-any.whl"]
+
+    def test_wheelhouse_missing_dependency_fails(self, tmp_path):
+        """A dependency the wheelhouse lacks fails the install instead of reaching PyPI."""
+        wheelhouse = tmp_path / "wheelhouse"
+        wheelhouse.mkdir()
+        make_wheel(wheelhouse, "amd-gaia", "0.16.0", package="gaia", requires=["aiohttp", "openai"])
+        make_wheel(wheelhouse, "aiohttp", "3.9.0")
+        result = self._download(wheelhouse, tmp_path / "dl")
+        assert result.returncode != 0
+        assert "openai" in result.stderr
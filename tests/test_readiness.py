@@ -0,0 +1,74 @@
+"""Tests for the container readiness wait used by the integration fixtures."""
+
+import threading
+import time
+
+import pytest
+
+from conftest import wait_for_ready
+
+
+class FakeContainer:
+    """Stand-in for a testcontainers container whose log stream is scripted."""
+
+    def __init__(self, chunks, delay=0.0, exit_code=0, block=False):
+        self.chunks = chunks
+        self.delay = delay
+        self.attrs = {"State": {"ExitCode": exit_code}}
+        self.block = block
+        self.stopped = threading.Event()
+
+    def get_wrapped_container(self):
+        return self
+
+    def logs(self, stream=False, follow=False):
+        assert stream and follow, "readiness must follow the log stream"
+        for chunk in self.chunks:
+            time.sleep(self.delay)
+            yield chunk
+        if self.block:
+            self.stopped.wait(5)
+
+    def reload(self):
+        pass
+
+
+class TestWaitForReady:
+    """Test the streaming readiness wait."""
+
+    def test_returns_when_marker_appears(self):
+        """Readiness is detected as soon as the marker line is streamed."""
+        container = FakeContainer([b"Installing...\n", b"=== Ready ===\n"], block=True)
+        start = time.monotonic()
+        elapsed = wait_for_ready(container, timeout=5)
+        container.stopped.set()
+        assert elapsed < 1
+        assert time.monotonic() - start < 1
+
+    def test_marker_split_across_chunks(self):
+        """A marker split over two chunks is still found."""
+        container = FakeContainer([b"log\n=== Re", b"ady ===\n"])
+        assert wait_for_ready(container, timeout=5) < 1
+
+    def test_measures_from_container_start(self):
+        """Time-to-ready counts from the given start time."""
+        started = time.monotonic() - 2
+        elapsed = wait_for_ready(FakeContainer([b"=== Ready ===\n"]), timeout=5, started=started)
+        assert 2 <= elapsed < 3
+
+    def test_fails_immediately_on_early_exit(self):
+        """A container that exits before Ready fails the wait without waiting for the timeout."""
+        container = FakeContainer([b"ERROR: LEMONADE_BASE_URL environment variable is required.\n"],
+                                  exit_code=1)
+        start = time.monotonic()
+        with pytest.raises(RuntimeError, match="exited with status 1") as excinfo:
+            wait_for_ready(container, timeout=30)
+        assert time.monotonic() - start < 1
+        assert "LEMONADE_BASE_URL" in str(excinfo.value)
+
+    def test_times_out(self):
+        """A container that never becomes ready times out with its log tail."""
+        container = FakeContainer([b"still installing\n"], block=True)
+        with pytest.raises(TimeoutError, match="still installing"):
+            wait_for_ready(container, timeout=0.3)
+        container.stopped.set()
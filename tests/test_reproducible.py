@@ -0,0 +1,214 @@
+"""Tests for reproducible image builds (pinned inputs, stable layer digests).
+
+Scope: the rebuild test compares the system layers, the ones built before the
+Dockerfile switches to the gaia user. The user-level layers after USER are
+not expected to reproduce: the Homebrew installer clones Homebrew/brew at its
+current HEAD, and zsh-in-docker clones oh-my-zsh and its plugins from their
+default branches. Neither offers a release tarball with a checksum to pin
+to. Differences in those layers are reported as a warning, not a failure.
+"""
+
+import io
+import json
+import os
+import re
+import subprocess
+import tarfile
+import warnings
+
+import pytest
+import yaml
+
+
+SOURCE_DATE_EPOCH = "1760486400"
+
+
+def layer_digests(oci_tar):
+    """Return [(layer digest, created_by)] for the image in an OCI tarball.
+
+    Empty layers (ENV, ARG, USER, ...) are listed with a digest of None so
+    the result lines up with the Dockerfile instructions.
+    """
+    with tarfile.open(oci_tar) as archive:
+        def blob(digest):
+            algorithm, value = digest.split(":", 1)
+            return json.load(archive.extractfile(f"blobs/{algorithm}/{value}"))
+
+        index = json.load(archive.extractfile("index.json"))
+        manifest = blob(index["manifests"][0]["digest"])
+        if "manifests" in manifest:
+            manifest = blob(manifest["manifests"][0]["digest"])
+        config = blob(manifest["config"]["digest"])
+
+    layers = iter(layer["digest"] for layer in manifest["layers"])
+    return [
+        (None if entry.get("empty_layer") else next(layers), entry.get("created_by", ""))
+        for entry in config["history"]
+    ]
+
+
+def system_layers(history):
+    """Digests of the layers built before the Dockerfile switches to the gaia user.
+
+    Everything up to USER comes from the pinned base image, the Ubuntu
+    snapshot and pinned installers; the user-level tools after it (Homebrew,
+    oh-my-zsh) install from their upstream default branches, so only these
+    layers are required to reproduce (see the module docstring).
+    """
+    layers = []
+    for digest, created_by in history:
+        if re.search(r"\bUSER\b", created_by):
+            break
+        if digest:
+            layers.append(digest)
+    return layers
+
+
+class TestLayerDigests:
+    """Test the layer digest helpers on a synthetic OCI layout."""
+
+    def test_system_layers_stop_at_user(self):
+        """Only layers created before USER are system layers."""
+        history = [
+            ("sha256:base", "/bin/sh -c #(nop) ADD file:abc in /"),
+            (None, "ARG DEBIAN_FRONTEND=noninteractive"),
+            ("sha256:apt", "RUN /bin/sh -c apt-get update"),
+            (None, "USER gaia"),
+            ("sha256:brew", "RUN /bin/sh -c brew install"),
+        ]
+        assert system_layers(history) == ["sha256:base", "sha256:apt"]
+
+    def test_layer_digests_align_with_history(self, tmp_path):
+        """Empty history entries must not consume a layer digest."""
+        blobs = {}
+
+        def add(payload):
+            data = json.dumps(payload).encode()
+            digest = f"sha256:{len(blobs):064x}"
+            blobs[digest] = data
+            return digest
+
+        config = add({"history": [
+            {"created_by": "ADD rootfs"},
+            {"created_by": "ARG X=1", "empty_layer": True},
+            {"created_by": "RUN true"},
+        ]})
+        manifest = add({"config": {"digest": config},
+                        "layers": [{"digest": "sha256:l1"}, {"digest": "sha256:l2"}]})
+        index = json.dumps({"manifests": [{"digest": manifest}]}).encode()
+
+        oci_tar = tmp_path / "image.tar"
+        with tarfile.open(oci_tar, "w") as archive:
+            for name, data in [("index.json", index)] + [
+                (f"blobs/sha256/{d.split(':', 1)[1]}", b) for d, b in blobs.items()
+            ]:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+
+        assert layer_digests(oci_tar) == [
+            ("sha256:l1", "ADD rootfs"),
+            (None, "ARG X=1"),
+            ("sha256:l2", "RUN true"),
+        ]
+
+
+class TestPinnedInputs:
+    """Test that build inputs are pinned so rebuilds install the same bits."""
+
+    @pytest.mark.parametrize("image", ["gaia-linux", "gaia-dev"])
+    def test_apt_uses_snapshot(self, project_root, image):
+        """Ubuntu packages must come from a fixed archive snapshot."""
+        content = (project_root / image / "Dockerfile").read_text()
+        assert re.search(r"ARG UBUNTU_SNAPSHOT=\d{8}T\d{6}Z", content)
+        assert 'APT::Snapshot \\"${UBUNTU_SNAPSHOT}\\"' in content
+
+    @pytest.mark.parametrize("image", ["gaia-linux", "gaia-dev"])
+    def test_nodejs_pinned(self, project_root, image):
+        """Node.js must be installed at an exact NodeSource version."""
+        content = (project_root / image / "Dockerfile").read_text()
+        assert re.search(r"ARG NODE_VERSION=\d+\.\d+\.\d+", content)
+        assert "nodejs=${NODE_VERSION}-1nodesource1" in content
+
+    @pytest.mark.parametrize("image", ["gaia-linux", "gaia-dev"])
+    def test_uv_installer_pinned(self, project_root, image):
+        """The uv installer must be fetched for a specific release."""
+        content = (project_root / image / "Dockerfile").read_text()
+        assert re.search(r"ARG UV_VERSION=\d+\.\d+\.\d+", content)
+        assert "astral.sh/uv/${UV_VERSION}/install.sh" in content
+        assert "astral.sh/uv/install.sh" not in content
+
+    @pytest.mark.parametrize("image", ["gaia-linux", "gaia-dev"])
+    def test_source_date_epoch_arg(self, project_root, image):
+        """SOURCE_DATE_EPOCH must reach RUN steps so tools stamp files with it."""
+        content = (project_root / image / "Dockerfile").read_text()
+        assert "ARG SOURCE_DATE_EPOCH" in content
+
+    def test_dev_tools_pinned(self, dockerfile_dev_path):
+        """gaia-dev must pin gh, Python and the initial Claude Code release."""
+        content = dockerfile_dev_path.read_text()
+        assert "gh=${GH_VERSION}" in content
+        assert re.search(r"ARG PYTHON_VERSION=3\.12\.\d+", content)
+        assert "uv python install ${PYTHON_VERSION}" in content
+        assert "install.sh | bash -s ${CLAUDE_CODE_VERSION}" in content
+
+    def test_workflow_normalizes_timestamps(self, workflow_file):
+        """CI builds must use the commit time and rewrite layer timestamps."""
+        content = workflow_file.read_text()
+        assert "SOURCE_DATE_EPOCH=$(git log -1 --format=%ct)" in content
+        workflow = yaml.safe_load(content)
+        for job in ("build-and-push", "build-dev"):
+            builds = [s for s in workflow["jobs"][job]["steps"]
+                      if s.get("uses", "").startswith("docker/build-push-action")]
+            assert builds
+            for step in builds:
+                assert "rewrite-timestamp=true" in step["with"]["outputs"]
+
+    def test_workflow_cache_scoped_per_image(self, workflow_file):
+        """Each image needs its own GHA cache scope so one build does not evict the other."""
+        content = workflow_file.read_text()
+        assert "cache-to: type=gha,mode=max,scope=gaia-linux" in content
+        assert "cache-to: type=gha,mode=max,scope=gaia-dev" in content
+
+
+class TestReproducibleBuild:
+    """Build gaia-linux twice from scratch and compare the system layer digests."""
+
+    def _build(self, project_root, dest):
+        result = subprocess.run(
+            ["docker", "buildx", "build", "--no-cache",
+             "--platform", "linux/amd64",
+             "--build-arg", f"SOURCE_DATE_EPOCH={SOURCE_DATE_EPOCH}",
+             "--output", f"type=oci,dest={dest},rewrite-timestamp=true",
+             "-f", "gaia-linux/Dockerfile", str(project_root)],
+            capture_output=True,
+            text=True,
+            timeout=1800,
+            env={**os.environ, "SOURCE_DATE_EPOCH": SOURCE_DATE_EPOCH},
+        )
+        assert result.returncode == 0, f"Docker build failed: {result.stderr}"
+        return layer_digests(dest)
+
+    @pytest.mark.integration
+    def test_rebuild_reproduces_system_layers(self, project_root, tmp_path):
+        """Two clean builds of the same tree must produce identical system layers.
+
+        Only layers before USER must match; user-level layers that differ
+        (unpinned Homebrew and oh-my-zsh) are listed in a warning.
+        """
+        first = self._build(project_root, tmp_path / "first.tar")
+        second = self._build(project_root, tmp_path / "second.tar")
+
+        first_layers, second_layers = system_layers(first), system_layers(second)
+        assert len(first_layers) > 1, "No layers found before USER"
+        mismatched = [
+            created_by for (digest_a, created_by), (digest_b, _) in zip(first, second)
+            if digest_a != digest_b and digest_a in first_layers
+        ]
+        assert first_layers == second_layers, f"Layers differ between builds: {mismatched}"
+        user_level = [
+            created_by for (digest_a, created_by), (digest_b, _) in zip(first, second)
+            if digest_a != digest_b and digest_a not in first_layers
+        ]
+        if user_level:
+            warnings.warn(f"User-level layers are not reproducible (not checked): {user_level}")
@@ -0,0 +1 @@
+"""Host-side helper tools for building, testing and benchmarking the GAIA containers."""
@@ -0,0 +1,117 @@
+"""In-container workload used by ``tools.bench_allocator``.
+
+Piped into ``python3 -`` inside the GAIA container. Without a command it runs
+a synthetic agent workload: threads that each keep a conversation history,
+append variable-sized messages, serialize it as a chat request would and trim
+it when it outgrows the context window. That churn of short- and long-lived
+objects across threads is what fragments malloc arenas. With ``--command`` it
+samples the resident memory of that command's process tree instead. Prints a
+single JSON document with RSS samples. Must stay dependency-free.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+
+def rss_kb(pid="self"):
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def tree_rss_kb(pid):
+    """RSS of a process and all of its descendants."""
+    total = 0
+    pending = [str(pid)]
+    while pending:
+        current = pending.pop()
+        total += rss_kb(current)
+        try:
+            with open(f"/proc/{current}/task/{current}/children") as children:
+                pending.extend(children.read().split())
+        except OSError:
+            pass
+    return total
+
+
+def agent_session(stop, seed, context_chars):
+    rng = random.Random(seed)
+    history = []
+    size = 0
+    while not stop.is_set():
+        text = "x" * rng.randint(64, 16384)
+        history.append({"role": rng.choice(("user", "assistant", "tool")), "content": text})
+        size += len(text)
+        payload = json.dumps({"model": "stub-model", "messages": history})
+        json.loads(payload)
+        while size > context_chars:
+            size -= len(history.pop(0)["content"])
+
+
+def run_synthetic(threads, duration, interval, context_chars):
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=agent_session, args=(stop, i, context_chars), daemon=True)
+        for i in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    samples = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        samples.append(rss_kb())
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return samples
+
+
+def run_command(command, duration, interval):
+    proc = subprocess.Popen(command, shell=True, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, start_new_session=True)
+    samples = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline and proc.poll() is None:
+        time.sleep(interval)
+        samples.append(tree_rss_kb(proc.pid))
+    if proc.poll() is None:
+        os.killpg(proc.pid, 15)
+        proc.wait()
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--context-chars", type=int, default=400000)
+    parser.add_argument("--command")
+    args = parser.parse_args(argv)
+
+    if args.command:
+        samples = run_command(args.command, args.duration, args.interval)
+    else:
+        samples = run_synthetic(args.threads, args.duration, args.interval, args.context_chars)
+    json.dump({
+        "interval": args.interval,
+        "samples_kb": samples,
+        "ld_preload": os.environ.get("LD_PRELOAD", ""),
+    }, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
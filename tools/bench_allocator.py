@@ -0,0 +1,123 @@
+"""Compare steady-state memory of GAIA workloads under each allocator option.
+
+Starts one container per ``GAIA_ALLOCATOR`` value, runs the same workload in
+each (a synthetic multi-threaded agent workload by default, or any long-running
+GAIA command) and reports steady-state and peak RSS. The synthetic workload
+runs without installing GAIA; with ``--command`` each container installs GAIA
+(``--gaia-version``, or the latest release, then the same version for every
+allocator) before the command starts.
+
+Usage:
+    python -m tools.bench_allocator --image gaia-linux:test
+    python -m tools.bench_allocator --image gaia-linux:test --cpus 4 --duration 300 \\
+        --command 'gaia chat --query "Summarize the README"' --gaia-version 0.16.1 --output alloc.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from tools.loadtest import container_metadata, docker, wait_until_ready
+
+ALLOCATORS = ("glibc", "glibc-arenas", "jemalloc")
+
+
+def steady_state_kb(samples, settle=0.5):
+    """Median RSS after the first ``settle`` fraction of the run."""
+    if not samples:
+        raise ValueError("no RSS samples")
+    tail = samples[int(len(samples) * settle):] or samples[-1:]
+    return statistics.median(tail)
+
+
+def summarize(samples):
+    return {
+        "samples": len(samples),
+        "steady_rss_mb": round(steady_state_kb(samples) / 1024, 1),
+        "peak_rss_mb": round(max(samples) / 1024, 1),
+        "final_rss_mb": round(samples[-1] / 1024, 1),
+    }
+
+
+def run_workload(args, allocator, gaia_version=None):
+    # Only a GAIA command needs GAIA installed; the synthetic workload does not
+    cmd = ["run", "-d", "-e", "LEMONADE_BASE_URL=http://localhost:8000/api/v1",
+           "-e", f"SKIP_INSTALL={'false' if args.command else 'true'}",
+           "-e", f"GAIA_ALLOCATOR={allocator}"]
+    if args.command and gaia_version:
+        cmd += ["-e", f"GAIA_VERSION={gaia_version}"]
+    if args.cpus:
+        cmd += ["--cpus", str(args.cpus)]
+    container = docker(*cmd, args.image, "sleep", "infinity").stdout.strip()
+    try:
+        wait_until_ready(container, args.ready_timeout)
+        workload = ["--threads", str(args.threads), "--duration", str(args.duration),
+                    "--interval", str(args.interval)]
+        if args.command:
+            workload += ["--command", args.command]
+        # zsh picks up the allocator settings the entrypoint recorded for exec sessions
+        proc = subprocess.run(
+            ["docker", "exec", "-i", container, "zsh", "-c", 'exec python3 - "$@"', "workload",
+             *workload],
+            input=(Path(__file__).parent / "alloc_workload.py").read_text(),
+            capture_output=True, text=True, check=True,
+        )
+        run = json.loads(proc.stdout)
+        if args.command:
+            run["gaia_version"] = container_metadata(container)["gaia_version"]
+        return run
+    finally:
+        docker("rm", "-f", container, check=False)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", required=True, help="GAIA image to benchmark")
+    parser.add_argument("--allocators", nargs="+", choices=ALLOCATORS, default=list(ALLOCATORS))
+    parser.add_argument("--command", help="Long-running command to measure instead of the "
+                                          "synthetic workload")
+    parser.add_argument("--gaia-version", help="GAIA version installed for --command (default: "
+                                               "latest, then the same version for every allocator)")
+    parser.add_argument("--threads", type=int, default=8,
+                        help="Threads of the synthetic workload")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds per allocator")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between samples")
+    parser.add_argument("--cpus", type=float, help="docker run --cpus for each container")
+    parser.add_argument("--ready-timeout", type=float, default=900.0)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = {}
+    gaia_version = args.gaia_version
+    for allocator in args.allocators:
+        run = run_workload(args, allocator, gaia_version)
+        if not run["samples_kb"]:
+            print(f"ERROR: no RSS samples for {allocator} (command exited?)", file=sys.stderr)
+            return 1
+        results[allocator] = {**summarize(run["samples_kb"]), "ld_preload": run["ld_preload"]}
+        gaia_version = gaia_version or run.get("gaia_version")
+
+    print(f"Workload: {args.command or f'synthetic, {args.threads} threads'}, "
+          f"{args.duration:g}s per allocator")
+    if args.command:
+        print(f"GAIA: amd-gaia {gaia_version or 'unknown'}")
+    print(f"{'allocator':<14}{'steady (MB)':>13}{'peak (MB)':>11}{'final (MB)':>12}")
+    for allocator, r in results.items():
+        print(f"{allocator:<14}{r['steady_rss_mb']:>13}{r['peak_rss_mb']:>11}{r['final_rss_mb']:>12}")
+    if args.output:
+        args.output.write_text(json.dumps({
+            "image": args.image, "command": args.command, "gaia_version": gaia_version,
+            "threads": args.threads,
+            "duration": args.duration, "cpus": args.cpus, "results": results,
+        }, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
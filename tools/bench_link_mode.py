@@ -0,0 +1,113 @@
+"""Benchmark uv link modes inside a running GAIA container.
+
+Installs the same requirement set into fresh virtual environments with each
+uv link mode, from a warm cache, and reports install time and the extra disk
+space each environment adds on top of the cache.
+
+Usage:
+    python -m tools.bench_link_mode --container gaia-dev
+    python -m tools.bench_link_mode --container gaia-linux --cache-dir /var/cache/uv --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+DEFAULT_REQUIREMENT = "amd-gaia[dev,mcp,eval,rag]"
+MODES = ("copy", "hardlink", "clone")
+BENCH_ROOT = "/tmp/gaia-link-bench"
+
+
+def container_shell(container, script, check=True):
+    """Run a bash script as the container's default user."""
+    return subprocess.run(
+        ["docker", "exec", container, "bash", "-c", script],
+        check=check, capture_output=True, text=True,
+    )
+
+
+def disk_usage_kb(container, *paths):
+    """Apparent disk usage with hardlinked files counted once across paths."""
+    out = container_shell(container, "du -skc " + " ".join(paths) + " | tail -1").stdout
+    return int(out.split()[0])
+
+
+def time_install(container, mode, requirement, cache_dir, python):
+    venv = f"{BENCH_ROOT}/{mode}"
+    script = f"""
+        set -e
+        rm -rf {venv}
+        uv venv --quiet --python {python} {venv}
+        start=$(date +%s%N)
+        uv pip install --quiet --python {venv}/bin/python --cache-dir {cache_dir} \\
+            --link-mode {mode} '{requirement}'
+        end=$(date +%s%N)
+        echo $(( (end - start) / 1000000 ))
+    """
+    result = container_shell(container, script, check=False)
+    if result.returncode != 0:
+        return None
+    return int(result.stdout.strip().splitlines()[-1]) / 1000.0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--container", required=True, help="Running GAIA container to benchmark in")
+    parser.add_argument("--requirement", default=DEFAULT_REQUIREMENT,
+                        help=f"Requirement to install (default: {DEFAULT_REQUIREMENT})")
+    parser.add_argument("--cache-dir", default=f"{BENCH_ROOT}/cache",
+                        help="uv cache directory inside the container; point it at a mounted "
+                             "volume to measure the cross-filesystem case")
+    parser.add_argument("--python", default="python3", help="Interpreter for the test venvs")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed installs per mode")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Warm the cache so every timed run measures linking, not downloading
+    warm = time_install(args.container, "copy", args.requirement, args.cache_dir, args.python)
+    if warm is None:
+        print(f"ERROR: could not install {args.requirement} in {args.container}", file=sys.stderr)
+        return 1
+    cache_kb = disk_usage_kb(args.container, args.cache_dir)
+
+    results = {}
+    for mode in MODES:
+        times = [time_install(args.container, mode, args.requirement, args.cache_dir, args.python)
+                 for _ in range(args.repeat)]
+        if None in times:
+            results[mode] = {"supported": False}
+            continue
+        total_kb = disk_usage_kb(args.container, args.cache_dir, f"{BENCH_ROOT}/{mode}")
+        results[mode] = {
+            "supported": True,
+            "median_s": round(statistics.median(times), 3),
+            "min_s": round(min(times), 3),
+            "extra_disk_mb": round((total_kb - cache_kb) / 1024, 1),
+        }
+    container_shell(args.container, f"rm -rf {BENCH_ROOT}/copy {BENCH_ROOT}/hardlink {BENCH_ROOT}/clone",
+                    check=False)
+
+    if args.json:
+        print(json.dumps({"requirement": args.requirement, "cache_dir": args.cache_dir,
+                          "results": results}, indent=2))
+        return 0
+
+    print(f"Requirement: {args.requirement}")
+    print(f"Cache:       {args.cache_dir} ({cache_kb / 1024:.1f} MB)")
+    print(f"{'mode':<10}{'median (s)':>12}{'min (s)':>10}{'extra disk (MB)':>18}")
+    for mode, r in results.items():
+        if not r["supported"]:
+            print(f"{mode:<10}{'unsupported':>12}")
+            continue
+        print(f"{mode:<10}{r['median_s']:>12}{r['min_s']:>10}{r['extra_disk_mb']:>18}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Measure the memory footprint of the GAIA images and check it against a baseline.
+
+For each image, starts a container, waits until it is ready and idle, and
+records three metrics:
+
+- ``idle_mb``: the container's memory as ``docker stats`` reports it, i.e.
+  usage without reclaimable page cache.
+- ``import_gaia_mb``: the peak RSS of ``python3 -c 'import gaia'``.
+- ``gaia_help_mb``: the peak RSS of ``gaia --help``.
+
+Each command runs several times and the median is kept. The results are
+compared with ``tools/memory_baseline.json``. A metric fails when it exceeds
+its baseline by more than the larger of ``tolerance_mb`` and ``tolerance_pct``,
+and so does a metric with no baseline recorded.
+Memory per replica bounds how many GAIA containers fit on a node, so growth
+beyond the tolerance fails the run, whether it comes from a GAIA release or a
+base image update. Record an intended change with ``--update-baseline``.
+
+Usage:
+    python -m tools.bench_memory --image gaia-linux=gaia-linux:test --image gaia-dev=gaia-dev:test
+    python -m tools.bench_memory --image gaia-linux=itomek/gaia-linux:1.0.1 --output memory.json
+    python -m tools.bench_memory --image gaia-linux=gaia-linux:test --update-baseline
+    python -m tools.bench_memory --check-recorded    # exit 1 while a metric has no baseline
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from tools.loadtest import container_metadata, docker, wait_until_ready
+
+BASELINE = Path(__file__).resolve().parent / "memory_baseline.json"
+METRICS = ("idle_mb", "import_gaia_mb", "gaia_help_mb")
+# gaia-dev has no GAIA installed until the first-time setup links the clone
+SETUP = {
+    "gaia-dev": "cd /home/gaia/gaia && uv pip install --quiet -e .",
+}
+# Peak RSS of the command in argv, in KB (ru_maxrss of the waited-for child)
+MEASURE = (
+    "import resource, subprocess, sys\n"
+    "subprocess.run(sys.argv[1:], stdout=subprocess.DEVNULL, check=True)\n"
+    "print(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)\n"
+)
+UNITS = {"B": 1, "KIB": 1024, "MIB": 1024 ** 2, "GIB": 1024 ** 3,
+         "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3}
+
+
+def parse_size(text):
+    """Bytes from a docker stats size such as "45.3MiB"."""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([A-Za-z]+)\s*", text)
+    if not match or match[2].upper() not in UNITS:
+        raise ValueError(f"unrecognized size {text!r}")
+    return float(match[1]) * UNITS[match[2].upper()]
+
+
+def container_memory_mb(container):
+    usage = docker("stats", "--no-stream", "--format", "{{.MemUsage}}", container).stdout
+    return round(parse_size(usage.split("/")[0]) / 1024 ** 2, 1)
+
+
+def peak_rss_mb(container, command, runs):
+    """Median peak RSS of COMMAND (argv list) over RUNS runs inside CONTAINER."""
+    samples = []
+    for _ in range(runs):
+        out = docker("exec", container, "python3", "-c", MEASURE, *command).stdout
+        samples.append(int(out.strip()) / 1024)
+    return round(statistics.median(samples), 1)
+
+
+def measure_image(name, image, runs=3, settle=10.0, ready_timeout=900.0):
+    """Start IMAGE, let it settle and return its metrics and GAIA version."""
+    container = docker(
+        "run", "-d", "-e", "LEMONADE_BASE_URL=http://localhost:8000/api/v1",
+        image, "sleep", "infinity",
+    ).stdout.strip()
+    try:
+        wait_until_ready(container, ready_timeout)
+        if name in SETUP:
+            docker("exec", container, "bash", "-c", SETUP[name])
+        time.sleep(settle)
+        result = {"idle_mb": container_memory_mb(container)}
+        result["import_gaia_mb"] = peak_rss_mb(container, ["python3", "-c", "import gaia"], runs)
+        result["gaia_help_mb"] = peak_rss_mb(container, ["gaia", "--help"], runs)
+        result["gaia_version"] = container_metadata(container)["gaia_version"]
+        return result
+    finally:
+        docker("rm", "-f", container, check=False)
+
+
+def compare(results, baseline):
+    """One row per image and metric: measured, baseline, limit and status.
+
+    The status is "ok", "regression" (above the limit), "improved" (below the
+    baseline by more than the tolerance, so the baseline should be lowered) or
+    "new" (no baseline recorded).
+    """
+    rows = []
+    for name, measured in results.items():
+        expected = baseline.get("images", {}).get(name, {})
+        for metric in METRICS:
+            value, base = measured[metric], expected.get(metric)
+            row = {"image": name, "metric": metric, "measured": value, "baseline": base,
+                   "limit": None, "status": "new"}
+            if base is not None:
+                tolerance = max(baseline["tolerance_mb"], base * baseline["tolerance_pct"] / 100)
+                row["limit"] = round(base + tolerance, 1)
+                if value > base + tolerance:
+                    row["status"] = "regression"
+                elif value < base - tolerance:
+                    row["status"] = "improved"
+                else:
+                    row["status"] = "ok"
+            rows.append(row)
+    return rows
+
+
+def unrecorded(baseline):
+    """"image metric" for every metric of BASELINE without a recorded value."""
+    return [f"{name} {metric}" for name, values in baseline.get("images", {}).items()
+            for metric in METRICS if values.get(metric) is None]
+
+
+def update_baseline(baseline, results):
+    """BASELINE with the measured metrics and GAIA versions of RESULTS."""
+    images = dict(baseline.get("images", {}))
+    for name, measured in results.items():
+        images[name] = {"gaia_version": measured.get("gaia_version"),
+                        **{metric: measured[metric] for metric in METRICS}}
+    return {**baseline, "images": images}
+
+
+def _mb(value):
+    return "-" if value is None else f"{value} MB"
+
+
+def format_report(rows, results, baseline):
+    lines = [f"{'Image':<12} {'Metric':<16} {'Measured':>10} {'Baseline':>10} {'Limit':>10}  Status"]
+    for row in rows:
+        status = row["status"].upper() if row["status"] == "regression" else row["status"]
+        lines.append(f"{row['image']:<12} {row['metric']:<16} {_mb(row['measured']):>10} "
+                     f"{_mb(row['baseline']):>10} {_mb(row['limit']):>10}  {status}")
+    for name, measured in results.items():
+        recorded = baseline.get("images", {}).get(name, {}).get("gaia_version")
+        lines.append(f"{name}: amd-gaia {measured.get('gaia_version') or 'unknown'}"
+                     + (f" (baseline recorded with {recorded})" if recorded else ""))
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", action="append", metavar="NAME=IMAGE",
+                        help="Image to measure, e.g. gaia-linux=gaia-linux:test (repeatable)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per command (median kept)")
+    parser.add_argument("--settle", type=float, default=10.0,
+                        help="Seconds to let a ready container go idle before measuring")
+    parser.add_argument("--ready-timeout", type=float, default=900.0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write the measurements to the baseline instead of checking them")
+    parser.add_argument("--output", type=Path, help="Write measurements and comparison as JSON")
+    parser.add_argument("--check-recorded", action="store_true",
+                        help="Only check that the baseline has a value for every metric")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    baseline = json.loads(args.baseline.read_text())
+    if args.check_recorded:
+        missing = unrecorded(baseline)
+        if missing:
+            print(f"No baseline recorded for: {', '.join(missing)}")
+        return 1 if missing else 0
+    if not args.image:
+        parser.error("--image is required")
+    results = {}
+    for spec in args.image:
+        name, _, image = spec.partition("=")
+        if not image:
+            raise SystemExit(f"--image expects NAME=IMAGE, got {spec!r}")
+        results[name] = measure_image(name, image, args.runs, args.settle, args.ready_timeout)
+
+    rows = compare(results, baseline)
+    print(format_report(rows, results, baseline))
+    if args.output:
+        args.output.write_text(json.dumps({"results": results, "comparison": rows}, indent=2) + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(update_baseline(baseline, results), indent=2) + "\n")
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    regressions = [row for row in rows if row["status"] == "regression"]
+    for row in regressions:
+        print(f"MEMORY REGRESSION: {row['image']} {row['metric']} is {row['measured']} MB, "
+              f"limit {row['limit']} MB (baseline {row['baseline']} MB)", file=sys.stderr)
+    # A metric without a baseline cannot be checked: fail rather than pass unchecked
+    missing = [row for row in rows if row["status"] == "new"]
+    for row in missing:
+        print(f"NO BASELINE: {row['image']} {row['metric']} is {row['measured']} MB; "
+              f"record it with --update-baseline", file=sys.stderr)
+    return 1 if regressions or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
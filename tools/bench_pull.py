@@ -0,0 +1,167 @@
+"""Measure pull-to-ready time of the gzip, zstd and eStargz image variants.
+
+Starts a local registry container, builds the image once per layer
+compression and pushes each variant to it, then for each variant removes the
+local copy, pulls it and starts a container, timing until the entrypoint
+prints "Ready". With ``--client nerdctl --snapshotter stargz`` the eStargz
+variant is lazily pulled: the container starts while layers are still being
+fetched, beginning with the files in ``--record``. Layers the host already
+has (e.g. from a local ubuntu:24.04) are not downloaded again by any variant,
+so absolute numbers are only meaningful on a clean host.
+
+Usage:
+    python -m tools.bench_pull --dockerfile gaia-linux/Dockerfile
+    python -m tools.bench_pull --dockerfile gaia-linux/Dockerfile --variants gzip estargz \\
+        --client nerdctl --snapshotter stargz --record startup.record --output pull.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from tools.loadtest import READY_MARKER, docker
+
+VARIANTS = ("gzip", "zstd", "estargz")
+REGISTRY_IMAGE = "registry:2"
+BUILDER = "gaia-bench-pull"
+DEFAULT_ENV = ("LEMONADE_BASE_URL=http://localhost:8000/api/v1", "SKIP_INSTALL=true")
+
+
+def output_spec(ref, variant):
+    """buildx --output pushing REF with VARIANT layer compression."""
+    return (f"type=image,name={ref},push=true,registry.insecure=true,"
+            f"compression={variant},force-compression=true,oci-mediatypes=true")
+
+
+def summarize(results):
+    """Add each variant's time relative to the gzip baseline."""
+    baseline = results.get("gzip", {}).get("pull_to_ready_s")
+    for result in results.values():
+        if baseline:
+            result["vs_gzip"] = round(result["pull_to_ready_s"] / baseline, 3)
+    return results
+
+
+def _run(*cmd, **kwargs):
+    return subprocess.run(list(cmd), check=True, capture_output=True, text=True, **kwargs)
+
+
+def start_registry():
+    """Start a throwaway registry on a free localhost port; return (container, host:port)."""
+    container = docker("run", "-d", "-p", "127.0.0.1::5000", REGISTRY_IMAGE).stdout.strip()
+    port = docker("port", container, "5000/tcp").stdout.split(":")[-1].strip()
+    return container, f"localhost:{port}"
+
+
+def ensure_builder():
+    """A BuildKit builder on the host network, so it can push to the local registry."""
+    if docker("buildx", "inspect", BUILDER, check=False).returncode != 0:
+        docker("buildx", "create", "--name", BUILDER, "--driver", "docker-container",
+                "--driver-opt", "network=host")
+
+
+def push_variants(args, registry):
+    """Push every requested variant; return {variant: image reference}."""
+    name = Path(args.dockerfile).parent.name or "gaia"
+    refs = {}
+    for variant in args.variants:
+        ref = f"{registry}/{name}:{variant}"
+        if variant == "estargz" and args.record:
+            # Prioritized files need nerdctl's converter; start from a gzip push
+            source = refs.get("gzip")
+            if not source:
+                source = f"{registry}/{name}:gzip-source"
+                _build(args, source, "gzip")
+            nerdctl = ["nerdctl", "--insecure-registry"]
+            _run(*nerdctl, "pull", source)
+            _run(*nerdctl, "image", "convert", "--estargz", "--oci",
+                 "--estargz-record-in", str(args.record), source, ref)
+            _run(*nerdctl, "push", ref)
+        else:
+            _build(args, ref, variant)
+        refs[variant] = ref
+    return refs
+
+
+def _build(args, ref, variant):
+    print(f"Building {variant} variant ({ref})...", file=sys.stderr)
+    docker("buildx", "build", "--builder", BUILDER, "--output", output_spec(ref, variant),
+            "-f", str(args.dockerfile), str(args.context))
+
+
+def _client(args, *cmd, check=True):
+    base = [args.client]
+    if args.client == "nerdctl":
+        base += ["--insecure-registry", "--snapshotter", args.snapshotter]
+    return subprocess.run(base + list(cmd), check=check, capture_output=True, text=True)
+
+
+def pull_to_ready(args, ref):
+    """Seconds from pulling REF on an empty cache to the entrypoint printing Ready."""
+    _client(args, "rmi", "-f", ref, check=False)
+    run = ["run", "-d"]
+    for item in args.env or DEFAULT_ENV:
+        run += ["-e", item]
+
+    start = time.monotonic()
+    _client(args, "pull", ref)
+    pulled = time.monotonic() - start
+    container = _client(args, *run, ref, "sleep", "infinity").stdout.strip()
+    try:
+        deadline = start + args.ready_timeout
+        while READY_MARKER not in _client(args, "logs", container, check=False).stdout:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{ref} did not become ready within {args.ready_timeout}s")
+            time.sleep(0.2)
+        ready = time.monotonic() - start
+    finally:
+        _client(args, "rm", "-f", container, check=False)
+    return {"pull_s": round(pulled, 2), "pull_to_ready_s": round(ready, 2)}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dockerfile", type=Path, required=True, help="Dockerfile to build")
+    parser.add_argument("--context", type=Path, default=Path("."), help="Build context")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--record", type=Path,
+                        help="Startup record (tools.startup_record) to prioritize in eStargz")
+    parser.add_argument("--client", choices=("docker", "nerdctl"), default="docker",
+                        help="Client that pulls and runs the variants")
+    parser.add_argument("--snapshotter", default="overlayfs",
+                        help="nerdctl snapshotter (stargz for lazy pulling)")
+    parser.add_argument("-e", "--env", action="append", default=[], metavar="NAME=VALUE",
+                        help=f"Container environment (default: {' '.join(DEFAULT_ENV)})")
+    parser.add_argument("--ready-timeout", type=float, default=600.0)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    ensure_builder()
+    registry, address = start_registry()
+    try:
+        refs = push_variants(args, address)
+        results = summarize({variant: pull_to_ready(args, ref) for variant, ref in refs.items()})
+    finally:
+        docker("rm", "-f", registry, check=False)
+
+    print(f"Image: {args.dockerfile}, client: {args.client}"
+          + (f" ({args.snapshotter})" if args.client == "nerdctl" else ""))
+    print(f"{'variant':<10}{'pull (s)':>10}{'pull-to-ready (s)':>19}{'vs gzip':>9}")
+    for variant, r in results.items():
+        print(f"{variant:<10}{r['pull_s']:>10}{r['pull_to_ready_s']:>19}{r.get('vs_gzip', '-'):>9}")
+    if args.output:
+        args.output.write_text(json.dumps({
+            "dockerfile": str(args.dockerfile), "client": args.client,
+            "snapshotter": args.snapshotter, "results": results,
+        }, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Compare GAIA startup and CPU-bound speed on Ubuntu's and uv's Python.
+
+gaia-linux installs GAIA into uv's standalone CPython build (PGO and LTO
+optimized) and keeps Ubuntu's ``python3`` for its helper scripts. This starts
+one container per interpreter (``GAIA_BASE_PYTHON``), installs the same GAIA
+version into each, runs ``tools/python_workload.py`` with that interpreter and
+reports the median time of each measurement and the speedup.
+
+Usage:
+    python -m tools.bench_python --image gaia-linux:test
+    python -m tools.bench_python --image gaia-linux:test --gaia-version 0.16.1 --runs 9 \\
+        --cpus 2 --output python.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from tools.loadtest import container_metadata, docker, wait_until_ready
+
+# uv first: GAIA's version is read with the image's default python3, which is
+# uv's, and the ubuntu container then installs the same version
+INTERPRETERS = {
+    "uv": "/opt/python/current/bin/python3",
+    "ubuntu": "/usr/bin/python3",
+}
+
+
+def optimizations(config_args):
+    """The build optimizations named in sysconfig's CONFIG_ARGS."""
+    flags = {"--enable-optimizations": "PGO", "--with-lto": "LTO"}
+    return [name for flag, name in flags.items() if flag in config_args]
+
+
+def run_workload(args, interpreter, gaia_version=None):
+    cmd = ["run", "-d", "-e", "LEMONADE_BASE_URL=http://localhost:8000/api/v1",
+           "-e", f"GAIA_BASE_PYTHON={INTERPRETERS[interpreter]}"]
+    if gaia_version:
+        cmd += ["-e", f"GAIA_VERSION={gaia_version}"]
+    if args.cpus:
+        cmd += ["--cpus", str(args.cpus)]
+    container = docker(*cmd, args.image, "sleep", "infinity").stdout.strip()
+    try:
+        wait_until_ready(container, args.ready_timeout)
+        # zsh picks up the settings the entrypoint recorded for exec sessions
+        proc = subprocess.run(
+            ["docker", "exec", "-i", container, "zsh", "-c", 'exec "$0" - "$@"',
+             INTERPRETERS[interpreter], "--runs", str(args.runs)],
+            input=(Path(__file__).parent / "python_workload.py").read_text(),
+            capture_output=True, text=True, check=True,
+        )
+        run = json.loads(proc.stdout)
+        run["gaia_version"] = container_metadata(container)["gaia_version"]
+        return run
+    finally:
+        docker("rm", "-f", container, check=False)
+
+
+def speedups(baseline, candidate):
+    """baseline/candidate time ratio per measurement (> 1 means candidate is faster)."""
+    return {name: round(seconds / candidate[name], 2) if candidate.get(name) else None
+            for name, seconds in baseline.items()}
+
+
+def format_report(runs, ratios):
+    ubuntu, uv = runs["ubuntu"], runs["uv"]
+    lines = [
+        f"ubuntu: Python {ubuntu['version']} ({', '.join(optimizations(ubuntu['config_args'])) or 'no PGO/LTO'})",
+        f"uv:     Python {uv['version']} ({', '.join(optimizations(uv['config_args'])) or 'no PGO/LTO'})",
+        f"GAIA:   amd-gaia {uv.get('gaia_version') or 'unknown'}",
+        f"{'measurement':<20}{'ubuntu (s)':>12}{'uv (s)':>10}{'speedup':>10}",
+    ]
+    for name, ratio in ratios.items():
+        lines.append(f"{name.removesuffix('_s'):<20}{ubuntu['results'][name]:>12}"
+                     f"{uv['results'][name]:>10}{'-' if ratio is None else f'{ratio}x':>10}")
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", required=True, help="gaia-linux image to benchmark")
+    parser.add_argument("--gaia-version", help="GAIA version to install (default: latest, "
+                                               "then the same version for both interpreters)")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement (median kept)")
+    parser.add_argument("--cpus", type=float, help="docker run --cpus for each container")
+    parser.add_argument("--ready-timeout", type=float, default=900.0)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    runs = {}
+    gaia_version = args.gaia_version
+    for interpreter in INTERPRETERS:
+        runs[interpreter] = run_workload(args, interpreter, gaia_version)
+        gaia_version = gaia_version or runs[interpreter]["gaia_version"]
+
+    ratios = speedups(runs["ubuntu"]["results"], runs["uv"]["results"])
+    print(format_report(runs, ratios))
+    if args.output:
+        args.output.write_text(json.dumps({
+            "image": args.image, "runs": args.runs, "cpus": args.cpus,
+            "interpreters": runs, "speedup": ratios,
+        }, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""Compare two GAIA images layer by layer and file by file.
+
+Reads each image from a ``docker save`` / OCI tarball, or from a local tag
+(streamed from ``docker save`` without writing it to disk), in a single pass
+over the archive: layer tars are listed as they stream by and never unpacked.
+Reports which layers the new image adds (what an upgrade actually pulls, with
+the Dockerfile instruction that created each) and the added, removed, grown
+and shrunk paths of the final filesystems ranked by bytes. Layer sizes are
+uncompressed, as unpacked on disk: the registry transfers them compressed.
+
+Usage:
+    python -m tools.image_diff itomek/gaia-linux:1.0.0 gaia-linux:test
+    python -m tools.image_diff old.tar new.tar --top 50 --depth 2 --output diff.json
+"""
+
+import argparse
+import io
+import json
+import posixpath
+import subprocess
+import sys
+import tarfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Archive members up to this size are kept in memory until the index tells
+# whether they are configs, manifests or (small) layers; larger ones are
+# listed as layers while they stream by
+SMALL_MEMBER = 4 * 1024 * 1024
+WHITEOUT = ".wh."
+OPAQUE = ".wh..wh..opq"
+
+
+@dataclass
+class Layer:
+    """One image layer: identity, uncompressed size and the entries it adds or deletes."""
+
+    diff_id: str
+    size: int
+    created_by: str = ""
+    files: dict = field(default_factory=dict)
+    whiteouts: list = field(default_factory=list)
+    opaque_dirs: list = field(default_factory=list)
+
+
+@dataclass
+class Image:
+    name: str
+    layers: list
+
+    def filesystem(self):
+        """Final {path: size} after applying the layers and their whiteouts in order."""
+        fs = {}
+        for layer in self.layers:
+            for directory in layer.opaque_dirs:
+                _remove_tree(fs, directory, keep_self=True)
+            for path in layer.whiteouts:
+                _remove_tree(fs, path)
+            fs.update(layer.files)
+        return fs
+
+
+def _remove_tree(fs, path, keep_self=False):
+    prefix = path.rstrip("/") + "/"
+    for existing in [p for p in fs if p.startswith(prefix) or (p == path and not keep_self)]:
+        del fs[existing]
+
+
+def _normalize(name):
+    return posixpath.normpath("/" + name)
+
+
+def list_layer(fileobj):
+    """Stream a (possibly compressed) layer tar.
+
+    Returns (files, whiteouts, opaque_dirs, size), size being the uncompressed
+    length of the tar whether or not the blob was compressed.
+    """
+    files, whiteouts, opaque_dirs = {}, [], []
+    with tarfile.open(fileobj=fileobj, mode="r|*") as layer:
+        for entry in layer:
+            path = _normalize(entry.name)
+            directory, base = posixpath.split(path)
+            if base == OPAQUE:
+                opaque_dirs.append(directory)
+            elif base.startswith(WHITEOUT):
+                whiteouts.append(posixpath.join(directory, base[len(WHITEOUT):]))
+            elif not entry.isdir():
+                files[path] = entry.size if entry.isfile() else 0
+        size = layer.offset
+    return files, whiteouts, opaque_dirs, size
+
+
+class _Prefixed(io.RawIOBase):
+    """Read-only stream of HEAD followed by the rest of FILEOBJ."""
+
+    def __init__(self, head, fileobj):
+        self._head = head
+        self._fileobj = fileobj
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._head:
+            n = min(len(buffer), len(self._head))
+            buffer[:n], self._head = self._head[:n], self._head[n:]
+            return n
+        data = self._fileobj.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def read_archive(fileobj, name):
+    """Read an image from a docker-save or OCI layout tar stream in one pass."""
+    small, listed = {}, {}
+    with tarfile.open(fileobj=fileobj, mode="r|") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            key = member.name.removeprefix("./")
+            data = archive.extractfile(member)
+            head = data.read(1)
+            # JSON documents (manifests, configs) are kept whatever their size
+            if member.size <= SMALL_MEMBER or head in (b"{", b"["):
+                small[key] = head + data.read()
+                continue
+            try:
+                listed[key] = list_layer(io.BufferedReader(_Prefixed(head, data)))
+            except tarfile.ReadError:
+                pass
+
+    config_path, layer_paths = _find_manifest(small)
+    config = json.loads(small[config_path])
+    diff_ids = config.get("rootfs", {}).get("diff_ids", [])
+    history = [h.get("created_by", "") for h in config.get("history", [])
+               if not h.get("empty_layer")]
+
+    layers = []
+    for index, path in enumerate(layer_paths):
+        if path not in listed:
+            listed[path] = list_layer(io.BytesIO(small[path]))
+        files, whiteouts, opaque_dirs, size = listed[path]
+        layers.append(Layer(
+            diff_id=diff_ids[index] if index < len(diff_ids) else path,
+            size=size,
+            created_by=history[index] if index < len(history) else "",
+            files=files, whiteouts=whiteouts, opaque_dirs=opaque_dirs,
+        ))
+    return Image(name, layers)
+
+
+def _blob_path(digest):
+    algorithm, value = digest.split(":", 1)
+    return f"blobs/{algorithm}/{value}"
+
+
+def _find_manifest(small):
+    """(config path, [layer paths]) from manifest.json or an OCI index.json."""
+    if "manifest.json" in small:
+        manifest = json.loads(small["manifest.json"])[0]
+        return manifest["Config"], manifest["Layers"]
+    if "index.json" not in small:
+        raise ValueError("archive has neither manifest.json nor index.json")
+    manifest = json.loads(small[_blob_path(json.loads(small["index.json"])["manifests"][0]["digest"])])
+    while "manifests" in manifest:
+        manifest = json.loads(small[_blob_path(manifest["manifests"][0]["digest"])])
+    return (_blob_path(manifest["config"]["digest"]),
+            [_blob_path(layer["digest"]) for layer in manifest["layers"]])
+
+
+def load_image(source):
+    """Read SOURCE, a tarball path or a local image reference streamed from docker save."""
+    if Path(source).is_file():
+        with open(source, "rb") as f:
+            return read_archive(f, source)
+    proc = subprocess.Popen(["docker", "save", source], stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE)
+    try:
+        image = read_archive(proc.stdout, source)
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read().decode()
+        proc.wait()
+    if proc.returncode != 0:
+        raise RuntimeError(f"docker save {source} failed: {stderr.strip()}")
+    return image
+
+
+def diff_images(old, new, top=20, depth=3):
+    """Layer and file differences between two images, ranked by bytes."""
+    old_ids = {layer.diff_id for layer in old.layers}
+    new_layers = [layer for layer in new.layers if layer.diff_id not in old_ids]
+    old_fs, new_fs = old.filesystem(), new.filesystem()
+
+    added = {p: s for p, s in new_fs.items() if p not in old_fs}
+    removed = {p: s for p, s in old_fs.items() if p not in new_fs}
+    changed = {p: new_fs[p] - old_fs[p] for p in new_fs.keys() & old_fs.keys()
+               if new_fs[p] != old_fs[p]}
+    grown = {p: d for p, d in changed.items() if d > 0}
+    shrunk = {p: d for p, d in changed.items() if d < 0}
+
+    directories = {}
+    for paths, sign in ((added, 1), (removed, -1), (changed, 1)):
+        for path, size in paths.items():
+            key = "/".join(path.split("/")[:depth + 1]) or "/"
+            directories[key] = directories.get(key, 0) + sign * size
+
+    def ranked(paths, count=top):
+        return [{"path": p, "bytes": s}
+                for p, s in sorted(paths.items(), key=lambda item: (-abs(item[1]), item[0]))[:count]]
+
+    return {
+        "old": old.name,
+        "new": new.name,
+        "layers": {
+            "old": len(old.layers),
+            "new": len(new.layers),
+            "shared": len(new.layers) - len(new_layers),
+            "uncompressed_bytes": sum(layer.size for layer in new_layers),
+            "added": [{"diff_id": layer.diff_id, "bytes": layer.size,
+                       "created_by": layer.created_by,
+                       "top_files": ranked(layer.files, 5)} for layer in new_layers],
+        },
+        "files": {
+            "added": {"count": len(added), "bytes": sum(added.values()), "top": ranked(added)},
+            "removed": {"count": len(removed), "bytes": sum(removed.values()),
+                        "top": ranked(removed)},
+            "grown": {"count": len(grown), "bytes": sum(grown.values()), "top": ranked(grown)},
+            "shrunk": {"count": len(shrunk), "bytes": sum(shrunk.values()), "top": ranked(shrunk)},
+        },
+        "directories": ranked({d: b for d, b in directories.items() if b}),
+        "net_bytes": sum(new_fs.values()) - sum(old_fs.values()),
+    }
+
+
+def human(size, signed=True):
+    """Byte count for reports, e.g. "+12.3 MiB"."""
+    value, text = abs(size), None
+    for unit in ("KiB", "MiB", "GiB"):
+        if value < 1024:
+            break
+        value /= 1024
+        text = f"{value:.1f} {unit}"
+    text = text or f"{abs(size)} B"
+    return (("-" if size < 0 else "+") + text) if signed else text
+
+
+def print_report(diff):
+    layers = diff["layers"]
+    print(f"Image diff: {diff['old']} -> {diff['new']}")
+    print(f"Layers: {layers['old']} -> {layers['new']}, {layers['shared']} shared; "
+          f"upgrade pulls {len(layers['added'])} layer(s), "
+          f"{human(layers['uncompressed_bytes'], signed=False)} uncompressed")
+    for layer in layers["added"]:
+        print(f"  {human(layer['bytes']):>12}  {layer['created_by'][:100] or layer['diff_id']}")
+        for f in layer["top_files"]:
+            print(f"  {'':>12}    {human(f['bytes']):>12}  {f['path']}")
+    print(f"Filesystem: {human(diff['net_bytes'])} net")
+    for kind, sign in (("added", 1), ("removed", -1), ("grown", 1), ("shrunk", 1)):
+        files = diff["files"][kind]
+        if not files["count"]:
+            continue
+        print(f"{kind.capitalize()}: {files['count']} path(s), {human(sign * files['bytes'])}")
+        for f in files["top"]:
+            print(f"  {human(sign * f['bytes']):>12}  {f['path']}")
+    if diff["directories"]:
+        print("By directory:")
+        for d in diff["directories"]:
+            print(f"  {human(d['bytes']):>12}  {d['path']}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old", help="Old image: local reference or saved tarball")
+    parser.add_argument("new", help="New image: local reference or saved tarball")
+    parser.add_argument("--top", type=int, default=20, help="Paths listed per category")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="Directory depth for the per-directory totals")
+    parser.add_argument("--output", type=Path, help="Write the diff as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    diff = diff_images(load_image(args.old), load_image(args.new), args.top, args.depth)
+    print_report(diff)
+    if args.output:
+        args.output.write_text(json.dumps(diff, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""Lightweight OpenAI-compatible stand-in for a Lemonade server.
+
+Serves the subset of the Lemonade API that GAIA talks to under ``/api/v1``
+with configurable latency, token streaming rate and error injection, so GAIA
+can be exercised under load without a real model server.
+
+Usage:
+    python -m tools.lemonade_stub --port 8000 --latency 0.05 --tokens-per-second 200
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_PREFIX = "/api/v1"
+
+
+@dataclass
+class StubConfig:
+    """Behaviour knobs for the stand-in server."""
+
+    model: str = "stub-model"
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    tokens_per_second: float = 0.0
+    response_tokens: int = 16
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: int | None = None
+
+
+class StubStats:
+    """Thread-safe request counters exposed at ``/stub/stats``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.completions = 0
+        self.errors = 0
+
+    def record(self, completion=False, error=False):
+        with self._lock:
+            self.requests += 1
+            self.completions += int(completion)
+            self.errors += int(error)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "completions": self.completions,
+                "errors": self.errors,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "LemonadeStub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        if self.path == "/stub/stats":
+            self._send_json(200, stub.stats.snapshot())
+            return
+        stub.stats.record()
+        if self.path == f"{API_PREFIX}/health":
+            self._send_json(200, {"status": "ok", "model_loaded": stub.config.model})
+        elif self.path == f"{API_PREFIX}/models":
+            self._send_json(200, {
+                "object": "list",
+                "data": [{"id": stub.config.model, "object": "model", "owned_by": "stub"}],
+            })
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path: {self.path}"}})
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            stub.stats.record(error=True)
+            self._send_json(400, {"error": {"message": "Request body is not valid JSON"}})
+            return
+
+        if self.path in (f"{API_PREFIX}/load", f"{API_PREFIX}/unload", f"{API_PREFIX}/pull"):
+            stub.stats.record()
+            self._send_json(200, {"status": "success"})
+            return
+        if self.path not in (f"{API_PREFIX}/chat/completions", f"{API_PREFIX}/completions"):
+            stub.stats.record()
+            self._send_json(404, {"error": {"message": f"Unknown path: {self.path}"}})
+            return
+
+        if stub.should_fail():
+            stub.stats.record(completion=True, error=True)
+            self._send_json(stub.config.error_status, {
+                "error": {"message": "Injected failure", "type": "stub_error"},
+            })
+            return
+
+        stub.stats.record(completion=True)
+        time.sleep(stub.first_token_delay())
+        chat = self.path.endswith("/chat/completions")
+        if body.get("stream"):
+            self._stream(chat, body)
+        else:
+            self._complete(chat, body)
+
+    def _complete(self, chat, body):
+        stub = self.server.stub
+        tokens = stub.tokens(body)
+        time.sleep(len(tokens) * stub.token_interval())
+        text = "".join(tokens)
+        if chat:
+            choice = {"index": 0, "message": {"role": "assistant", "content": text},
+                      "finish_reason": "stop"}
+        else:
+            choice = {"index": 0, "text": text, "finish_reason": "stop"}
+        self._send_json(200, {
+            "id": f"cmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion" if chat else "text_completion",
+            "created": int(time.time()),
+            "model": body.get("model") or stub.config.model,
+            "choices": [choice],
+            "usage": stub.usage(body, tokens),
+        })
+
+    def _stream(self, chat, body):
+        stub = self.server.stub
+        completion_id = f"cmpl-{uuid.uuid4().hex}"
+        model = body.get("model") or stub.config.model
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        tokens = stub.tokens(body)
+        interval = stub.token_interval()
+        for i, token in enumerate(tokens):
+            if i and interval:
+                time.sleep(interval)
+            if chat:
+                choice = {"index": 0, "delta": {"content": token}, "finish_reason": None}
+            else:
+                choice = {"index": 0, "text": token, "finish_reason": None}
+            self._send_event({
+                "id": completion_id,
+                "object": "chat.completion.chunk" if chat else "text_completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [choice],
+            })
+        final = {"index": 0, "delta": {}, "finish_reason": "stop"} if chat else \
+            {"index": 0, "text": "", "finish_reason": "stop"}
+        self._send_event({
+            "id": completion_id,
+            "object": "chat.completion.chunk" if chat else "text_completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [final],
+            "usage": stub.usage(body, tokens),
+        })
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_event(self, payload):
+        self.wfile.write(b"data: " + json.dumps(payload).encode() + b"\n\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class LemonadeStub:
+    """Threaded stand-in server; use as a context manager or via start()/stop()."""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or StubConfig()
+        self.stats = StubStats()
+        self._random = random.Random(self.config.seed)
+        self._random_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def base_url(self, host="127.0.0.1"):
+        return f"http://{host}:{self.port}{API_PREFIX}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def should_fail(self):
+        if self.config.error_rate <= 0:
+            return False
+        with self._random_lock:
+            return self._random.random() < self.config.error_rate
+
+    def first_token_delay(self):
+        jitter = 0.0
+        if self.config.latency_jitter:
+            with self._random_lock:
+                jitter = self._random.uniform(-self.config.latency_jitter, self.config.latency_jitter)
+        return max(0.0, self.config.latency + jitter)
+
+    def token_interval(self):
+        if self.config.tokens_per_second <= 0:
+            return 0.0
+        return 1.0 / self.config.tokens_per_second
+
+    def tokens(self, body):
+        count = self.config.response_tokens
+        requested = body.get("max_tokens") or body.get("max_completion_tokens")
+        if requested:
+            count = min(count, int(requested))
+        return [f"token{i} " for i in range(count)]
+
+    def usage(self, body, tokens):
+        if "messages" in body:
+            prompt = " ".join(str(m.get("content", "")) for m in body["messages"])
+        else:
+            prompt = str(body.get("prompt", ""))
+        prompt_tokens = len(prompt.split())
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0", help="Bind address (default: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=8000, help="Bind port (default: 8000)")
+    parser.add_argument("--model", default=StubConfig.model, help="Model id to report")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds before the first token of each completion")
+    parser.add_argument("--latency-jitter", type=float, default=0.0,
+                        help="Uniform +/- jitter applied to --latency, in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Token generation rate; 0 returns all tokens at once")
+    parser.add_argument("--response-tokens", type=int, default=StubConfig.response_tokens,
+                        help="Tokens per completion (capped by the request's max_tokens)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of completions that fail, between 0 and 1")
+    parser.add_argument("--error-status", type=int, default=StubConfig.error_status,
+                        help="HTTP status returned for injected failures")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    return parser
+
+
+def config_from_args(args):
+    return StubConfig(
+        model=args.model,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    stub = LemonadeStub(config_from_args(args), host=args.host, port=args.port)
+    print(f"Lemonade stand-in listening on http://{args.host}:{stub.port}{API_PREFIX}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,59 @@
+"""In-container load driver used by ``tools.loadtest``.
+
+Piped into ``python3 -`` inside the GAIA container so that request timing is
+not skewed by ``docker exec`` overhead. Runs a shell command repeatedly at a
+fixed concurrency and prints a single JSON document with per-request results.
+Must stay dependency-free: it runs on whatever interpreter the image ships.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_once(command, timeout):
+    start = time.monotonic()
+    try:
+        proc = subprocess.run(
+            command,
+            shell=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+        )
+        returncode = proc.returncode
+        error = proc.stderr.decode("utf-8", errors="ignore")[-500:] if returncode else ""
+    except subprocess.TimeoutExpired:
+        returncode = None
+        error = f"timed out after {timeout}s"
+    return {
+        "latency": time.monotonic() - start,
+        "ok": returncode == 0,
+        "returncode": returncode,
+        "error": error,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, required=True)
+    parser.add_argument("--requests", type=int, required=True)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("command")
+    args = parser.parse_args(argv)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(run_once, args.command, args.timeout) for _ in range(args.requests)]
+        results = [f.result() for f in futures]
+    elapsed = time.monotonic() - start
+
+    json.dump({"elapsed": elapsed, "results": results}, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,225 @@
+"""Throughput harness: drive GAIA inside gaia-linux against the Lemonade stand-in.
+
+Starts ``tools.lemonade_stub`` on the host, points a GAIA container at it and
+runs a GAIA command at a fixed concurrency from inside the container. Reports
+requests/s and latency percentiles, optionally as JSON for CI trend tracking.
+
+Usage:
+    python -m tools.loadtest --image gaia-linux:test --concurrency 8 --requests 64
+    python -m tools.loadtest --container gaia-linux --output loadtest.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from tools.lemonade_stub import LemonadeStub, StubConfig
+
+DEFAULT_COMMAND = 'gaia llm "Say hello"'
+CONTAINER_HOST = "host.docker.internal"
+READY_MARKER = "=== Ready ==="
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    if not ordered:
+        raise ValueError("percentile of empty sequence")
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(results, elapsed):
+    """Aggregate per-request results from the load driver."""
+    latencies = [r["latency"] for r in results if r["ok"]]
+    summary = {
+        "requests": len(results),
+        "ok": len(latencies),
+        "errors": len(results) - len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency_s": {},
+    }
+    if latencies:
+        summary["latency_s"] = {
+            "min": round(min(latencies), 4),
+            "mean": round(sum(latencies) / len(latencies), 4),
+            "max": round(max(latencies), 4),
+            **{f"p{p}": round(percentile(latencies, p), 4) for p in PERCENTILES},
+        }
+    return summary
+
+
+def docker(*args, check=True, **kwargs):
+    """Run the docker CLI with ARGS and capture its output as text."""
+    return subprocess.run(["docker", *args], check=check, capture_output=True, text=True, **kwargs)
+
+
+def start_container(image, lemonade_url, gaia_version=None, skip_install=False):
+    cmd = [
+        "run", "-d",
+        "--add-host", f"{CONTAINER_HOST}:host-gateway",
+        "-e", f"LEMONADE_BASE_URL={lemonade_url}",
+        "-e", f"SKIP_INSTALL={'true' if skip_install else 'false'}",
+    ]
+    if gaia_version:
+        cmd += ["-e", f"GAIA_VERSION={gaia_version}"]
+    cmd += [image, "sleep", "infinity"]
+    return docker(*cmd).stdout.strip()
+
+
+def wait_until_ready(container, timeout):
+    """Follow the container's log stream until the entrypoint prints READY_MARKER.
+
+    Returns the seconds until the marker appeared, as soon as it does. Raises
+    once the container exits without becoming ready, or after TIMEOUT seconds,
+    with the tail of the log.
+    """
+    start = time.monotonic()
+    tail = deque(maxlen=40)
+    timed_out = threading.Event()
+    proc = subprocess.Popen(["docker", "logs", "--follow", container], stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True, errors="replace")
+
+    def expire():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, expire)
+    timer.start()
+    try:
+        for line in proc.stdout:
+            tail.append(line)
+            if READY_MARKER in line:
+                return time.monotonic() - start
+    finally:
+        timer.cancel()
+        proc.kill()
+        proc.wait()
+        proc.stdout.close()
+    log = "".join(tail)
+    if timed_out.is_set():
+        raise TimeoutError(f"Container did not become ready within {timeout} seconds:\n{log}")
+    raise RuntimeError(f"Container exited before becoming ready:\n{log}")
+
+
+def run_driver(container, lemonade_url, command, concurrency, requests, timeout):
+    source = (Path(__file__).parent / "load_driver.py").read_text()
+    proc = subprocess.run(
+        ["docker", "exec", "-i", "-e", f"LEMONADE_BASE_URL={lemonade_url}", container,
+         "python3", "-", "--concurrency", str(concurrency), "--requests", str(requests),
+         "--timeout", str(timeout), command],
+        input=source, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout)
+
+
+def container_metadata(container):
+    image = docker("inspect", "-f", "{{.Config.Image}} {{.Image}}", container).stdout.split()
+    version = docker(
+        "exec", container, "python3", "-c",
+        "import importlib.metadata as m; print(m.version('amd-gaia'))",
+        check=False,
+    ).stdout.strip()
+    return {"image": image[0], "image_id": image[1], "gaia_version": version or None}
+
+
+def format_report(report):
+    s = report["summary"]
+    lines = [
+        f"Image:        {report['metadata']['image']} ({report['metadata']['image_id'][:19]})",
+        f"GAIA version: {report['metadata']['gaia_version'] or 'unknown'}",
+        f"Command:      {report['command']}",
+        f"Concurrency:  {report['concurrency']}",
+        f"Requests:     {s['requests']} ({s['ok']} ok, {s['errors']} failed) in {s['elapsed_s']}s",
+        f"Throughput:   {s['requests_per_s']} requests/s",
+    ]
+    if s["latency_s"]:
+        lat = s["latency_s"]
+        lines.append("Latency (s):  " + "  ".join(
+            f"{k}={lat[k]}" for k in ("min", "mean", *(f"p{p}" for p in PERCENTILES), "max")
+        ))
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--image", help="Start a fresh container from this image")
+    target.add_argument("--container", help="Use an already running GAIA container")
+    parser.add_argument("--gaia-version", help="GAIA_VERSION for a fresh container")
+    parser.add_argument("--skip-install", action="store_true",
+                        help="Start the fresh container with SKIP_INSTALL=true")
+    parser.add_argument("--ready-timeout", type=float, default=600.0,
+                        help="Seconds to wait for a fresh container to become ready")
+    parser.add_argument("--command", default=DEFAULT_COMMAND,
+                        help=f"GAIA command run per request (default: {DEFAULT_COMMAND!r})")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="Requests to run and discard before measuring")
+    parser.add_argument("--request-timeout", type=float, default=300.0)
+    parser.add_argument("--stub-port", type=int, default=0,
+                        help="Host port for the Lemonade stand-in (default: ephemeral)")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--response-tokens", type=int, default=32)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", type=Path, help="Write the full report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = StubConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+    with LemonadeStub(config, host="0.0.0.0", port=args.stub_port) as stub:
+        lemonade_url = stub.base_url(CONTAINER_HOST)
+        container = args.container
+        started = False
+        try:
+            if args.image:
+                container = start_container(args.image, lemonade_url, args.gaia_version,
+                                            args.skip_install)
+                started = True
+                wait_until_ready(container, args.ready_timeout)
+
+            if args.warmup:
+                run_driver(container, lemonade_url, args.command, 1, args.warmup,
+                           args.request_timeout)
+            run = run_driver(container, lemonade_url, args.command, args.concurrency,
+                             args.requests, args.request_timeout)
+            report = {
+                "command": args.command,
+                "concurrency": args.concurrency,
+                "stub": {**vars(config), "stats": stub.stats.snapshot()},
+                "metadata": container_metadata(container),
+                "summary": summarize(run["results"], run["elapsed"]),
+            }
+        finally:
+            if started:
+                docker("rm", "-f", container, check=False)
+
+    print(format_report(report))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    return 0 if report["summary"]["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
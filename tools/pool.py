@@ -0,0 +1,417 @@
+"""Pool of pre-warmed gaia-linux containers for on-demand sessions.
+
+A fresh container needs seconds to install GAIA and report ready, too long
+to start one per user session. ``serve`` keeps ``--size`` containers started
+and ready, hands one out on ``POST /acquire`` without waiting, and starts a
+replacement in the background. Handed-out containers are retired when they
+are released after ``--max-uses`` sessions (1 by default: every session gets
+a container no one used before), and idle ones once they are older than
+``--max-age`` seconds.
+
+``GET /stats`` reports pool hits (a ready container was waiting) and misses
+(the request had to wait for a container to start), with the time misses
+waited, to size the pool: a pool that misses under normal load is too small.
+
+Usage:
+    python -m tools.pool serve --image itomek/gaia-linux:1.0.1 --size 4 --port 8780 \\
+        --env LEMONADE_BASE_URL=https://lemonade.example/api/v1 --env GAIA_VERSION=0.16.1 \\
+        --docker-arg=--cpus=2 --docker-arg=-v --docker-arg=gaia-uv-cache:/var/cache/uv
+    python -m tools.pool acquire --url http://127.0.0.1:8780    # prints the container id
+    python -m tools.pool release --url http://127.0.0.1:8780 CONTAINER
+    python -m tools.pool stats --url http://127.0.0.1:8780
+"""
+
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tools.loadtest import docker, wait_until_ready
+
+
+@dataclass
+class PoolConfig:
+    """Size and lifetime of the pool's containers."""
+
+    image: str
+    size: int = 2
+    max_age: float = 3600.0
+    max_uses: int = 1
+    env: list = field(default_factory=list)
+    docker_args: list = field(default_factory=list)
+    label: str = "gaia-pool"
+    ready_timeout: float = 900.0
+    acquire_timeout: float = 900.0
+    parallel_starts: int = 2
+    retry_delay: float = 5.0
+    reap_interval: float = 10.0
+
+
+class DockerBackend:
+    """Starts and removes pool containers with the docker CLI."""
+
+    def start(self, config):
+        cmd = ["run", "-d", "--label", config.label]
+        for pair in config.env:
+            cmd += ["-e", pair]
+        cmd += [*config.docker_args, config.image, "sleep", "infinity"]
+        return docker(*cmd).stdout.strip()
+
+    def wait_ready(self, container, timeout):
+        wait_until_ready(container, timeout)
+
+    def is_running(self, container):
+        state = docker("inspect", "-f", "{{.State.Running}}", container, check=False)
+        return state.stdout.strip() == "true"
+
+    def remove(self, container):
+        docker("rm", "-f", container, check=False)
+
+
+@dataclass
+class Member:
+    container: str
+    created: float
+    uses: int = 0
+
+
+class Pool:
+    """Warm containers, the ones handed out, and counters for sizing the pool."""
+
+    def __init__(self, config, backend=None, clock=time.monotonic):
+        self.config = config
+        self.backend = backend or DockerBackend()
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._warm = deque()
+        self._leased = {}
+        self._starting = 0
+        self._waiting = 0
+        self._stopped = False
+        self._thread = None
+        self.stats = {"hits": 0, "misses": 0, "miss_wait_s": 0.0, "started": 0,
+                      "start_failures": 0, "released": 0,
+                      "retired": {"age": 0, "uses": 0, "dead": 0}}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._replenish, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, remove_leased=False):
+        """Stop replenishing and remove the warm (and optionally the leased) containers."""
+        with self._cond:
+            self._stopped = True
+            doomed = [member.container for member in self._warm]
+            self._warm.clear()
+            if remove_leased:
+                doomed += list(self._leased)
+                self._leased.clear()
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        for container in doomed:
+            self.backend.remove(container)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def acquire(self, timeout=None):
+        """Hand out a ready container: {"container", "hit", "uses", "age_s"}."""
+        timeout = self.config.acquire_timeout if timeout is None else timeout
+        started = self.clock()
+        with self._cond:
+            member = self._take_warm()
+            hit = member is not None
+            self.stats["hits" if hit else "misses"] += 1
+            if not hit:
+                # The replenisher starts a container for every waiting request
+                self._waiting += 1
+                self._cond.notify_all()
+                try:
+                    while not member:
+                        remaining = timeout - (self.clock() - started)
+                        if self._stopped:
+                            raise TimeoutError("The pool is shutting down")
+                        if remaining <= 0:
+                            raise TimeoutError(f"No container became ready within {timeout:g}s")
+                        self._cond.wait(min(remaining, self.config.reap_interval))
+                        member = self._take_warm()
+                finally:
+                    self._waiting -= 1
+                self.stats["miss_wait_s"] += self.clock() - started
+            member.uses += 1
+            self._leased[member.container] = member
+            self._cond.notify_all()
+        return {"container": member.container, "hit": hit, "uses": member.uses,
+                "age_s": round(self.clock() - member.created, 1)}
+
+    def release(self, container):
+        """Take CONTAINER back; returns whether it was retired. KeyError if unknown."""
+        with self._cond:
+            member = self._leased.pop(container)
+            self.stats["released"] += 1
+            reason = self._retire_reason(member)
+            if not reason:
+                self._warm.append(member)
+                self._cond.notify_all()
+                return False
+            self.stats["retired"][reason] += 1
+            self._cond.notify_all()
+        self.backend.remove(container)
+        return True
+
+    def snapshot(self):
+        with self._cond:
+            requests = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "retired": dict(self.stats["retired"]),
+                "miss_wait_s": round(self.stats["miss_wait_s"], 2),
+                "hit_rate": round(self.stats["hits"] / requests, 3) if requests else None,
+                "size": self.config.size,
+                "warm": len(self._warm),
+                "starting": self._starting,
+                "leased": len(self._leased),
+                "waiting": self._waiting,
+            }
+
+    def _retire_reason(self, member):
+        if member.uses >= self.config.max_uses:
+            return "uses"
+        if self.clock() - member.created >= self.config.max_age:
+            return "age"
+        return None
+
+    def _take_warm(self):
+        """The oldest warm container, or None (lock held; the replenisher retires dead ones)."""
+        return self._warm.popleft() if self._warm else None
+
+    def _reap_dead(self):
+        """Retire warm containers that stopped running, checking them without the lock."""
+        with self._cond:
+            warm = list(self._warm)
+        dead = [member for member in warm if not self.backend.is_running(member.container)]
+        with self._cond:
+            # Skip containers handed out while they were checked
+            dead = [member for member in dead if member in self._warm]
+            for member in dead:
+                self._warm.remove(member)
+                self.stats["retired"]["dead"] += 1
+        for member in dead:
+            self.backend.remove(member.container)
+
+    def _replenish(self):
+        next_check = 0.0
+        while True:
+            if time.monotonic() >= next_check:
+                self._reap_dead()
+                next_check = time.monotonic() + self.config.reap_interval
+            with self._cond:
+                if self._stopped:
+                    return
+                expired = [m for m in self._warm if self.clock() - m.created >= self.config.max_age]
+                for member in expired:
+                    self._warm.remove(member)
+                    self.stats["retired"]["age"] += 1
+                # Keep SIZE containers warm, plus one for every request already waiting
+                wanted = self.config.size + self._waiting - len(self._warm) - self._starting
+                starts = max(0, min(wanted, self.config.parallel_starts - self._starting))
+                self._starting += starts
+            for member in expired:
+                self.backend.remove(member.container)
+            for _ in range(starts):
+                threading.Thread(target=self._start_one, daemon=True).start()
+            with self._cond:
+                if not self._stopped:
+                    self._cond.wait(self.config.reap_interval)
+
+    def _start_one(self):
+        container = None
+        try:
+            container = self.backend.start(self.config)
+            self.backend.wait_ready(container, self.config.ready_timeout)
+        except Exception as error:
+            print(f"pool: container failed to start: {error}", file=sys.stderr)
+            if container:
+                self.backend.remove(container)
+            with self._cond:
+                self.stats["start_failures"] += 1
+            # Keep the slot taken for a while, so a broken image is not restarted in a loop
+            time.sleep(self.config.retry_delay)
+            with self._cond:
+                self._starting -= 1
+                self._cond.notify_all()
+            return
+        with self._cond:
+            self._starting -= 1
+            self.stats["started"] += 1
+            if self._stopped:
+                self.backend.remove(container)
+            else:
+                self._warm.append(Member(container, self.clock()))
+            self._cond.notify_all()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "GaiaPool/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.server.pool.snapshot())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        pool = self.server.pool
+        if self.path == "/acquire":
+            try:
+                self._send_json(200, pool.acquire())
+            except TimeoutError as error:
+                self._send_json(503, {"error": str(error)})
+        elif self.path == "/release":
+            length = int(self.headers.get("Content-Length", 0))
+            container = json.loads(self.rfile.read(length) or b"{}").get("container", "")
+            try:
+                self._send_json(200, {"container": container, "retired": pool.release(container)})
+            except KeyError:
+                self._send_json(404, {"error": f"{container!r} is not a leased container"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _send_json(self, status, payload):
+        data = (json.dumps(payload) + "\n").encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class PoolServer:
+    """HTTP front end of a Pool, run in a background thread."""
+
+    def __init__(self, pool, host="127.0.0.1", port=0):
+        self.pool = pool
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.pool = pool
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def url(self, host="127.0.0.1"):
+        return f"http://{host}:{self.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _request(url, method="GET", payload=None):
+    data = None if payload is None else json.dumps(payload).encode()
+    request = urllib.request.Request(url, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as error:
+        raise SystemExit(f"pool: {json.load(error).get('error', error)}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the pool and its HTTP API")
+    serve.add_argument("--image", required=True, help="gaia-linux image to pool")
+    serve.add_argument("--size", type=int, default=2, help="Containers to keep ready")
+    serve.add_argument("--max-age", type=float, default=3600.0,
+                       help="Retire containers older than this many seconds")
+    serve.add_argument("--max-uses", type=int, default=1,
+                       help="Retire containers after this many sessions")
+    serve.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                       help="Container environment (repeatable), e.g. LEMONADE_BASE_URL=...")
+    serve.add_argument("--docker-arg", action="append", default=[],
+                       help="Extra docker run argument (repeatable), e.g. --docker-arg=--cpus=2")
+    serve.add_argument("--label", default="gaia-pool", help="Label of the pool's containers")
+    serve.add_argument("--parallel-starts", type=int, default=2,
+                       help="Containers started at the same time")
+    serve.add_argument("--ready-timeout", type=float, default=900.0)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8780)
+
+    for name, help_text in (("acquire", "Get a ready container and print its id"),
+                            ("release", "Return a container to the pool"),
+                            ("stats", "Print pool hit/miss counts and occupancy")):
+        client = commands.add_parser(name, help=help_text)
+        client.add_argument("--url", default="http://127.0.0.1:8780")
+        if name == "release":
+            client.add_argument("container")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "acquire":
+        print(_request(f"{args.url}/acquire", "POST", {})["container"])
+        return 0
+    if args.command == "release":
+        _request(f"{args.url}/release", "POST", {"container": args.container})
+        return 0
+    if args.command == "stats":
+        print(json.dumps(_request(f"{args.url}/stats"), indent=2))
+        return 0
+
+    if not any(pair.startswith("LEMONADE_BASE_URL=") for pair in args.env):
+        raise SystemExit("pool: --env LEMONADE_BASE_URL=... is required")
+    config = PoolConfig(
+        image=args.image, size=args.size, max_age=args.max_age, max_uses=args.max_uses,
+        env=args.env, docker_args=args.docker_arg, label=args.label,
+        ready_timeout=args.ready_timeout, parallel_starts=args.parallel_starts,
+    )
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    pool = Pool(config).start()
+    try:
+        with PoolServer(pool, args.host, args.port) as server:
+            print(f"Pool of {args.size} x {args.image} listening on {server.url(args.host)}")
+            stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        leased = pool.snapshot()["leased"]
+        pool.stop()
+        if leased:
+            print(f"Left {leased} leased containers running (label {config.label})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""Fault-injecting stand-in for a Python package index.
+
+Serves the distribution files in a directory as a PEP 503 simple index under
+``/simple``, with configurable latency and injected failures, so the runtime
+install of the GAIA containers can be exercised against a flaky index.
+``make_wheel`` builds minimal, dependency-free wheels to serve.
+
+Usage:
+    python -m tools.pypi_stub --dist-dir ./dists --port 8080 --fail-first 2
+    python -m tools.pypi_stub --fake-package amd-gaia==0.0.1 --error-rate 0.3
+"""
+
+import argparse
+import base64
+import hashlib
+import html
+import json
+import random
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+def normalize(name):
+    """PEP 503 project name normalization."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def project_of(filename):
+    """Project name of a wheel or sdist filename."""
+    if filename.endswith(".whl"):
+        return normalize(filename.split("-")[0])
+    stem = re.sub(r"\.(tar\.gz|zip)$", "", filename)
+    return normalize(stem.rsplit("-", 1)[0])
+
+
+def make_wheel(dest, name, version, package=None, requires=()):
+    """Write a minimal pure-Python wheel for NAME==VERSION into DEST and return its path.
+
+    The wheel contains a single empty top-level PACKAGE (default: the
+    distribution name with underscores) and declares each of REQUIRES
+    (requirement strings) as a dependency.
+    """
+    dist = re.sub(r"[-.]+", "_", name)
+    package = package or dist
+    info = f"{dist}-{version}.dist-info"
+    metadata = f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+    metadata += "".join(f"Requires-Dist: {requirement}\n" for requirement in requires)
+    files = {
+        f"{package}/__init__.py": f'__version__ = "{version}"\n',
+        f"{info}/METADATA": metadata,
+        f"{info}/WHEEL": "Wheel-Version: 1.0\nGenerator: pypi_stub\nRoot-Is-Purelib: true\n"
+                         "Tag: py3-none-any\n",
+    }
+    record = []
+    for path, content in files.items():
+        digest = base64.urlsafe_b64encode(hashlib.sha256(content.encode()).digest()).rstrip(b"=")
+        record.append(f"{path},sha256={digest.decode()},{len(content.encode())}")
+    record.append(f"{info}/RECORD,,")
+    files[f"{info}/RECORD"] = "\n".join(record) + "\n"
+
+    wheel = Path(dest) / f"{dist}-{version}-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w") as archive:
+        for path, content in files.items():
+            archive.writestr(path, content)
+    return wheel
+
+
+@dataclass
+class IndexConfig:
+    """Behaviour knobs for the stand-in index."""
+
+    latency: float = 0.0
+    fail_first: int = 0
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: int | None = None
+
+
+class IndexStats:
+    """Thread-safe counters exposed at ``/stub/stats``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.downloads = {}
+
+    def record(self, error=False, download=None):
+        with self._lock:
+            self.requests += 1
+            self.errors += int(error)
+            if download:
+                self.downloads[download] = self.downloads.get(download, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors,
+                    "downloads": dict(self.downloads)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "PyPIStub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        index = self.server.index
+        if self.path == "/stub/stats":
+            self._send(200, "application/json", _json(index.stats.snapshot()))
+            return
+        if index.should_fail():
+            index.stats.record(error=True)
+            self._send(index.config.error_status, "text/plain", b"Injected failure\n")
+            return
+        time.sleep(index.config.latency)
+
+        path = self.path.split("?", 1)[0]
+        if path in ("/simple", "/simple/"):
+            index.stats.record()
+            links = "".join(f'<a href="/simple/{p}/">{p}</a>\n' for p in index.projects())
+            self._send(200, "text/html", _page("Simple index", links))
+        elif path.startswith("/simple/"):
+            project = normalize(path[len("/simple/"):].strip("/"))
+            files = index.files(project)
+            index.stats.record()
+            if not files:
+                self._send(404, "text/plain", b"Not found\n")
+                return
+            links = "".join(
+                f'<a href="/files/{html.escape(f.name)}#sha256={_sha256(f)}">'
+                f"{html.escape(f.name)}</a>\n" for f in files
+            )
+            self._send(200, "text/html", _page(f"Links for {project}", links))
+        elif path.startswith("/files/"):
+            target = index.dist_dir / Path(path[len("/files/"):]).name
+            if not target.is_file():
+                index.stats.record()
+                self._send(404, "text/plain", b"Not found\n")
+                return
+            index.stats.record(download=target.name)
+            self._send(200, "application/octet-stream", target.read_bytes())
+        else:
+            index.stats.record()
+            self._send(404, "text/plain", b"Not found\n")
+
+    def _send(self, status, content_type, data):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _json(payload):
+    return json.dumps(payload).encode()
+
+
+def _page(title, body):
+    return (f"<!DOCTYPE html>\n<html><head><title>{title}</title></head><body>\n"
+            f"{body}</body></html>\n").encode()
+
+
+def _sha256(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class PyPIStub:
+    """Threaded stand-in index; use as a context manager or via start()/stop()."""
+
+    def __init__(self, dist_dir, config=None, host="127.0.0.1", port=0):
+        self.dist_dir = Path(dist_dir)
+        self.config = config or IndexConfig()
+        self.stats = IndexStats()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._failures_left = self.config.fail_first
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.index = self
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def index_url(self, host="127.0.0.1"):
+        return f"http://{host}:{self.port}/simple"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def should_fail(self):
+        with self._lock:
+            if self._failures_left > 0:
+                self._failures_left -= 1
+                return True
+            return self.config.error_rate > 0 and self._random.random() < self.config.error_rate
+
+    def projects(self):
+        return sorted({project_of(f.name) for f in self.dist_dir.iterdir() if f.is_file()})
+
+    def files(self, project):
+        return sorted(f for f in self.dist_dir.iterdir()
+                      if f.is_file() and project_of(f.name) == project)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dist-dir", type=Path, help="Directory of wheels/sdists to serve")
+    parser.add_argument("--fake-package", action="append", default=[], metavar="NAME==VERSION",
+                        help="Serve a generated empty wheel (repeatable)")
+    parser.add_argument("--host", default="0.0.0.0", help="Bind address (default: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=8080, help="Bind port (default: 8080)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each response")
+    parser.add_argument("--fail-first", type=int, default=0,
+                        help="Fail this many requests before serving normally")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests that fail, between 0 and 1")
+    parser.add_argument("--error-status", type=int, default=IndexConfig.error_status,
+                        help="HTTP status returned for injected failures")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    dist_dir = args.dist_dir or Path(tempfile.mkdtemp(prefix="pypi-stub-"))
+    for spec in args.fake_package:
+        name, version = spec.split("==", 1)
+        make_wheel(dist_dir, name, version)
+    config = IndexConfig(latency=args.latency, fail_first=args.fail_first,
+                         error_rate=args.error_rate, error_status=args.error_status,
+                         seed=args.seed)
+    stub = PyPIStub(dist_dir, config, host=args.host, port=args.port)
+    print(f"Package index stand-in listening on http://{args.host}:{stub.port}/simple "
+          f"(serving {dist_dir})")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
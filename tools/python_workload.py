@@ -0,0 +1,118 @@
+"""In-container workload used by ``tools.bench_python``.
+
+Piped into the interpreter under test (``python3 -``) inside the GAIA
+container. Times interpreter and GAIA startup (``python -c pass``,
+``import gaia`` and ``gaia --help`` as fresh processes of the same
+interpreter) and a few CPU-bound pure-Python kernels of the kind agent code
+spends its time in: object-heavy arithmetic, JSON round trips, regular
+expressions and dict/string manipulation. Prints a single JSON document with
+the median seconds of each. Must stay dependency-free.
+"""
+
+import argparse
+import json
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import sysconfig
+import time
+
+
+def nbody(steps=20000):
+    bodies = [[[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], 39.47],
+              [[4.84, -1.16, -0.10], [0.61, 2.81, -0.02], 0.037],
+              [[8.34, 4.12, -0.40], [-1.01, 1.83, 0.01], 0.011],
+              [[12.89, -15.11, -0.22], [1.08, 0.87, -0.01], 0.0017],
+              [[15.37, -25.91, 0.17], [0.98, 0.59, -0.03], 0.002]]
+    pairs = [(bodies[i], bodies[j]) for i in range(len(bodies)) for j in range(i + 1, len(bodies))]
+    for _ in range(steps):
+        for ([x1, y1, z1], v1, m1), ([x2, y2, z2], v2, m2) in pairs:
+            dx, dy, dz = x1 - x2, y1 - y2, z1 - z2
+            mag = 0.01 * (dx * dx + dy * dy + dz * dz) ** -1.5
+            v1[0] -= dx * m2 * mag
+            v1[1] -= dy * m2 * mag
+            v1[2] -= dz * m2 * mag
+            v2[0] += dx * m1 * mag
+            v2[1] += dy * m1 * mag
+            v2[2] += dz * m1 * mag
+        for position, velocity, _ in bodies:
+            position[0] += 0.01 * velocity[0]
+            position[1] += 0.01 * velocity[1]
+            position[2] += 0.01 * velocity[2]
+
+
+def json_roundtrip(rounds=300):
+    message = {"role": "assistant", "content": "word " * 200,
+               "tool_calls": [{"id": f"call_{i}", "arguments": {"path": f"/src/{i}.py", "line": i}}
+                              for i in range(20)]}
+    history = [message] * 20
+    for _ in range(rounds):
+        json.loads(json.dumps({"model": "gaia", "messages": history}))
+
+
+def regex(rounds=200):
+    text = "\n".join(f"def handler_{i}(request, *args): return {{'status': {i % 5}00}}"
+                     for i in range(300))
+    pattern = re.compile(r"def (\w+)\((\w+)[^)]*\): return \{'status': (\d+)\}")
+    for _ in range(rounds):
+        assert len(pattern.findall(text)) == 300
+
+
+def dicts_and_strings(rounds=100):
+    words = [f"token{i % 997}" for i in range(20000)]
+    for _ in range(rounds):
+        counts = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        " ".join(sorted(counts, key=counts.get)).upper().split()
+
+
+KERNELS = {"nbody": nbody, "json": json_roundtrip, "regex": regex, "dicts_strings": dicts_and_strings}
+
+
+def median_seconds(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples), 4)
+
+
+def startup(command, runs):
+    return median_seconds(lambda: subprocess.run(command, stdout=subprocess.DEVNULL, check=True), runs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement (median kept)")
+    parser.add_argument("--module", default="gaia", help="Module whose import is timed")
+    parser.add_argument("--cli", default="gaia", help="Console script timed with --help")
+    args = parser.parse_args(argv)
+
+    # Run the console script with this interpreter, whatever its shebang says
+    cli = shutil.which(args.cli)
+    if not cli:
+        raise SystemExit(f"{args.cli} not found on PATH")
+    results = {
+        "python_startup_s": startup([sys.executable, "-c", "pass"], args.runs),
+        "import_gaia_s": startup([sys.executable, "-c", f"import {args.module}"], args.runs),
+        "gaia_help_s": startup([sys.executable, cli, "--help"], args.runs),
+    }
+    for name, kernel in KERNELS.items():
+        kernel()  # warm up
+        results[f"{name}_s"] = median_seconds(kernel, args.runs)
+    print(json.dumps({
+        "executable": sys.executable,
+        "version": platform.python_version(),
+        "config_args": sysconfig.get_config_var("CONFIG_ARGS") or "",
+        "results": results,
+    }))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Record which image files a GAIA container reads at startup.
+
+Runs the image's entrypoint and a GAIA command under ``strace`` and writes the
+files they opened or executed, in first-access order, as a prioritized-files
+record for eStargz conversion (``nerdctl image convert --estargz
+--estargz-record-in``). Lazy-pulling snapshotters fetch these files first, so
+a new node reaches "Ready" without waiting for the rest of the image.
+
+Usage:
+    python -m tools.startup_record --image gaia-linux:test --output startup.record
+    python -m tools.startup_record --image gaia-dev:test --command 'gaia --help' \\
+        -e LEMONADE_BASE_URL=http://localhost:8000/api/v1 -e SKIP_INSTALL=true
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from tools.loadtest import docker
+
+DEFAULT_COMMAND = "gaia --version"
+DEFAULT_ENV = ("LEMONADE_BASE_URL=http://localhost:8000/api/v1",)
+TRACE_FILE = "/tmp/startup.strace"
+# Pseudo-filesystems and scratch space are never part of the image layers
+IGNORED_PREFIXES = ("/proc/", "/sys/", "/dev/", "/run/", "/tmp/")
+
+_CALL = re.compile(r'^(?P<pid>\d+)\s+(?:open|openat|execve)\((?:[A-Z_]+, |-?\d+, )?"(?P<path>[^"]+)"')
+_UNFINISHED = re.compile(r"<unfinished \.\.\.>$")
+_RESUMED = re.compile(r"^(?P<pid>\d+)\s+<\.\.\. (?:open|openat|execve) resumed>")
+_RESULT = re.compile(r"\)\s+=\s+(?P<result>-?\d+)")
+
+
+def parse_trace(lines):
+    """Absolute paths successfully opened or executed, in first-access order.
+
+    Expects ``strace -f`` output; calls split across lines by other processes
+    (``<unfinished ...>`` / ``<... resumed>``) are joined by pid.
+    """
+    pending = {}
+    seen = {}
+
+    def record(path, result_line):
+        result = _RESULT.search(result_line)
+        if result and int(result.group("result")) >= 0 and path.startswith("/") \
+                and not path.startswith(IGNORED_PREFIXES):
+            seen.setdefault(path, None)
+
+    for line in lines:
+        line = line.rstrip("\n")
+        call = _CALL.match(line)
+        if call:
+            if _UNFINISHED.search(line):
+                pending[call.group("pid")] = call.group("path")
+            else:
+                record(call.group("path"), line)
+            continue
+        resumed = _RESUMED.match(line)
+        if resumed and resumed.group("pid") in pending:
+            record(pending.pop(resumed.group("pid")), line)
+    return list(seen)
+
+
+def to_record(paths):
+    """Record file content: one ``{"path": ...}`` JSON object per line."""
+    return "".join(json.dumps({"path": path}) + "\n" for path in paths)
+
+
+def record_startup(image, command, env):
+    """Trace the entrypoint running COMMAND in IMAGE; return image files in access order."""
+    cmd = ["run", "-d", "--user", "root", "--cap-add", "SYS_PTRACE", "--entrypoint", "sleep"]
+    for item in env:
+        cmd += ["-e", item]
+    container = docker(*cmd, image, "infinity").stdout.strip()
+    try:
+        docker("exec", container, "sh", "-c",
+                "apt-get update -qq && apt-get install -y -qq --no-install-recommends strace")
+        # strace runs as root (so sudo still works under it) and the traced
+        # entrypoint as the gaia user, as in a normal container start
+        traced = subprocess.run(
+            ["docker", "exec", "-e", "HOME=/home/gaia", "-e", "USER=gaia", container,
+             "strace", "-f", "-qq", "-u", "gaia", "-e", "trace=open,openat,execve",
+             "-o", TRACE_FILE, "/usr/local/bin/entrypoint.sh", "zsh", "-c", command],
+            capture_output=True, text=True,
+        )
+        if traced.returncode != 0:
+            print(f"WARNING: startup command exited with {traced.returncode}; "
+                  "recording the files it read anyway", file=sys.stderr)
+        trace = docker("exec", container, "cat", TRACE_FILE).stdout.splitlines()
+        # Keep regular files, resolved through symlinks as the layers store them
+        resolved = docker(
+            "exec", "-i", container, "sh", "-c",
+            'while read -r p; do f=$(readlink -f -- "$p") && [ -f "$f" ] && printf "%s\\n" "$f"; '
+            "done",
+            input="".join(f"{path}\n" for path in parse_trace(trace)),
+        ).stdout.splitlines()
+        return list(dict.fromkeys(path for path in resolved
+                                  if not path.startswith(IGNORED_PREFIXES)))
+    finally:
+        docker("rm", "-f", container, check=False)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", required=True, help="GAIA image to record")
+    parser.add_argument("--command", default=DEFAULT_COMMAND,
+                        help=f"Command run after the entrypoint (default: {DEFAULT_COMMAND})")
+    parser.add_argument("-e", "--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Container environment (repeatable; default: "
+                             f"{' '.join(DEFAULT_ENV)})")
+    parser.add_argument("--output", type=Path, required=True, help="Record file to write")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    paths = record_startup(args.image, args.command, args.env or list(DEFAULT_ENV))
+    if not paths:
+        print("ERROR: no image files recorded", file=sys.stderr)
+        return 1
+    args.output.write_text(to_record(paths))
+    print(f"Recorded {len(paths)} startup files to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
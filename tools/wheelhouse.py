@@ -0,0 +1,82 @@
+"""Refresh the wheelhouse that the integration tests serve as an offline index.
+
+Builds wheels for ``amd-gaia[dev,mcp,eval,rag]`` and all of its dependencies
+inside a gaia-linux image, so they match the container's platform and Python,
+and replaces the contents of the wheelhouse with them. The test fixtures serve
+the wheelhouse with ``tools.pypi_stub`` and install the GAIA version found in
+it, so ``pytest -m integration`` needs no network access.
+
+Usage:
+    python -m tools.wheelhouse --gaia-version 0.16.0
+    python -m tools.wheelhouse --image itomek/gaia-linux:1.0.0 --dest /tmp/wheelhouse
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from tools.pypi_stub import normalize
+
+DEFAULT_IMAGE = "gaia-linux:test"
+DEFAULT_DEST = Path(__file__).resolve().parent.parent / ".wheelhouse"
+REQUIREMENT = "amd-gaia[dev,mcp,eval,rag]"
+
+
+def gaia_version(wheelhouse):
+    """The amd-gaia version in WHEELHOUSE, or None if it holds no amd-gaia wheel."""
+    wheelhouse = Path(wheelhouse)
+    if not wheelhouse.is_dir():
+        return None
+    for wheel in sorted(wheelhouse.glob("*.whl")):
+        name, version = wheel.name.split("-")[:2]
+        if normalize(name) == "amd-gaia":
+            return version
+    return None
+
+
+def refresh(dest, version=None, image=DEFAULT_IMAGE):
+    """Rebuild DEST with wheels for GAIA VERSION (latest if None); return the version built."""
+    dest = Path(dest).resolve()
+    dest.mkdir(parents=True, exist_ok=True)
+    for old in dest.iterdir():
+        if old.is_file() and re.search(r"\.(whl|tar\.gz|zip)$", old.name):
+            old.unlink()
+
+    requirement = f"{REQUIREMENT}=={version}" if version else REQUIREMENT
+    subprocess.run(
+        ["docker", "run", "--rm", "--entrypoint", "",
+         "--user", f"{os.getuid()}:{os.getgid()}", "-e", "HOME=/tmp",
+         "-v", f"{dest}:/wheelhouse", image,
+         "python3", "-m", "pip", "wheel", "--no-cache-dir", "--wheel-dir", "/wheelhouse",
+         requirement],
+        check=True,
+    )
+    built = gaia_version(dest)
+    if built is None:
+        raise RuntimeError(f"pip wheel did not produce an amd-gaia wheel in {dest}")
+    return built
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gaia-version", help="GAIA version to fetch (default: latest)")
+    parser.add_argument("--image", default=DEFAULT_IMAGE,
+                        help=f"gaia-linux image to build the wheels in (default: {DEFAULT_IMAGE})")
+    parser.add_argument("--dest", type=Path, default=DEFAULT_DEST,
+                        help="Wheelhouse directory (default: .wheelhouse in the repository)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    version = refresh(args.dest, args.gaia_version, args.image)
+    wheels = len(list(args.dest.glob("*.whl")))
+    print(f"Wheelhouse {args.dest}: amd-gaia {version}, {wheels} wheels")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())